@@ -0,0 +1,48 @@
+import time
+import argparse
+
+# Classes
+from env.classes.pca9685 import PCA9685, FakeI2CBus
+from env.classes.servo_backend import PCA9685Backend
+
+# Config
+from env.config import config
+
+class PerChannelBackend(PCA9685Backend):
+    """Writes every channel with its own transaction (like adafruit_servokit does)."""
+    def frame_bytes(self, channels: list[int]) -> int:
+        return 6 * len(channels)
+
+    def _write_frame(self, angles: dict[int, int]) -> list[int]:
+        committed_ns: list[int] = []
+        for channel, angle in angles.items():
+            self.pca9685.write_frame({channel: angle})
+            committed_ns.append(time.perf_counter_ns())
+        return committed_ns
+
+def run(backend: PCA9685Backend, channels: list[int], frames: int) -> dict[str, float]:
+    for i in range(frames):
+        angle: int = 45 + i % 90
+        backend.write_frame({channel: angle for channel in channels})
+    return backend.frame_stats.as_dict()
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Compares per-channel writes with a single block write per frame on a simulated I2C bus.")
+    arg_parser.add_argument("--bus-speed", type=float, default=400_000, help="Simulated I2C clock in Hz.")
+    arg_parser.add_argument("--frames", type=int, default=200, help="Amount of frames to write.")
+    args = arg_parser.parse_args()
+
+    legs = (config.leg_configuration_rf, config.leg_configuration_rb, config.leg_configuration_lf, config.leg_configuration_lb)
+    channels: list[int] = [channel for leg in legs for channel in leg["channels"].values()]
+
+    for name, backend_class in (("per-channel", PerChannelBackend), ("block", PCA9685Backend)):
+        bus: FakeI2CBus = FakeI2CBus(bus_speed_hz=args.bus_speed)
+        backend: PCA9685Backend = backend_class(pca9685=PCA9685(bus=bus))
+        bus.transactions.clear()
+
+        stats: dict[str, float] = run(backend=backend, channels=channels, frames=args.frames)
+        print(f"{name} ({len(bus.transactions) / args.frames:.0f} transaction(s) per frame):")
+        for key, value in stats.items():
+            print(f"  {key:<15} {value:.4f}")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,27 @@
+import argparse
+
+# Classes
+from env.classes.ik_lut import IKLookupTable
+
+# Config
+from env.config import config
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Builds the IK lookup table used if config.ik_solver is set to 'lut'.")
+    arg_parser.add_argument("--resolution", type=float, default=config.ik_lut_resolution, help="Distance between two grid points in mm.")
+    arg_parser.add_argument("--output", type=str, default=config.ik_lut_file, help="Path of the .npy file.")
+    arg_parser.add_argument("--samples", type=int, default=100_000, help="Amount of random positions for the error report.")
+    arg_parser.add_argument("--report-only", action="store_true", help="Only print the error report of an existing lookup table.")
+    args = arg_parser.parse_args()
+
+    if args.report_only:
+        lookup_table = IKLookupTable.load(args.output)
+    else:
+        lookup_table = IKLookupTable.build(resolution=args.resolution)
+        lookup_table.save(args.output)
+
+    print(f"Error report (resolution={lookup_table.resolution} mm, grid={lookup_table.grid.shape[:3]}):")
+    for key, value in lookup_table.error_report(samples=args.samples).items():
+        print(f"  {key:<20} {value:.4f}")
+
+if __name__ == "__main__": main()
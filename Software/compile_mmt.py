@@ -0,0 +1,31 @@
+import sys
+import argparse
+
+# Config
+from env.config import config
+config.servo_output = "simulated"  # Only the leg geometry and servo ranges are needed; Nothing is moved
+
+# Classes
+from env.classes.movement import Movement
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Compiles MMT files ahead of time and reports every block that can't be reached or exceeds the range of a servo.")
+    arg_parser.add_argument("files", nargs="+", help="MMT files (*.mmt).")
+    args = arg_parser.parse_args()
+    config.debug = False
+
+    movement: Movement = Movement()
+    failed: int = 0
+
+    for file_path in args.files:
+        try:
+            timeline = movement.compile_mmt(file_path)
+        except (ValueError, OSError) as e:  # MMTCompileError and syntax errors of the parser
+            print(e)
+            failed += 1
+            continue
+        print(f"'{file_path}': OK ({timeline.duration:.2f} s, {len(timeline.times)} ticks)")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__": main()
@@ -1,4 +1,10 @@
-from adafruit_servokit import Servo  # type:ignore[import-untyped, import-not-found]
+from numbers import Integral
+from numpy import asarray, array_equal, zeros, float64
+from numpy.typing import ArrayLike, NDArray
+from typing import Iterable, Iterator, Optional, Union
+
+# Classes
+from env.classes.servo_backend import ServoBackend
 
 # Decorators
 from env.decr.decorators import validate_types
@@ -7,11 +13,18 @@ from env.decr.decorators import validate_types
 from env.config import config
 
 class ServoWrapper:
-    __slots__: tuple[str, str] = ("_servo", "_servo_angle")
+    __slots__: tuple[str, str, str] = ("_backend", "_channel", "_servo_angle")
 
-    def __init__(self, servo: Servo) -> None:
-        self._servo: Servo = servo
-        self._servo_angle: int = int(self._servo.angle) if self._servo.angle is not None else config.servo_normal_position
+    def __init__(self, backend: ServoBackend, channel: int) -> None:
+        self._backend: ServoBackend = backend
+        self._channel: int = channel
+        angle: Optional[int] = self._backend.initial_angle(channel)
+        self._servo_angle: int = angle if angle is not None else config.servo_normal_position
+
+    @property
+    def backend(self) -> ServoBackend: return self._backend
+    @property
+    def channel(self) -> int:          return self._channel
 
     @property
     def angle(self) -> int:
@@ -19,13 +32,21 @@ class ServoWrapper:
 
     @angle.setter
     def angle(self, new_angle: int) -> None:
+        self._set(new_angle)
+        self._backend.write(self._channel, new_angle)
+
+    def stage(self, new_angle: int) -> None:
+        """Stores a new angle in the shadow registers of the backend. It is written with the next flush of the backend."""
+        self._set(new_angle)
+        self._backend.stage(self._channel, new_angle)
+
+    def _set(self, new_angle: int) -> None:
         if not isinstance(new_angle, int):
             raise TypeError(f"Angle must be an integer got {type(new_angle)}")
         if not 0 <= new_angle <= 180:
             raise ValueError("Angle must be between 0 and 180 degrees")
 
         self._servo_angle = new_angle
-        self._servo.angle = new_angle
 
 class Coordinate:
     """Coordinate object containing xyz of a coordinate."""
@@ -124,3 +145,93 @@ class Coordinate:
     def __mul__(self, other: float)        -> 'Coordinate': return Coordinate(self.x *  other,   self.y *  other,   self.z *  other  )
     def __truediv__(self, other: float)    -> 'Coordinate': return Coordinate(self.x /  other,   self.y /  other,   self.z /  other  )
     def __floordiv__(self, other: float)   -> 'Coordinate': return Coordinate(self.x // other,   self.y // other,   self.z // other  )
+
+class CoordinateArray:
+    """
+    Multiple coordinates stored as a single float64 array of shape (N, 3) (struct-of-arrays instead of a list of Coordinate objects).<br>
+    Arithmetic is vectorized over all rows; Slicing returns views which share the memory of the original array.\nUnit: mm
+    """
+    __slots__: tuple[str] = ("_xyz",)
+    __hash__ = None  # type:ignore[assignment]  # Mutable
+
+    def __init__(self, xyz: ArrayLike) -> None:
+        """Initialize from anything array-like with the shape (N, 3). A float64 array is used without copying."""
+        self._xyz: NDArray[float64] = asarray(xyz, dtype=float64)
+        if self._xyz.ndim != 2 or self._xyz.shape[1] != 3:
+            raise ValueError(f"CoordinateArray must have the shape (N, 3); got {self._xyz.shape}.")
+
+    @classmethod
+    def from_coordinates(cls, coordinates: Iterable[Coordinate]) -> "CoordinateArray":
+        return cls([coordinate.get_xyz() for coordinate in coordinates] or zeros((0, 3)))
+
+    @classmethod
+    def zeros(cls, length: int) -> "CoordinateArray":
+        return cls(zeros((length, 3)))
+
+
+    # Coordinate properties (column views)
+    @property
+    def xyz(self) -> NDArray[float64]: return self._xyz
+    @property
+    def x(self) -> NDArray[float64]:   return self._xyz[:, 0]
+    @property
+    def y(self) -> NDArray[float64]:   return self._xyz[:, 1]
+    @property
+    def z(self) -> NDArray[float64]:   return self._xyz[:, 2]
+
+    def row(self, idx: int) -> NDArray[float64]:                   return self._xyz[idx]
+    def to_coordinates(self) -> list[Coordinate]:                  return [Coordinate(x, y, z) for x, y, z in self._xyz.tolist()]
+    def copy(self) -> "CoordinateArray": return CoordinateArray(self._xyz.copy())
+    def with_offset(self, xyz: tuple[float, float, float]) -> "CoordinateArray": return CoordinateArray(self._xyz + xyz)
+
+
+    # Adding values to xyz (in place, like Coordinate)
+    def add_xyz(self, x: float, y: float, z: float) -> None:
+        self._xyz += (x, y, z)
+
+    def add_xyz_tuple(self, xyz: tuple[float, float, float]) -> None:
+        self._xyz += xyz
+
+
+    # Sequence
+    def __len__(self) -> int:
+        return len(self._xyz)
+
+    def __iter__(self) -> Iterator[Coordinate]:
+        return iter(self.to_coordinates())
+
+    def __getitem__(self, idx: Union[int, slice, NDArray]) -> Union[Coordinate, "CoordinateArray"]:
+        """Returns a Coordinate for an integer index (Python or NumPy integer) and a CoordinateArray (view for slices) otherwise."""
+        if isinstance(idx, Integral):
+            x, y, z = self._xyz[idx].tolist()
+            return Coordinate(x, y, z)
+        return CoordinateArray(self._xyz[idx])
+
+
+    # Debug
+    def __str__(self) -> str:
+        return f"CoordinateArray({len(self)} coordinates)"
+
+    def __repr__(self) -> str:
+        return f"CoordinateArray({self._xyz.tolist()})"
+
+
+    # Equality
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CoordinateArray):
+            return False
+        return array_equal(self._xyz, other._xyz)
+
+
+    # Calculating (other can be a CoordinateArray, a Coordinate or an xyz tuple which are applied to every row)
+    @staticmethod
+    def _operand(other: Union["CoordinateArray", Coordinate, tuple[float, float, float], float]) -> Union[NDArray[float64], tuple[float, float, float], float]:
+        if isinstance(other, CoordinateArray): return other._xyz
+        if isinstance(other, Coordinate):      return other.get_xyz()
+        return other
+
+    def __add__(self, other: Union["CoordinateArray", Coordinate, tuple[float, float, float]]) -> "CoordinateArray": return CoordinateArray(self._xyz +  self._operand(other))
+    def __sub__(self, other: Union["CoordinateArray", Coordinate, tuple[float, float, float]]) -> "CoordinateArray": return CoordinateArray(self._xyz -  self._operand(other))
+    def __mul__(self, other: Union[float, tuple[float, float, float]]) -> "CoordinateArray": return CoordinateArray(self._xyz *  self._operand(other))
+    def __truediv__(self, other: Union[float, tuple[float, float, float]]) -> "CoordinateArray": return CoordinateArray(self._xyz /  self._operand(other))
+    def __floordiv__(self, other: Union[float, tuple[float, float, float]]) -> "CoordinateArray": return CoordinateArray(self._xyz // self._operand(other))
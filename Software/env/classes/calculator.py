@@ -1,48 +1,77 @@
-from numpy import arange
+from math import floor
+from typing import Optional
+from numpy import arange, float64
+from numpy.typing import NDArray
 
 # Config
 from env.config import config
 
 # Classes
-from env.classes.Classes import Coordinate
+from env.classes.Classes import CoordinateArray
 from env.decr.decorators import validate_types
 
 # Func
-from env.func.calculations import calc_circle_coordinates
+from env.func.calculations import calc_circle_coordinate_table
 from env.func.DEBUG import dprint
 
 class Calculator:
     def __init__(self) -> None:
-        # Dictionary of stored Coordinates
-        # circle_multiplier -> step_width -> angle -> max_points -> list of Coordinates
-        self.circle_coords: dict[float, dict[int, list[Coordinate]]] = {}
+        # Table of the circle coordinates of all pregenerated step widths and angles
+        # step width index -> angle (0-359) -> point -> xyz
+        self.table: Optional[NDArray[float64]] = None
+        self.step_widths: NDArray[float64] = arange(0)
         self.circle_multiplier: float = config.number_a
 
-    @validate_types
-    def _pregenerate_coordinates_by_step_width(self, step_width: float) -> None:
-        # Generate circle coordinates for each angle
-        for angle in range(360):  # 0 to 359 degrees
-            # Create missing keys
-            self.circle_coords.setdefault(step_width, {}).setdefault(angle, [])
-
-            circle_coords = calc_circle_coordinates(step_width=step_width, angle=angle)
-            self.circle_coords[step_width][angle] = circle_coords
-        
     @validate_types
     def pregenerate_coordinates(self, frm: float, to: float, step: float) -> None:
-        # Generate circle coordinates for each step width
-        for width in arange(frm, to+step, step):
-            dprint(f"Pregenerate coordinates for step_width={width:.1f}...")
-            self._pregenerate_coordinates_by_step_width(round(width, 1))
+        # Generate circle coordinates for each step width and angle (0 to 359 degrees)
+        self.step_widths = arange(frm, to + step / 2, step).round(1)
+        dprint(f"Pregenerate coordinates for {len(self.step_widths)} step widths from {frm} to {to}...")
+        self.table = calc_circle_coordinate_table(step_widths=self.step_widths, angles=arange(360), smoothness=self.circle_multiplier)
+        self.table.setflags(write=False)
 
         dprint(f"Done! Pregenerated coords from {frm} to {to}.")
 
+    def _width_index(self, step_width: float) -> float:
+        """Returns the (fractional) index of a step width in the table."""
+        if self.table is None: raise KeyError("No coordinates are pregenerated; Call pregenerate_coordinates first.")
+        if not (self.step_widths[0] <= step_width <= self.step_widths[-1]):
+            raise KeyError(f"Coordinates for step_width {step_width} are not pregenerated (range {self.step_widths[0]} - {self.step_widths[-1]}).")
+
+        return (step_width - self.step_widths[0]) / (self.step_widths[1] - self.step_widths[0]) if len(self.step_widths) > 1 else 0.0
+
     @validate_types
-    def get_coordinates(self, step_width: float, angle: int) -> list[Coordinate]:
+    def get_coordinates(self, step_width: float, angle: int) -> CoordinateArray:
         if step_width <= 0:       raise ValueError(f"Step width must be greater than 0; got {step_width}.")
         if not (0 <= angle <= 359): raise ValueError(f"Angle must be between 0 and 360 (both included); got {angle}.")
-        
-        try:
-            return self.circle_coords[step_width][angle]
-        except KeyError:
+
+        idx: float = self._width_index(step_width)
+        if abs(idx - round(idx)) > 1e-6:
             raise KeyError(f"Coordinates for step_width {step_width} with angle {angle} are not pregenerated.")
+        return CoordinateArray(self.table[round(idx), angle])  # type:ignore[index]
+
+    def interpolate(self, step_width: float, angle: float) -> CoordinateArray:
+        """
+        Returns the circle of any step width and angle (in degrees) inside of the pregenerated range.<br>
+        Interpolates bilinearly between the four surrounding table entries, so no trigonometry runs.
+
+        :param step_width: Step width in mm.
+        :param angle: Direction of the circle in degrees (wraps around at 360).
+        """
+        if step_width <= 0: raise ValueError(f"Step width must be greater than 0; got {step_width}.")
+
+        width_idx: float = self._width_index(step_width)
+        w0: int = min(floor(width_idx), len(self.step_widths) - 2) if len(self.step_widths) > 1 else 0
+        w1: int = min(w0 + 1, len(self.step_widths) - 1)
+        tw: float = width_idx - w0
+
+        angle %= 360
+        a0: int = floor(angle) % 360
+        a1: int = (a0 + 1) % 360
+        ta: float = angle - floor(angle)
+
+        table: NDArray[float64] = self.table  # type:ignore[assignment]
+        return CoordinateArray(
+            (table[w0, a0] * (1 - ta) + table[w0, a1] * ta) * (1 - tw) +
+            (table[w1, a0] * (1 - ta) + table[w1, a1] * ta) * tw
+        )
@@ -0,0 +1,90 @@
+import os
+from typing import Iterator, Optional
+from numpy import float64
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.mmt_parser import Parser
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+class CatalogueEntry:
+    """
+    Compiled movement of the catalogue and its metadata.
+
+    :param name (str): Name of the movement (file name without .mmt).
+    :param file_path (str): Path of the MMT-File.
+    :param durations (NDArray[float64]): Durations of all blocks.
+    :param coordinates (NDArray[float64]): Array of shape (blocks, legs, 3) with the position of each leg in each block.
+    """
+    __slots__: tuple[str, ...] = ("name", "file_path", "blocks", "duration", "bounds_min", "bounds_max")
+
+    def __init__(self, name: str, file_path: str, durations: NDArray[float64], coordinates: NDArray[float64]) -> None:
+        self.name: str = name
+        self.file_path: str = file_path
+        self.blocks: int = len(durations)
+        self.duration: float = float(durations.sum())
+
+        # Bounding box of all foot positions
+        self.bounds_min: tuple[float, float, float] = tuple(coordinates.reshape(-1, 3).min(axis=0).tolist()) if self.blocks else (0.0, 0.0, 0.0)  # type:ignore[assignment]
+        self.bounds_max: tuple[float, float, float] = tuple(coordinates.reshape(-1, 3).max(axis=0).tolist()) if self.blocks else (0.0, 0.0, 0.0)  # type:ignore[assignment]
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "file_path":  self.file_path,
+            "blocks":     self.blocks,
+            "duration":   self.duration,
+            "bounds_min": self.bounds_min,
+            "bounds_max": self.bounds_max,
+        }
+
+class MovementCatalogue:
+    """
+    Index of the MMT movements of a folder (name -> compiled movement with metadata).<br>
+    The files are parsed by the parser (in a process pool); Lookups by name are a single dict access.
+
+    :param parser (Parser): Parser which holds the compiled movements.
+    """
+    def __init__(self, parser: Parser) -> None:
+        self.parser: Parser = parser
+        self.entries: dict[str, CatalogueEntry] = {}
+
+    def load_folder(self, folder_path: str = config.mmt_default_path, workers: Optional[int] = None) -> list[str]:
+        """
+        Parses all MMT-Files of a folder and adds them to the index. Test files and hidden files are skipped.
+
+        :param folder_path: Folder of the MMT-Files.
+        :param workers: Amount of worker processes (see Parser.parse_files). Defaults to config.mmt_parse_workers.
+        :return (list[str]): Names of the added movements.
+        """
+        file_paths: list[str] = [
+            os.path.join(folder_path, file) for file in sorted(os.listdir(folder_path))
+            if file.endswith(".mmt") and not "test" in file.lower() and not file.startswith(".") and os.path.isfile(os.path.join(folder_path, file))
+        ]
+
+        names: list[str] = [self.add(file_path) for file_path in self.parser.parse_files(file_paths=file_paths, workers=workers if workers is not None else config.mmt_parse_workers)]
+        dprint(f"Indexed {len(names)} of {len(file_paths)} movement(s) in '{folder_path}'")
+        return names
+
+    def add(self, file_path: str) -> str:
+        """Adds a parsed MMT-File to the index (replaces a movement with the same name) and returns its name."""
+        name: str = os.path.splitext(os.path.basename(file_path))[0]
+        self.entries[name] = CatalogueEntry(name=name, file_path=file_path, durations=self.parser.get_durations(file_path), coordinates=self.parser.get_coordinates(file_path))
+        return name
+
+    def get(self, name: str) -> Optional[CatalogueEntry]:
+        """Returns the movement with this name; None if there is none."""
+        return self.entries.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,46 @@
+import time
+from threading import Lock
+
+# Decorators
+from env.decr.decorators import cached
+
+# Config
+from env.config import config
+
+class MonotonicClock:
+    """Real time on the monotonic perf_counter clock."""
+    def now_ns(self) -> int:
+        return time.perf_counter_ns()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+class VirtualClock:
+    """
+    Simulated time which only advances when somebody sleeps on it. Sleeping returns immediately,
+    so code paced by this clock runs as fast as the CPU allows while seeing the same timestamps as on the robot.
+    The motion scheduler runs its ticks in the waiting threads on this clock (see MotionScheduler.synchronous), so the time never runs ahead of the producers.
+
+    :param start_ns (int): Initial time in ns.
+    """
+    def __init__(self, start_ns: int = 0) -> None:
+        self._now_ns: int = start_ns
+        self._lock: Lock = Lock()
+
+    def now_ns(self) -> int:
+        return self._now_ns
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(round(seconds * 1e9))
+
+    def advance(self, ns: int) -> None:
+        if ns < 0: raise ValueError(f"A clock can't go backwards; got {ns} ns.")
+        with self._lock:
+            self._now_ns += ns
+
+Clock = MonotonicClock | VirtualClock
+
+@cached
+def get_clock() -> Clock:
+    """Returns the clock of the control loop (created once): virtual if config.servo_output is 'simulated', real otherwise."""
+    return VirtualClock() if config.servo_output == "simulated" else MonotonicClock()
@@ -0,0 +1,98 @@
+from collections import deque
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+class CommandQueue:
+    """
+    Lookahead queue of movement commands (names of Movement.function_map) which a worker thread executes one after another.<br>
+    put blocks while 'lookahead' commands are waiting, so the producer stays that many commands ahead of the running movement
+    and the next command is ready as soon as a gait step returns (before its cycle ends; see TrotGait.step).
+
+    :param commands (dict[str, Callable[[], None]]): Command name -> function which executes it.
+    :param lookahead (int): Maximum amount of waiting commands.
+    """
+    def __init__(self, commands: dict[str, Callable[[], None]], lookahead: int = config.command_lookahead) -> None:
+        if lookahead < 1: raise ValueError(f"Lookahead must be at least 1; got {lookahead}.")
+
+        self._commands: dict[str, Callable[[], None]] = commands
+        self.lookahead: int = lookahead
+
+        self._pending: deque[str] = deque()
+        self._running: Optional[str] = None
+        self._condition: Condition = Condition()
+        self._thread: Optional[Thread] = None
+        self._after: Optional[Thread] = None  # Commands wait until this thread has finished (see run_after)
+
+    def run_after(self, thread: Thread) -> None:
+        """Queued commands are only executed once the thread (e.g. the startup script) has finished; They can still be queued and cleared meanwhile."""
+        self._after = thread
+
+    def put(self, command: str, timeout: Optional[float] = None) -> bool:
+        """
+        Queues a command. Blocks while the queue is full.
+
+        :param command: Name of the command.
+        :param timeout: Maximum seconds to wait for a free place (None = forever).
+        :return (bool): False if the queue was still full after the timeout.
+        :raises KeyError: If the command is unknown.
+        """
+        if command not in self._commands:
+            raise KeyError(f"Unknown command '{command}'.")
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._pending) < self.lookahead, timeout=timeout):
+                return False
+
+            self._pending.append(command)
+            self._condition.notify_all()
+
+        self._ensure_running()
+        return True
+
+    def clear(self) -> None:
+        """Removes all waiting commands (the running command is finished)."""
+        with self._condition:
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Waits until all queued commands are done. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and self._running is None, timeout=timeout)
+
+    def _ensure_running(self) -> None:
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="CommandQueue", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: bool(self._pending))
+
+            if self._after is not None:
+                self._after.join()
+                self._after = None
+
+            with self._condition:
+                if not self._pending:  # Cleared while waiting
+                    continue
+                self._running = self._pending.popleft()
+                self._condition.notify_all()
+
+            try:
+                self._commands[self._running]()
+                dprint(f"{config.color_green}Finished executing command: {self._running}{config.color_reset}")
+            except Exception as e:
+                dprint(f"{config.color_red}Error while executing command '{self._running}': {e}{config.color_reset}")
+            finally:
+                with self._condition:
+                    self._running = None
+                    self._condition.notify_all()
@@ -1,7 +1,8 @@
 import sqlite3
+from numpy import array, float64
 
 # Classes
-from env.classes.Classes import Coordinate
+from env.classes.Classes import Coordinate, CoordinateArray
 
 # Func
 from env.func.DEBUG import dprint
@@ -38,7 +39,16 @@ class DB:
         dprint(f"Getting coordinates for step width {step_width} and angle {angle}")
         return [Coordinate(x=x, y=y, z=z) for x, y, z in self.cur.execute("SELECT x, y, z FROM coordinates WHERE step_width = ? AND angle = ? ORDER BY id", (step_width, angle)).fetchall()]
 
+    def get_coordinate_array(self, step_width: float, angle: int) -> CoordinateArray:
+        """Get all coordinates for a given step width and angle as a CoordinateArray."""
+        dprint(f"Getting coordinate array for step width {step_width} and angle {angle}")
+        return CoordinateArray(array(self.cur.execute("SELECT x, y, z FROM coordinates WHERE step_width = ? AND angle = ? ORDER BY id", (step_width, angle)).fetchall(), dtype=float64).reshape(-1, 3))
+
     def store_coordinates(self, step_width: float, angle: int, coord: Coordinate) -> None:
         self.cur.execute("INSERT OR IGNORE INTO coordinates (step_width, angle, x, y, z) VALUES (?, ?, ?, ?, ?)", (step_width, angle, round(coord.x, 7), round(coord.y, 7), round(coord.z, 7)))
 
+    def store_coordinate_array(self, step_width: float, angle: int, coords: CoordinateArray) -> None:
+        """Store all coordinates of a CoordinateArray in a single statement."""
+        self.cur.executemany("INSERT OR IGNORE INTO coordinates (step_width, angle, x, y, z) VALUES (?, ?, ?, ?, ?)", [(step_width, angle, x, y, z) for x, y, z in coords.xyz.round(7).tolist()])
+
     def save(self) -> None: self.conn.commit()
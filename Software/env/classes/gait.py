@@ -0,0 +1,207 @@
+from math import ceil
+from threading import Lock
+from typing import Literal, Optional, cast
+from numpy import arange, asarray, concatenate, interp, linspace, stack, where, float64
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.Classes import Coordinate, CoordinateArray
+from env.classes.leg import Leg
+from env.classes.servos import SServo
+from env.classes.scheduler import motion_scheduler
+from env.classes.timeline import JointTimeline
+
+# Func
+from env.func.calculations import calc_circle_coordinate_array
+from env.func.DEBUG import dprint
+from env.func.symmetry import solve_paths
+
+# Config
+from env.config import config
+
+LegName = Literal["left-front", "left-back", "right-front", "right-back"]
+
+class TrotGait:
+    """
+    Continuous trot: every leg follows the same cycle of swing (circle of calc_circle_coordinate_array) and stance (foot pushes back on the ground),
+    shifted by its phase offset. The phase runs on as long as steps are requested, so consecutive steps flow into each other.
+
+    Settings which aren't given are read from the config whenever they are used, so config changes apply to the next cycle that is compiled
+    (a running gait first finishes its submitted cycles).
+
+    :param legs (dict[LegName, Leg]): The legs of the robot.
+    :param cycle_time (Optional[float]): Seconds of one cycle (every leg swings once). Defaults to config.gait_cycle_time.
+    :param duty_factor (Optional[float]): Share of the cycle a leg is on the ground (0.5 = trot). Defaults to config.gait_duty_factor.
+    :param phase_offsets (Optional[dict[LegName, float]]): Phase of each leg at the start of a cycle (0 = start of the swing). Defaults to config.gait_phase_offsets.
+    :param samples (Optional[int]): Keyframes per cycle. Defaults to config.gait_samples_per_cycle.
+    """
+    def __init__(self,
+            legs: dict[LegName, Leg],
+            cycle_time: Optional[float] = None,
+            duty_factor: Optional[float] = None,
+            phase_offsets: Optional[dict[LegName, float]] = None,
+            samples: Optional[int] = None
+        ) -> None:
+        self.legs: dict[LegName, Leg] = legs
+        self._cycle_time: Optional[float] = cycle_time
+        self._duty_factor: Optional[float] = duty_factor
+        self._phase_offsets: Optional[dict[LegName, float]] = phase_offsets
+        self._samples: Optional[int] = samples
+        self._validate()
+        self.servos: tuple[SServo, ...] = tuple(servo for leg in legs.values() for servo in leg.get_servos())  # Column order of the compiled cycles
+
+        # Phase clock
+        self._origin_ns: Optional[int] = None  # Clock time of phase 0
+        self._horizon: float = 0.0             # Phase (in cycles) up to which trajectories were submitted
+        self._cycle: Optional[JointTimeline] = None  # Cycle of the submitted trajectories
+        self._clock_settings: Optional[tuple] = None  # Settings the phase clock was started with
+        self._interrupts: int = 0  # Counts interrupt calls, so a step which was interrupted before it submitted its cycle doesn't submit it
+        self._lock: Lock = Lock()
+
+    @property
+    def cycle_time(self) -> float:
+        return self._cycle_time if self._cycle_time is not None else config.gait_cycle_time
+
+    @property
+    def duty_factor(self) -> float:
+        return self._duty_factor if self._duty_factor is not None else config.gait_duty_factor
+
+    @property
+    def phase_offsets(self) -> dict[LegName, float]:
+        return self._phase_offsets if self._phase_offsets is not None else config.gait_phase_offsets
+
+    @property
+    def samples(self) -> int:
+        return self._samples if self._samples is not None else config.gait_samples_per_cycle
+
+    def _settings(self) -> tuple:
+        return self.cycle_time, self.duty_factor, tuple(sorted(self.phase_offsets.items())), self.samples
+
+    def _validate(self) -> None:
+        if self.cycle_time <= 0:          raise ValueError(f"Cycle time must be greater than 0; got {self.cycle_time}.")
+        if not 0 < self.duty_factor < 1:  raise ValueError(f"Duty factor must be between 0 and 1; got {self.duty_factor}.")
+        if self.samples < 2:              raise ValueError(f"Samples per cycle must be at least 2; got {self.samples}.")
+
+    def circles(self, angles: dict[LegName, int], step_width: float = config.step_width) -> dict[LegName, CoordinateArray]:
+        """Returns the swing circle of each leg for the given directions (see calc_circle_coordinate_array)."""
+        return {name: calc_circle_coordinate_array(step_width=step_width, angle=angles[name], max_points=config.max_points) for name in self.legs}
+
+    def _leg_path(self, phases: NDArray[float64], circle: CoordinateArray) -> CoordinateArray:
+        """Returns the positions of a leg at the given phases (fractions of a cycle; 0 = start of the swing) for its swing circle."""
+        center: NDArray[float64] = (circle.xyz[0] + circle.xyz[-1]) / 2
+        center[2] = 0.0
+        xyz: NDArray[float64] = circle.xyz - center  # The swing goes from -step_width/2 to +step_width/2 around the normal position
+        start, end = xyz[0], xyz[-1]
+
+        swing_share: float = 1 - self.duty_factor
+        phase: NDArray[float64] = phases % 1.0
+        swinging: NDArray = phase < swing_share
+
+        # Swing: follow the circle; Stance: push the foot back on the ground from the end to the start of the circle
+        u: NDArray[float64] = where(swinging, phase / swing_share, 0.0)
+        s: NDArray[float64] = where(swinging, 0.0, (phase - swing_share) / self.duty_factor)
+        points: NDArray[float64] = linspace(0.0, 1.0, len(xyz))
+        swing: NDArray[float64] = stack([interp(u, points, xyz[:, axis]) for axis in range(3)], axis=1)
+        stance: NDArray[float64] = end + s[:, None] * (start - end)
+
+        return CoordinateArray(where(swinging[:, None], swing, stance)) * (0.5, 1.0, 1.0)  # x is halved like in Leg.set_circle
+
+    def compile(self, circles: dict[LegName, CoordinateArray]) -> JointTimeline:
+        """
+        Solves the servo angles of one cycle. Row r holds the angles at phase r / samples (columns in the order of self.servos),
+        so every cycle of the gait can be played from this table without solving again.
+
+        :param circles: Swing circle of each leg (see circles).
+        """
+        self._validate()
+        phases: NDArray[float64] = arange(self.samples) / self.samples
+        paths: dict[LegName, CoordinateArray] = {name: self._leg_path(phases + self.phase_offsets[name], circles[name]) for name in self.legs}
+        solved: dict[LegName, NDArray] = solve_paths({name: (leg, paths[name]) for name, leg in self.legs.items()})  # One IK batch for all legs (see solve_paths)
+        return JointTimeline(times=phases * self.cycle_time, angles=concatenate([solved[name] for name in self.legs], axis=1))
+
+    def step(self, circles: dict[LegName, CoordinateArray], cycles: int = 1, cycle: Optional[JointTimeline] = None) -> None:
+        """
+        Extends the gait by a number of cycles with the given swing circles and returns shortly before they are done (config.gait_lookahead),
+        so the next call continues the motion without a stop. If the gait isn't running anymore, it starts at phase 0.<br>
+        If the circles differ from the running ones, the part of the running cycle which was already submitted is cross-faded (in joint space)
+        from the old to the new cycle, so changing the direction doesn't need a stop.
+
+        :param circles: Swing circle of each leg (see circles).
+        :param cycles: Amount of cycles to add.
+        :param cycle: Precompiled cycle of these circles (see compile); Solved now if None.
+        """
+        if cycles < 1: raise ValueError(f"Cycles must be at least 1; got {cycles}.")
+        interrupts: int = self._interrupts
+
+        # The phase clock can't change its settings; Finish the running cycles before the new settings are used
+        if self._clock_settings is not None and self._clock_settings != self._settings():
+            self.finish()
+            self.stop()
+
+        if cycle is None or len(cycle.angles) != self.samples:
+            cycle = self.compile(circles)
+
+        clock = motion_scheduler.ticker.clock
+        with self._lock:
+            now_ns: int = clock.now_ns()
+            phase_now: float = (now_ns - self._origin_ns) / 1e9 / self.cycle_time if self._origin_ns is not None else 0.0
+
+            if self._origin_ns is None or phase_now >= self._horizon:  # Not walking anymore; Start a new phase clock
+                self._origin_ns, phase_now, self._horizon, self._cycle = now_ns, 0.0, 0.0, None
+                self._clock_settings = self._settings()
+            submitted: int = round(self._horizon * self.samples)  # Last sample of the running trajectories
+            self._horizon += cycles
+
+            # Keyframes on the sample grid of the phase clock from now until the horizon
+            first: int = int(phase_now * self.samples) + 1
+            samples: NDArray = arange(first, ceil(self._horizon * self.samples - 1e-9) + 1)
+            times: list[float] = ((samples / self.samples - phase_now) * self.cycle_time).tolist()
+            rows: NDArray[float64] = cycle.angles[samples % self.samples]
+
+            # Cross-fade from the running cycle to the new one until the end of the running trajectories
+            if self._cycle is not None and self._cycle is not cycle and submitted >= first:
+                overlap: int = submitted - first + 1
+                weights: NDArray[float64] = (arange(1, overlap + 1) / overlap)[:, None]
+                rows[:overlap] = (1 - weights) * self._cycle.angles[samples[:overlap] % self.samples] + weights * rows[:overlap]
+            self._cycle = cycle
+
+            for idx, servo in enumerate(self.servos):
+                servo.set_trajectory(target_angles=rows[:, idx].round().astype(int).tolist(), times=times, profile="linear", preempt=True)
+
+            with motion_scheduler.atomic():  # All legs continue in the same tick
+                if self._interrupts != interrupts:  # interrupt changes the generation under the same lock, so nothing is submitted after it returned
+                    for servo in self.servos:
+                        servo.pending_motion = None
+                    dprint(f"{config.color_yellow}[ NOTE ] Gait: Step was interrupted before it started; Dropped its cycle{config.color_reset}")
+                    return
+
+                for servo in self.servos:
+                    servo.start()
+
+            for name, leg in self.legs.items():
+                leg.current_position = cast(Coordinate, self._leg_path(asarray([self._horizon + self.phase_offsets[name]]), circles[name])[0])
+
+            done_ns: int = self._origin_ns + round((self._horizon * self.cycle_time - config.gait_lookahead) * 1e9)
+
+        dprint(f"Gait: Walking {cycles} cycle(s) from phase {phase_now:.2f} to {self._horizon:.2f}")
+        motion_scheduler.wait_until(done_ns)
+
+    def finish(self) -> None:
+        """Waits until the submitted cycles are done (returns immediately if the gait isn't running)."""
+        with self._lock:
+            if self._origin_ns is None:
+                return
+            end_ns: int = self._origin_ns + round(self._horizon * self.cycle_time * 1e9)
+
+        motion_scheduler.wait_until(end_ns)
+
+    def interrupt(self) -> None:
+        """Stops the gait (see stop); A step which is still compiling or waiting for the lock drops its cycle instead of submitting it."""
+        with motion_scheduler.atomic():
+            self._interrupts += 1
+        self.stop()
+
+    def stop(self) -> None:
+        """Forgets the phase clock; The next step starts a new gait."""
+        with self._lock:
+            self._origin_ns, self._horizon, self._cycle, self._clock_settings = None, 0.0, None, None
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from threading import Lock
+from numpy import asarray, empty, rint, float64, int64
+from numpy.typing import NDArray
+from typing import Callable, Literal, Optional
+
+# Classes
+from env.classes.Classes import Coordinate
+
+# Config
+from env.config import config
+
+class IKCache:
+    """
+    Bounded LRU memo of servo angles keyed on quantized (x, y, z) positions.<br>
+    Positions are snapped to a grid of 'quantum' mm before solving, so every position of a grid cell returns the same angles.
+    Inputs are never mutated.
+
+    :param solve (Callable[[float, float, float], tuple[float, float, float]]): Solver for a single position (e.g. LegKinematics.solve).
+    :param solve_batch (Callable[[NDArray[float64]], NDArray]): Solver for an (N, 3) array of positions (e.g. LegKinematics.solve_batch).
+    :param max_size (int): Maximum amount of cached positions. The least recently used position is evicted first.
+    :param quantum (float): Grid size of the cache keys in mm.
+    """
+    def __init__(self,
+            *,
+            solve: Callable[[float, float, float], tuple[float, float, float]],
+            solve_batch: Callable[[NDArray[float64]], NDArray],
+            max_size: int = config.ik_cache_size,
+            quantum: float = config.ik_cache_quantum
+        ) -> None:
+        if max_size < 1: raise ValueError(f"Max size must be at least 1; got {max_size}.")
+        if quantum <= 0: raise ValueError(f"Quantum must be greater than 0; got {quantum}.")
+
+        self._solve: Callable[[float, float, float], tuple[float, float, float]] = solve
+        self._solve_batch: Callable[[NDArray[float64]], NDArray] = solve_batch
+        self.max_size: int = max_size
+        self.quantum: float = quantum
+
+        self._entries: OrderedDict[tuple[int, int, int], tuple[int, int, int]] = OrderedDict()
+        self._lock: Lock = Lock()
+
+        # Statistics
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def _key(self, x: float, y: float, z: float) -> tuple[int, int, int]:
+        return round(x / self.quantum), round(y / self.quantum), round(z / self.quantum)
+
+    def _lookup(self, key: tuple[int, int, int]) -> Optional[tuple[int, int, int]]:
+        angles = self._entries.get(key)
+        if angles is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return angles
+
+    def _store(self, key: tuple[int, int, int], angles: tuple[int, int, int]) -> None:
+        self._entries[key] = angles
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def solve(self, x: float, y: float, z: float) -> tuple[int, int, int]:
+        """Returns the rounded thigh, lower-leg and side-axis angles of a position."""
+        key: tuple[int, int, int] = self._key(x, y, z)
+
+        with self._lock:
+            angles = self._lookup(key)
+            if angles is not None:
+                return angles
+
+        alpha, beta, gamma = self._solve(key[0] * self.quantum, key[1] * self.quantum, key[2] * self.quantum)
+        angles = (int(round(alpha, 0)), int(round(beta, 0)), int(round(gamma, 0)))
+
+        with self._lock:
+            self._store(key, angles)
+        return angles
+
+    def solve_coordinate(self, coordinate: Coordinate) -> dict[Literal["thigh", "lower-leg", "side-axis"], int]:
+        """Same as calc_servo_angles, but cached."""
+        thigh, lower_leg, side_axis = self.solve(coordinate.x, coordinate.y, coordinate.z)
+        return {"thigh": thigh, "lower-leg": lower_leg, "side-axis": side_axis}
+
+    def solve_batch(self, coordinates: NDArray[float64]) -> NDArray[int64]:
+        """Returns the rounded angles of an (N, 3) array of positions. All cache misses are solved in a single batch."""
+        xyz: NDArray[float64] = asarray(coordinates, dtype=float64).reshape(-1, 3)
+        keys: list[tuple[int, int, int]] = [tuple(key) for key in rint(xyz / self.quantum).astype(int64).tolist()]  # type:ignore[misc]
+        angles: NDArray[int64] = empty((len(keys), 3), dtype=int64)
+        missing: dict[tuple[int, int, int], list[int]] = {}
+
+        with self._lock:
+            for idx, key in enumerate(keys):
+                if key in missing:  # Same position multiple times in one batch
+                    missing[key].append(idx)
+                    self.hits += 1
+                elif (cached := self._lookup(key)) is not None:
+                    angles[idx] = cached
+                else:
+                    missing[key] = [idx]
+
+        if missing:
+            solved: NDArray = self._solve_batch(asarray(list(missing), dtype=float64) * self.quantum)
+
+            with self._lock:
+                for (key, indices), row in zip(missing.items(), solved):
+                    self._store(key, (int(row[0]), int(row[1]), int(row[2])))
+                    angles[indices] = row
+
+        return angles
+
+    def stats(self) -> dict[str, float]:
+        """Returns the hit rate, size and eviction counters of the cache."""
+        with self._lock:
+            lookups: int = self.hits + self.misses
+            return {
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "hit_rate":  self.hits / lookups if lookups else 0.0,
+                "size":      len(self._entries),
+                "max_size":  self.max_size,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        """Removes all entries and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
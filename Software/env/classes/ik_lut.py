@@ -0,0 +1,178 @@
+import os
+import json
+from numpy import arange, meshgrid, stack, floor, clip, isnan, abs as np_abs, rint, save, load, ascontiguousarray, asarray, float32, float64, int64, intp
+from numpy.random import default_rng
+from numpy.typing import NDArray
+from typing import Literal, Optional
+
+# Classes
+from env.classes.Classes import Coordinate
+
+# Decorators
+from env.decr.decorators import cached
+
+# Func
+from env.func.calculations import calc_servo_angles_batch
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+def geometry_fingerprint() -> dict[str, float]:
+    """Returns all config values the servo angles depend on. A lookup table is only valid for the geometry it was built with."""
+    return {name: float(getattr(config, name)) for name in ("z_def", "d_s", "d_ys", "d_cpm", "f_w", "l_1", "l_2", "l_3", "l_4", "l_5", "l_6", "l_7", "l_8", "l_9")} | {
+        "deviation_x": config.coord_deviation[0],
+        "deviation_y": config.coord_deviation[1],
+        "deviation_z": config.coord_deviation[2],
+    }
+
+def _workspace_bounds() -> tuple[tuple[float, float, float], tuple[float, float, float]]:
+    """Returns the (min, max) xyz corner of the reachable foot workspace in the servo coordinate system."""
+    reach_xy: float = config.step_width * config.coord_multiplier
+    return (
+        (-reach_xy, -reach_xy, config.min_height * config.coord_multiplier),
+        ( reach_xy,  reach_xy, (config.max_height + config.step_height) * config.coord_multiplier),
+    )
+
+class IKLookupTable:
+    """
+    Precomputed grid of servo angles covering the foot workspace.<br>
+    Queries are answered with trilinear interpolation instead of the arccos/arctan chain of calc_servo_angles.
+
+    :param grid (NDArray): Array of shape (nx, ny, nz, 3) with the thigh, lower-leg and side-axis angles of each grid point (NaN if unreachable).
+    :param origin (tuple[float, float, float]): xyz position of grid[0, 0, 0] in the servo coordinate system.
+    :param resolution (float): Distance between two grid points in mm.
+    """
+    def __init__(self, grid: NDArray, origin: tuple[float, float, float], resolution: float) -> None:
+        if grid.ndim != 4 or grid.shape[3] != 3 or min(grid.shape[:3]) < 2:
+            raise ValueError(f"Grid must have the shape (nx, ny, nz, 3) with at least 2 points per axis; got {grid.shape}.")
+        if resolution <= 0:
+            raise ValueError(f"Resolution must be greater than 0; got {resolution}.")
+
+        self.grid: NDArray = grid
+        self.origin: NDArray[float64] = asarray(origin, dtype=float64)
+        self.resolution: float = resolution
+        self.upper: NDArray[float64] = self.origin + (asarray(grid.shape[:3]) - 1) * resolution
+
+    @classmethod
+    def build(cls, resolution: float = config.ik_lut_resolution) -> "IKLookupTable":
+        """Builds the lookup table by solving every grid point with the analytic solver."""
+        lower, upper = _workspace_bounds()
+        axes: list[NDArray[float64]] = [arange(lo, hi + resolution, resolution) for lo, hi in zip(lower, upper)]
+        dprint(f"Building IK lookup table with {len(axes[0])}x{len(axes[1])}x{len(axes[2])} points (resolution={resolution} mm)...")
+
+        points: NDArray[float64] = stack(meshgrid(*axes, indexing="ij"), axis=-1)
+        angles: NDArray[float64] = calc_servo_angles_batch(coordinates=points.reshape(-1, 3), rounded=False, strict=False)
+
+        return cls(grid=angles.reshape(points.shape).astype(float32), origin=lower, resolution=resolution)
+
+    def save(self, file_path: str = config.ik_lut_file) -> None:
+        """Saves the grid as .npy file and its metadata as .json file next to it."""
+        save(file_path, ascontiguousarray(self.grid))
+        with open(_metadata_path(file_path), "w", encoding="UTF-8") as f:
+            json.dump({"origin": self.origin.tolist(), "resolution": self.resolution, "geometry": geometry_fingerprint()}, f, indent=4)
+
+        dprint(f"Saved IK lookup table to '{file_path}' ({self.grid.nbytes / 1024**2:.1f} MiB).")
+
+    @classmethod
+    def load(cls, file_path: str = config.ik_lut_file) -> "IKLookupTable":
+        """Loads a saved lookup table. The grid is memory-mapped, so only the pages used by queries are read."""
+        with open(_metadata_path(file_path), "r", encoding="UTF-8") as f:
+            metadata: dict = json.load(f)
+
+        if metadata["geometry"] != geometry_fingerprint():
+            raise ValueError(f"IK lookup table '{file_path}' was built for a different leg geometry. Rebuild it with build_ik_lut.py!")
+
+        return cls(grid=load(file_path, mmap_mode="r"), origin=tuple(metadata["origin"]), resolution=float(metadata["resolution"]))
+
+    def interpolate(self, coordinates: NDArray[float64]) -> NDArray[float64]:
+        """
+        Interpolates the servo angles of multiple positions.
+
+        :param coordinates: Array of shape (N, 3) containing the xyz positions (servo coordinate system).
+        :return (NDArray[float64]): Array of shape (N, 3) with the unrounded thigh, lower-leg and side-axis angles.
+        :raises ValueError: If a position is outside of the grid or not reachable.
+        """
+        xyz: NDArray[float64] = asarray(coordinates, dtype=float64).reshape(-1, 3)
+        if ((xyz < self.origin) | (xyz > self.upper)).any():
+            raise ValueError(f"Position(s) outside of the IK lookup table [{self.origin} - {self.upper}].")
+
+        # Split each position into the index of the lower grid corner and the fraction to the next grid point
+        scaled: NDArray[float64] = (xyz - self.origin) / self.resolution
+        index: NDArray[intp] = clip(floor(scaled).astype(intp), 0, asarray(self.grid.shape[:3]) - 2)
+        t: NDArray[float64] = (scaled - index)[:, :, None]
+        i, j, k = index[:, 0], index[:, 1], index[:, 2]
+
+        # Trilinear interpolation of the 8 surrounding grid points
+        c00 = self.grid[i, j,     k    ] * (1 - t[:, 0]) + self.grid[i + 1, j,     k    ] * t[:, 0]
+        c10 = self.grid[i, j + 1, k    ] * (1 - t[:, 0]) + self.grid[i + 1, j + 1, k    ] * t[:, 0]
+        c01 = self.grid[i, j,     k + 1] * (1 - t[:, 0]) + self.grid[i + 1, j,     k + 1] * t[:, 0]
+        c11 = self.grid[i, j + 1, k + 1] * (1 - t[:, 0]) + self.grid[i + 1, j + 1, k + 1] * t[:, 0]
+        c0  = c00 * (1 - t[:, 1]) + c10 * t[:, 1]
+        c1  = c01 * (1 - t[:, 1]) + c11 * t[:, 1]
+        angles: NDArray[float64] = (c0 * (1 - t[:, 2]) + c1 * t[:, 2]).astype(float64)
+
+        if isnan(angles).any():
+            raise ValueError("Position(s) are not reachable (not covered by the IK lookup table).")
+
+        return angles
+
+    def solve_batch(self, coordinates: NDArray[float64]) -> NDArray[int64]:
+        """Same as calc_servo_angles_batch, but uses the lookup table."""
+        return rint(self.interpolate(coordinates)).astype(int64)
+
+    def solve(self, x: float, y: float, z: float) -> tuple[float, float, float]:
+        """Same as LegKinematics.solve, but uses the lookup table."""
+        alpha, beta, gamma = self.interpolate(asarray((x, y, z)))[0]
+        return float(alpha), float(beta), float(gamma)
+
+    def solve_coordinate(self, coordinate: Coordinate) -> dict[Literal["thigh", "lower-leg", "side-axis"], int]:
+        """Same as calc_servo_angles, but uses the lookup table."""
+        thigh, lower_leg, side_axis = self.solve_batch(asarray(coordinate.get_xyz()))[0]
+        return {"thigh": int(thigh), "lower-leg": int(lower_leg), "side-axis": int(side_axis)}
+
+    def error_report(self, samples: int = 100_000, seed: int = 0) -> dict[str, float]:
+        """
+        Compares the lookup table against the analytic solver at random positions inside of the workspace.
+
+        :param samples: Amount of random positions to compare.
+        :param seed: Seed of the random generator to get reproducible reports.
+        :return (dict[str, float]): Maximum and mean absolute error in degrees (overall and per servo) and the share of rounded angles that differ.
+        """
+        xyz: NDArray[float64] = default_rng(seed).uniform(self.origin, self.upper, size=(samples, 3))
+        exact: NDArray[float64] = calc_servo_angles_batch(coordinates=xyz, rounded=False, strict=False)
+
+        # Only compare positions which are reachable by both solvers
+        scaled: NDArray[float64] = (xyz - self.origin) / self.resolution
+        index: NDArray[intp] = clip(floor(scaled).astype(intp), 0, asarray(self.grid.shape[:3]) - 2)
+        covered = ~isnan(exact).any(axis=1)
+        for corner in ((0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0), (0, 0, 1), (1, 0, 1), (0, 1, 1), (1, 1, 1)):
+            covered &= ~isnan(self.grid[index[:, 0] + corner[0], index[:, 1] + corner[1], index[:, 2] + corner[2]]).any(axis=1)
+
+        error: NDArray[float64] = np_abs(self.interpolate(xyz[covered]) - exact[covered])
+        mismatches: NDArray = rint(self.interpolate(xyz[covered])) != rint(exact[covered])
+
+        return {
+            "samples":             float(covered.sum()),
+            "max_error":           float(error.max()),
+            "mean_error":          float(error.mean()),
+            "max_error_thigh":     float(error[:, 0].max()),
+            "max_error_lower_leg": float(error[:, 1].max()),
+            "max_error_side_axis": float(error[:, 2].max()),
+            "rounded_mismatches":  float(mismatches.any(axis=1).mean()),
+        }
+
+def _metadata_path(file_path: str) -> str:
+    return f"{os.path.splitext(file_path)[0]}.json"
+
+@cached
+def get_lookup_table() -> Optional[IKLookupTable]:
+    """Returns the lookup table if config.ik_solver is set to 'lut' (loaded once); None otherwise or if it can't be loaded."""
+    if config.ik_solver != "lut":
+        return None
+
+    try:
+        return IKLookupTable.load(config.ik_lut_file)
+    except (OSError, ValueError, KeyError) as e:
+        dprint(f"{config.color_yellow}[ WARNING ] Failed to load IK lookup table; Using exact solver instead. Error: {e}{config.color_reset}")
+        return None
@@ -0,0 +1,183 @@
+from math import cos, acos, atan, sqrt, pi, degrees
+from numpy import cos as np_cos, nan, arccos, arctan, sqrt as np_sqrt, abs as np_abs, asarray, where, stack, rint, degrees as np_degrees, errstate, float64, int64
+from numpy.typing import NDArray
+from typing import Literal, Optional
+
+# Classes
+from env.classes.Classes import Coordinate
+
+# Config
+from env.config import config
+
+# Typing
+from env.types.typing import GeometryDict
+
+def _acos(num: float) -> float:
+    assert -1 <= num <= 1, f"Num {num} out of range in _acos!"
+    return acos(num)
+
+def _acos_array(num: NDArray[float64], strict: bool) -> NDArray[float64]:
+    if strict: assert ((-1 <= num) & (num <= 1)).all(), f"Nums {num[(num < -1) | (num > 1)]} out of range in _acos_array!"
+    return arccos(num)
+
+class LegKinematics:
+    """
+    Precompiled inverse kinematics of a single leg.<br>
+    Every sub-expression which only depends on the leg geometry is calculated once on creation,
+    so a solve only runs the position dependent part of calc_servo_angles with plain math floats (in radians).
+
+    :param geometry (Optional[GeometryDict]): Overrides of the leg lengths from the config (e.g. {"l_1": 115}).
+    """
+    __slots__: tuple[str, ...] = (
+        "geometry", "z_def", "dev_x", "dev_y", "dev_z", "d_cpsum_pos", "d_cpsum_neg", "l_ds", "l_ds_sq",
+        "l_1_sq", "l_2", "l_2_sq", "l_3_sq", "l_4_sq", "l_5", "l_5_sq", "l_7", "l_7_sq", "l_9", "l_9_sq", "l_8_sq",
+        "two_l_1_l_2", "two_l_2_l_3", "two_l_7_l_ds", "epsilon_alpha", "epsilon_beta", "theta_8",
+    )
+
+    def __init__(self, geometry: Optional[GeometryDict] = None) -> None:
+        self.geometry: GeometryDict = geometry or {}
+        g: dict[str, float] = {name: float(self.geometry.get(name, getattr(config, name))) for name in GeometryDict.__annotations__}  # type:ignore[misc]
+
+        # Offsets
+        self.z_def: float = g["z_def"]
+        self.dev_x, self.dev_y, self.dev_z = config.coord_deviation
+        self.d_cpsum_pos: float = g["d_ys"] + g["d_cpm"] - g["f_w"] / 2  # y >  0
+        self.d_cpsum_neg: float = g["d_ys"] + g["d_cpm"] + g["f_w"] / 2  # y <= 0
+
+        # Lengths
+        self.l_ds: float    = sqrt(2) * g["d_s"]
+        self.l_ds_sq: float = self.l_ds**2
+        self.l_1_sq: float  = g["l_1"]**2
+        self.l_2: float     = g["l_2"]
+        self.l_2_sq: float  = g["l_2"]**2
+        self.l_3_sq: float  = g["l_3"]**2
+        self.l_4_sq: float  = g["l_4"]**2
+        self.l_5: float     = g["l_5"]
+        self.l_5_sq: float  = g["l_5"]**2
+        self.l_7: float     = g["l_7"]
+        self.l_7_sq: float  = g["l_7"]**2
+        self.l_8_sq: float  = g["l_8"]**2
+        self.l_9: float     = g["l_9"]
+        self.l_9_sq: float  = g["l_9"]**2
+        self.two_l_1_l_2: float  = 2 * g["l_1"] * g["l_2"]
+        self.two_l_2_l_3: float  = 2 * g["l_2"] * g["l_3"]
+        self.two_l_7_l_ds: float = 2 * g["l_7"] * self.l_ds
+
+        # Constant angles
+        self.theta_8: float = _acos((self.l_5_sq + self.l_7_sq - g["l_6"]**2) / (2 * self.l_5 * self.l_7))
+        self.epsilon_alpha, self.epsilon_beta = self._calc_epsilons()
+
+    def _calc_epsilons(self) -> tuple[float, float]:
+        """Calculates epsilon-alpha and epsilon-beta (see calc_epsilons) in radians."""
+        z_def_sq: float = self.z_def**2
+        theta_2e: float = _acos((z_def_sq + self.l_2_sq - self.l_1_sq) / (2 * abs(self.z_def) * self.l_2))
+        epsilon_alpha: float = pi / 2 - theta_2e
+
+        cos_theta_3e: float = (self.l_1_sq + self.l_2_sq - z_def_sq) / self.two_l_1_l_2
+        l_2l3e: float = sqrt(self.l_2_sq + self.l_3_sq + self.two_l_2_l_3 * cos_theta_3e)  # cos(180° - theta_3e) = -cos(theta_3e)
+        theta_5e: float = _acos((self.l_2_sq + l_2l3e**2 - self.l_3_sq) / (2 * self.l_2 * l_2l3e))
+        theta_6e: float = _acos((l_2l3e**2 + self.l_5_sq - self.l_4_sq) / (2 * l_2l3e * self.l_5))
+        theta_7e: float = theta_6e + theta_5e - epsilon_alpha
+
+        theta_10e: float = pi - self.theta_8 - theta_7e + pi / 4
+        l_8l9e: float = sqrt(self.l_7_sq + self.l_ds_sq - self.two_l_7_l_ds * cos(theta_10e))
+        theta_11e: float = _acos((l_8l9e**2 + self.l_ds_sq - self.l_7_sq) / (2 * l_8l9e * self.l_ds))
+        theta_12e: float = _acos((l_8l9e**2 + self.l_9_sq - self.l_8_sq) / (2 * l_8l9e * self.l_9))
+
+        return epsilon_alpha, 3 * pi / 4 - theta_12e - theta_11e
+
+    def solve(self, x: float, y: float, z: float) -> tuple[float, float, float]:
+        """
+        Calculates the unrounded thigh, lower-leg and side-axis angles in degrees.
+
+        :param x, y, z: The position of the foot (servo coordinate system).
+        :return (tuple[float, float, float]): The thigh, lower-leg and side-axis angles.
+        :raises AssertionError: If the position is out of reach.
+        """
+        x, y, z = x + self.dev_x, y + self.dev_y, z + self.dev_z
+        d_cpsum: float = self.d_cpsum_pos if y > 0 else self.d_cpsum_neg
+
+        z_sac: float     = z + self.z_def
+        z_sac_sq: float  = z_sac * z_sac
+        z_sa2D: float    = sqrt((y + d_cpsum)**2 + z_sac_sq - d_cpsum * d_cpsum)
+        l_1l2_sq: float  = x * x + z_sa2D * z_sa2D
+        l_1l2: float     = sqrt(l_1l2_sq)
+        theta_1X: float  = atan(x / z_sa2D)
+
+        theta_2: float      = _acos((l_1l2_sq + self.l_2_sq - self.l_1_sq) / (2 * l_1l2 * self.l_2))
+        cos_theta_3: float  = (self.l_1_sq + self.l_2_sq - l_1l2_sq) / self.two_l_1_l_2
+        _acos(cos_theta_3)  # Only validates the range
+
+        l_2l3_sq: float  = self.l_2_sq + self.l_3_sq + self.two_l_2_l_3 * cos_theta_3  # cos(180° - theta_3) = -cos(theta_3)
+        l_2l3: float     = sqrt(l_2l3_sq)
+        theta_5: float   = _acos((self.l_2_sq + l_2l3_sq - self.l_3_sq) / (2 * self.l_2 * l_2l3))
+        theta_6: float   = _acos((l_2l3_sq + self.l_5_sq - self.l_4_sq) / (2 * l_2l3 * self.l_5))
+
+        alpha: float     = theta_2 - theta_1X + self.epsilon_alpha - pi / 2
+        theta_10: float  = pi - self.theta_8 - (theta_6 + theta_5 + alpha - self.epsilon_alpha) + pi / 4
+
+        l_8l9_sq: float  = self.l_7_sq + self.l_ds_sq - self.two_l_7_l_ds * cos(theta_10)
+        l_8l9: float     = sqrt(l_8l9_sq)
+        theta_11: float  = _acos((l_8l9_sq + self.l_ds_sq - self.l_7_sq) / (2 * l_8l9 * self.l_ds))
+        theta_12: float  = _acos((l_8l9_sq + self.l_9_sq - self.l_8_sq) / (2 * l_8l9 * self.l_9))
+
+        beta: float      = theta_12 + theta_11 + self.epsilon_beta - 3 * pi / 4
+        gamma: float     = atan((y * abs(z_sac)) / (z_sac_sq + d_cpsum * d_cpsum + y * d_cpsum))
+
+        return degrees(alpha), degrees(beta), degrees(gamma)
+
+    def solve_coordinate(self, coordinate: Coordinate) -> dict[Literal["thigh", "lower-leg", "side-axis"], int]:
+        """Same as calc_servo_angles, but with the precompiled model of this leg."""
+        alpha, beta, gamma = self.solve(coordinate.x, coordinate.y, coordinate.z)
+        return {"thigh": int(round(alpha, 0)), "lower-leg": int(round(beta, 0)), "side-axis": int(round(gamma, 0))}
+
+    def solve_batch(self, coordinates: NDArray[float64], rounded: bool = True, strict: bool = True) -> NDArray:
+        """
+        Vectorized version of solve for a whole trajectory at once.
+
+        :param coordinates: Array of shape (N, 3) containing the xyz foot positions (servo coordinate system).
+        :param rounded: If True, the angles are rounded to integers.
+        :param strict: If False, unreachable positions result in NaN angles instead of an AssertionError.
+        :return (NDArray): Array of shape (N, 3) with the thigh, lower-leg and side-axis angles of each position.
+        """
+        if strict:
+            return self._solve_batch(coordinates=coordinates, rounded=rounded, strict=strict)
+
+        with errstate(invalid="ignore", divide="ignore"):
+            return self._solve_batch(coordinates=coordinates, rounded=rounded, strict=strict)
+
+    def _solve_batch(self, coordinates: NDArray[float64], rounded: bool, strict: bool) -> NDArray:
+        xyz: NDArray[float64] = asarray(coordinates, dtype=float64).reshape(-1, 3) + (self.dev_x, self.dev_y, self.dev_z)  # Never mutates the input
+        x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+        d_cpsum: NDArray[float64] = where(y > 0, self.d_cpsum_pos, self.d_cpsum_neg)
+
+        z_sac    = z + self.z_def
+        z_sac_sq = z_sac * z_sac
+        z_sa2D   = np_sqrt((y + d_cpsum)**2 + z_sac_sq - d_cpsum * d_cpsum)
+        l_1l2_sq = x * x + z_sa2D * z_sa2D
+        l_1l2    = np_sqrt(l_1l2_sq)
+        theta_1X = arctan(x / z_sa2D)
+
+        theta_2     = _acos_array((l_1l2_sq + self.l_2_sq - self.l_1_sq) / (2 * l_1l2 * self.l_2), strict)
+        cos_theta_3 = (self.l_1_sq + self.l_2_sq - l_1l2_sq) / self.two_l_1_l_2
+        if strict: _acos_array(cos_theta_3, strict)  # Only validates the range
+        cos_theta_3 = where(np_abs(cos_theta_3) <= 1, cos_theta_3, nan)  # Unreachable positions result in NaN
+
+        l_2l3_sq = self.l_2_sq + self.l_3_sq + self.two_l_2_l_3 * cos_theta_3
+        l_2l3    = np_sqrt(l_2l3_sq)
+        theta_5  = _acos_array((self.l_2_sq + l_2l3_sq - self.l_3_sq) / (2 * self.l_2 * l_2l3), strict)
+        theta_6  = _acos_array((l_2l3_sq + self.l_5_sq - self.l_4_sq) / (2 * l_2l3 * self.l_5), strict)
+
+        alpha    = theta_2 - theta_1X + self.epsilon_alpha - pi / 2
+        theta_10 = pi - self.theta_8 - (theta_6 + theta_5 + alpha - self.epsilon_alpha) + pi / 4
+
+        l_8l9_sq = self.l_7_sq + self.l_ds_sq - self.two_l_7_l_ds * np_cos(theta_10)
+        l_8l9    = np_sqrt(l_8l9_sq)
+        theta_11 = _acos_array((l_8l9_sq + self.l_ds_sq - self.l_7_sq) / (2 * l_8l9 * self.l_ds), strict)
+        theta_12 = _acos_array((l_8l9_sq + self.l_9_sq - self.l_8_sq) / (2 * l_8l9 * self.l_9), strict)
+
+        beta     = theta_12 + theta_11 + self.epsilon_beta - 3 * pi / 4
+        gamma    = arctan((y * np_abs(z_sac)) / (z_sac_sq + d_cpsum * d_cpsum + y * d_cpsum))
+
+        angles: NDArray[float64] = np_degrees(stack((alpha, beta, gamma), axis=1))
+        return rint(angles).astype(int64) if rounded else angles
@@ -1,27 +1,31 @@
-import threading
-from typing import Any, Literal, Optional
+from typing import Any, Literal, Optional, Sequence, Union
+from numpy import arange, float64
+from numpy.typing import NDArray
 
 # Classes
-from env.classes.Classes import Coordinate
+from env.classes.Classes import Coordinate, CoordinateArray
 from env.classes.servos import SServo
+from env.classes.scheduler import motion_scheduler
 from env.classes.events import StopEvent
+from env.classes.ik_lut import IKLookupTable, get_lookup_table
+from env.classes.kinematics import LegKinematics
+from env.classes.ik_cache import IKCache
 
 # Decorators
 from env.decr.decorators import cached, validate_types
 
 # Func
-from env.func.calculations import calc_servo_angles, calc_circle_coordinates
+from env.func.calculations import calc_circle_coordinate_array
 from env.func.DEBUG import dprint
 
-# Errors
-from env.err.Errors import NoThreadError
-
 # Config
 from env.config import config
 
 # Typing
 from env.types.typing import LegConfigDict
 
+_ik_caches: dict[tuple, IKCache] = {}  # IK caches shared by the legs with the same geometry and solver settings
+
 class Leg:
     """
     Manages a robotic leg composed of three servos: thigh, lower leg, and side axis.
@@ -77,7 +81,20 @@ class Leg:
         )
         self.current_position: Coordinate = Coordinate(0.0, 0.0, 0.0)  # Initialize current position to (0, 0, 0) --> Default position
         self.all_servos: tuple[SServo, SServo, SServo] = (self.thigh, self.lower_leg, self.side_axis)
-        self.circle_thread: Optional[threading.Thread] = None
+
+        # Initialize the precompiled kinematics model (with optional geometry overrides of this leg)
+        self.kinematics: LegKinematics = LegKinematics(geometry=leg_configurations.get("geometry"))
+
+        # Initialize the IK cache on top of the lookup table (if enabled) or the kinematics model.
+        # Legs with the same geometry give the same angles for the same position, so they share one cache
+        key: tuple = (tuple(sorted(self.kinematics.geometry.items())), config.ik_solver, config.ik_cache_size, config.ik_cache_quantum)
+        if key not in _ik_caches:
+            lookup_table: Optional[IKLookupTable] = self._get_lookup_table()
+            _ik_caches[key] = IKCache(
+                solve =       lookup_table.solve       if lookup_table else self.kinematics.solve,
+                solve_batch = lookup_table.solve_batch if lookup_table else self.kinematics.solve_batch,
+            )
+        self.ik_cache: IKCache = _ik_caches[key]
 
     @cached
     def get_servos(self) -> tuple[SServo, SServo, SServo]:
@@ -88,33 +105,104 @@ class Leg:
         return self.current_position
 
     @validate_types
-    def set_to_normal_position(self, duration_s: float = config.servo_default_normalize_speed) -> None:
+    def set_to_normal_position(self, duration_s: float = config.servo_default_normalize_speed, profile: str = config.servo_motion_profile) -> None:
         """
         Moves all servos in the leg to their normal positions (0°). Waits until all servos have finished. (Default = servo_default_normalize_speed)
 
         :return (None): This function does not return a value.
         """
-        self.set_to_coordinate(coordinate=Coordinate(x=0.0, y=0.0, z=0.0), duration_s=duration_s)
+        self.set_to_coordinate(coordinate=Coordinate(x=0.0, y=0.0, z=0.0), duration_s=duration_s, profile=profile)
 
     @validate_types
-    def set_to_coordinate(self, coordinate: Coordinate, duration_s: float) -> None:
+    def set_to_coordinate(self, coordinate: Coordinate, duration_s: float, profile: str = config.servo_motion_profile) -> None:
         """
         Moves all servos in the leg to the specified position. Waits until all servos have finished. (Default = servo_default_speed)
         
         :param coordinate: The position to move to.
         :param duration_s: The duration of the movement in seconds.
+        :param profile: Speed curve of the movement ('linear', 'trapezoid' or 'minimum-jerk').
         :return (None): This function does not return a value.
         """
         adjusted_coordinate: Coordinate = coordinate * config.coord_multiplier  # Adjust coordinate to the servo coordinate system
-        angles: dict[Literal['thigh', 'lower-leg', 'side-axis'], int] = calc_servo_angles(coordinate=adjusted_coordinate)
+        angles: dict[Literal['thigh', 'lower-leg', 'side-axis'], int] = self.ik_cache.solve_coordinate(adjusted_coordinate)
         dprint(f"Leg {self}: Moving to position {coordinate} with angles {angles}")
-        self.thigh.set_angle(target_angle=angles["thigh"], duration=duration_s)
-        self.lower_leg.set_angle(target_angle=angles["lower-leg"], duration=duration_s)
-        self.side_axis.set_angle(target_angle=angles["side-axis"], duration=duration_s)
+        self.set_to_angles(thigh=angles["thigh"], lower_leg=angles["lower-leg"], side_axis=angles["side-axis"], duration_s=duration_s, profile=profile)
         
         # Set current position to the new position
         self.current_position = coordinate
 
+    @validate_types
+    def set_to_angles(self, thigh: int, lower_leg: int, side_axis: int, duration_s: float, profile: str = config.servo_motion_profile) -> None:
+        """
+        Moves all servos in the leg to already calculated servo angles (e.g. from solve_coordinates).
+
+        :param thigh: The target angle of the thigh servo.
+        :param lower_leg: The target angle of the lower leg servo.
+        :param side_axis: The target angle of the side axis servo.
+        :param duration_s: The duration of the movement in seconds.
+        :param profile: Speed curve of the movement ('linear', 'trapezoid' or 'minimum-jerk').
+        :return (None): This function does not return a value.
+        """
+        self.thigh.set_angle(target_angle=thigh, duration=duration_s, profile=profile)
+        self.lower_leg.set_angle(target_angle=lower_leg, duration=duration_s, profile=profile)
+        self.side_axis.set_angle(target_angle=side_axis, duration=duration_s, profile=profile)
+
+    def solve_coordinates(self, coordinates: Union[CoordinateArray, list[Coordinate]]) -> NDArray:
+        """
+        Calculates the servo angles of multiple coordinates in a single vectorized pass.
+
+        :param coordinates: The positions to calculate the angles for.
+        :return (NDArray): Array of shape (N, 3) with the thigh, lower-leg and side-axis angles.
+        """
+        if not isinstance(coordinates, CoordinateArray):
+            coordinates = CoordinateArray.from_coordinates(coordinates)
+
+        adjusted_coordinates: NDArray[float64] = coordinates.xyz * config.coord_multiplier  # Adjust coordinates to the servo coordinate system
+        return self.ik_cache.solve_batch(adjusted_coordinates)
+
+    def set_trajectory(self, coordinates: Union[CoordinateArray, list[Coordinate]], times: Sequence[float], profile: str = config.servo_motion_profile, preempt: bool = False) -> None:
+        """
+        Moves the leg through multiple positions as one continuous motion (no stop between the positions). All positions are solved before anything is moved.
+
+        :param coordinates: The positions to move through.
+        :param times: Seconds after start() at which each position is reached (increasing).
+        :param profile: Speed curve between two positions ('linear', 'trapezoid' or 'minimum-jerk').
+        :param preempt: Keep the running motion until start() replaces it (blending from its current angles and speeds).
+        :return (None): This function does not return a value.
+        :raises ValueError: If the amount of positions and times differs or a position can't be reached.
+        """
+        if not isinstance(coordinates, CoordinateArray):
+            coordinates = CoordinateArray.from_coordinates(coordinates)
+        if len(coordinates) == 0 or len(coordinates) != len(times):
+            raise ValueError(f"Leg {self.leg}: A trajectory needs the same amount (> 0) of positions and times; got {len(coordinates)} and {len(times)}.")
+
+        angles: NDArray = self.solve_coordinates(coordinates)
+        dprint(f"Leg {self.leg}: Moving through {len(coordinates)} position(s) to {coordinates[-1]} in {times[-1]:.2f} seconds")
+
+        self.thigh.set_trajectory(target_angles=angles[:, 0].tolist(), times=times, profile=profile, preempt=preempt)
+        self.lower_leg.set_trajectory(target_angles=angles[:, 1].tolist(), times=times, profile=profile, preempt=preempt)
+        self.side_axis.set_trajectory(target_angles=angles[:, 2].tolist(), times=times, profile=profile, preempt=preempt)
+
+        # Set current position to the end of the trajectory
+        self.current_position = coordinates[-1]
+
+    def queue_trajectory(self, coordinates: Union[CoordinateArray, list[Coordinate]], times: Sequence[float], profile: str = config.servo_motion_profile) -> None:
+        """
+        Starts a trajectory which replaces the running motion of the leg at the next scheduler tick.
+        The first position is approached from the current angles and speeds of the servos, so the leg doesn't stop (see set_trajectory).
+
+        :param coordinates: The positions to move through.
+        :param times: Seconds after now at which each position is reached (increasing).
+        :param profile: Speed curve between two positions ('linear', 'trapezoid' or 'minimum-jerk').
+        :return (None): This function does not return a value.
+        """
+        self.set_trajectory(coordinates=coordinates, times=times, profile=profile, preempt=True)
+        self.start()
+
+    def _get_lookup_table(self) -> Optional[IKLookupTable]:
+        """Returns the IK lookup table if it is enabled. The table is built for the config geometry, so legs with geometry overrides always use the exact solver."""
+        return None if self.kinematics.geometry else get_lookup_table()
+
     @validate_types
     def set_circle(self, step_width: float, angle: int, max_points: int, duration: float) -> None:
         """Sets the leg to move in a circular path.
@@ -130,47 +218,35 @@ class Leg:
 
         Raises:
             ValueError: If any of the input parameters are invalid.
-            Exception: If an error occurs during thread execution.
         """
-        coords: list[Coordinate] = calc_circle_coordinates(step_width=step_width, angle=angle, max_points=max_points)
+        coords: CoordinateArray = calc_circle_coordinate_array(step_width=step_width, angle=angle, max_points=max_points)
         motion_time: float = duration / max_points
 
-        def execute() -> None:
-            for coord in coords:
-                # Break out of loop if the stop event has been set
-                if self._stop_event.is_set(): break
-
-                self.set_to_coordinate(coordinate=coord-Coordinate(x=coord.x/2, y=0.0, z=0.0), duration_s=motion_time)
-                self.start()
-                self.join()
-                
-                # Set current position to the new position
-                self.current_position = coord
-
-        self.circle_thread = threading.Thread(target=execute)
+        # Play all points of the circle as one trajectory (x is halved like coord - Coordinate(x=coord.x/2, y=0.0, z=0.0))
+        self.set_trajectory(coordinates=coords * (0.5, 1.0, 1.0), times=(motion_time * arange(1, len(coords) + 1)).tolist(), profile="linear")
+        self.current_position = coords[-1]
 
     def start_circle(self) -> None:
-        """Starts the circle thread.
+        """Submits the circular path set with set_circle to the motion scheduler (all servos of the leg start in the same tick).
 
         Args:
-            self(Circle): Instance of the Circle class.
+            self(Leg): Instance of the Leg class.
 
         Returns:
-            None: No return value.
+            None: No return value; Use join_circle to wait for the end.
 
         Raises:
-            NoThreadError: Raised if no circle thread is set.
+            NoThreadError: Raised by SServo.start if no circle is set (a servo has no pending motion).
         """
-        if self.circle_thread == None: raise NoThreadError("No circle thread set!")
-        self.circle_thread.start()
+        self.start()
 
     def join_circle(self) -> None:
-        if self.circle_thread == None: raise NoThreadError("No circle thread set!")
-        self.circle_thread.join()
+        self.join()
 
     def start(self) -> None:
-        for servo in self.all_servos:
-            servo.start()
+        with motion_scheduler.atomic():  # Start all servos in the same tick
+            for servo in self.all_servos:
+                servo.start()
 
     def join(self) -> None:
         for servo in self.all_servos:
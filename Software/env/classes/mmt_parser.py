@@ -1,10 +1,20 @@
-from typing import Optional
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Iterable, Iterator, Optional, Union, cast
+from numpy import array, empty, float64
+from numpy.typing import NDArray
 
 # Classes
-from env.classes.Classes import Coordinate
+from env.classes.Classes import Coordinate, CoordinateArray
 
 # Decorators
-from env.decr.decorators import validate_types, cached
+from env.decr.decorators import validate_types
+
+# Func
+from env.func.DEBUG import dprint
+from env.func.mmt_cache import file_stamp, load_compiled_mmt, save_compiled_mmt
 
 # Config
 from env.config import config
@@ -14,89 +24,229 @@ class Parser:
     def __init__(self) -> None:
         # self.file_path: str = file_path
         self.instructions: dict[str, list[dict[str, float|Optional[Coordinate]]]] = {}
+        self.compiled: dict[str, tuple[NDArray[float64], NDArray[float64]]] = {}  # file_path -> durations (blocks,), coordinates (blocks, 4, 3) in the leg order of config.mmt_legs
+        self.stamps: dict[str, tuple[int, int]] = {}  # file_path -> mtime (ns) and size of the file when it was parsed
+        self._lock: Lock = Lock()  # Guards instructions, compiled and stamps (the MMT indexer and the command queue parse from different threads)
+
+    def is_current(self, file_path: str) -> bool:
+        """Returns whether the MMT-File is parsed and didn't change since. A file which was removed keeps its parsed form."""
+        with self._lock:
+            if file_path not in self.compiled:
+                return False
+            stamp: Optional[tuple[int, int]] = self.stamps.get(file_path)
+
+        try:            return file_stamp(file_path) == stamp
+        except OSError: return True
 
     def parse_file(self, file_path: str) -> None:
-        """Parses the MMT-File."""
-        # Skip if file_path is already parsed
-        if self.instructions.get(file_path, None):
+        """Parses the MMT-File (again if it changed). Loads its compiled form instead if the file didn't change since it was compiled (see config.mmt_cache)."""
+        # Skip if file_path is already parsed and unchanged
+        if self.is_current(file_path):
+            return
+
+        # The old parsed forms stay until the new ones are done (or the file turns out to be broken), so other threads can still read them
+        try:
+            stamp: tuple[int, int] = file_stamp(file_path)  # Before reading, so a change while parsing is picked up the next time
+
+            if config.mmt_cache and (compiled := load_compiled_mmt(file_path)) is not None:
+                self._store(file_path, compiled, stamp)
+                return
+
+            instructions: list[dict[str, float|Optional[Coordinate]]] = [block for _, block in self.iter_blocks(file_path)]
+            compiled = self._compile(instructions)
+        except (ValueError, OSError):
+            self._forget(file_path)
+            raise
+
+        self._store(file_path, compiled, stamp, instructions)
+        if config.mmt_cache:
+            save_compiled_mmt(file_path, *compiled)
+
+    def _store(self, file_path: str, compiled: tuple[NDArray[float64], NDArray[float64]], stamp: Optional[tuple[int, int]], instructions: Optional[list[dict[str, float|Optional[Coordinate]]]] = None) -> None:
+        """Replaces the parsed forms of a file (instructions are built from the compiled form when they are needed if None; see get_instructions)."""
+        with self._lock:
+            self.compiled[file_path] = compiled
+            if instructions is not None: self.instructions[file_path] = instructions
+            else:                        self.instructions.pop(file_path, None)
+            if stamp is not None: self.stamps[file_path] = stamp
+            else:                 self.stamps.pop(file_path, None)
+
+    def _forget(self, file_path: str) -> None:
+        """Removes the parsed forms of a file."""
+        with self._lock:
+            self.compiled.pop(file_path, None)
+            self.instructions.pop(file_path, None)
+            self.stamps.pop(file_path, None)
+
+    @staticmethod
+    def _compile(instructions: list[dict[str, float|Optional[Coordinate]]]) -> tuple[NDArray[float64], NDArray[float64]]:
+        """Converts the parsed instructions of a file into a durations and a coordinates array."""
+        coordinates: NDArray[float64] = empty((len(instructions), len(config.mmt_legs), 3), dtype=float64)
+        for idx, instruction in enumerate(instructions):
+            coordinates[idx] = [cast(Coordinate, instruction[leg]).get_xyz() for leg in config.mmt_legs]
+
+        return array([instruction["duration"] for instruction in instructions], dtype=float64), coordinates
+
+    def iter_blocks(self, source: Union[str, Iterable[str]]) -> Iterator[tuple[int, dict[str, float|Optional[Coordinate]]]]:
+        """
+        Parses MMT text and yields each movement as soon as its MOVEMENT-JOIN has been read.<br>
+        Only the current and the previous block are kept, so the memory stays the same no matter how long the input is.
+
+        :param source: Path of an MMT-File or any iterable of lines (an open file, a pipe, socket.makefile("r"), ...). Lines are read only as far as needed.
+        :return (Iterator[tuple[int, dict[str, float|Optional[Coordinate]]]]): Line of the MOVEMENT-JOIN and the validated block.
+        :raises ValueError: If a line is invalid (raised when that line is reached; all blocks before it have already been yielded).
+        """
+        if isinstance(source, str):
+            with open(source, "r", encoding="UTF-8", buffering=1024) as f:
+                yield from self.iter_blocks(f)
             return
 
-        # Reset instructions
-        self.instructions[file_path] = []
         current_block: dict[str, float|Optional[Coordinate]] = {}
+        last_block: Optional[dict[str, float|Optional[Coordinate]]] = None
+
+        # Iterate over all lines of the input
+        for idx, line in enumerate(source, start=1):
+            adjusted_line: str = line.strip()
+
+            # Skip empty lines and comments
+            if not adjusted_line or adjusted_line.startswith("//"):
+                continue
+
+            if adjusted_line == "MOVEMENT-START":  # Start of a new movement
+                current_block = {
+                    "duration": 0.0,
+                    "rf": None,
+                    "rb": None,
+                    "lf": None,
+                    "lb": None,
+                }
+            elif adjusted_line == "MOVEMENT-JOIN":  # End of the movement
+                if not current_block:
+                    raise ValueError(f"Line {idx} is not part of a movement.")
+                if not isinstance(current_block["duration"], float) or current_block["duration"] <= 0:
+                    raise ValueError(f"Invalid duration in movement, line {idx}! Got '{current_block.get('duration', None)}'; expected a positive number grater than 0.")
+                if not all(isinstance(current_block[leg], Coordinate) for leg in ["rf", "rb", "lf", "lb"]):
+                    raise ValueError(f"Invalid leg in movement, line {idx}! Got 'None'; expected a Coordinate object.")
+
+                # Hand out the movement and reset the current block
+                yield idx, current_block
+                last_block, current_block = current_block, {}
+            elif wait_match := config.wait_pattern.match(adjusted_line):
+                # Parse wait instruction
+                duration = float(wait_match.group(1))
+
+                # Use the last movement's leg positions to maintain consistency
+                if last_block is None:
+                    raise ValueError(f"WAIT in line {idx} has no previous movement to hold.")
+
+                current_block.update({
+                    "duration": duration,
+                    "rf": last_block["rf"],
+                    "rb": last_block["rb"],
+                    "lf": last_block["lf"],
+                    "lb": last_block["lb"],
+                })
+            elif duration_match := config.duration_pattern.match(adjusted_line):
+                current_block["duration"] = float(duration_match.group(1))
+            elif coords_match := config.coordinate_pattern.match(adjusted_line):
+                part, coords = coords_match.groups()
+                coord_data: dict[str, float] = {}
+
+                for pair in coords.split(", "):
+                    if "=" not in pair:
+                        raise ValueError(f"Invalid coordinate pair in line {idx}! Got '{pair}'; expected 'x=...', 'y=...' or 'z=...'.")
+
+                    # Extract the coordinate value and the axis
+                    xyz, value = pair.split("=")
+
+                    # Try to add the value to the corresponding coordinate
+                    try:               coord_data[xyz.strip()] = float(value.strip())  # Strip spaces before conversion
+                    except ValueError: raise ValueError(f"Invalid float value at line {idx}: '{value.strip()}'")
+
+                # Add the coordinates to the current block
+                current_block[part.strip()] = Coordinate(x=coord_data["x"], y=coord_data["y"], z=coord_data["z"])
 
-        # Iterate over all lines in the MMT-File
-        with open(file_path, "r", encoding="UTF-8", buffering=1024) as f:
-            for idx, line in enumerate(f, start=1):
-                adjusted_line: str = line.strip()
-
-                # Skip empty lines and comments
-                if not adjusted_line or adjusted_line.startswith("//"):
-                    continue
-
-                if adjusted_line == "MOVEMENT-START":  # Start of a new movement
-                    current_block = {
-                        "duration": 0.0,
-                        "rf": None,
-                        "rb": None,
-                        "lf": None,
-                        "lb": None,
-                    }
-                elif adjusted_line == "MOVEMENT-JOIN":  # End of the movement
-                    if not current_block:
-                        raise ValueError(f"Line {idx} is not part of a movement.")
-                    if not isinstance(current_block["duration"], float) or current_block["duration"] <= 0:
-                        raise ValueError(f"Invalid duration in movement, line {idx}! Got '{current_block.get('duration', None)}'; expected a positive number grater than 0.")
-                    if not all(isinstance(current_block[leg], Coordinate) for leg in ["rf", "rb", "lf", "lb"]):
-                        raise ValueError(f"Invalid leg in movement, line {idx}! Got 'None'; expected a Coordinate object.")
-                    
-                    # Append the movement to the list of instructions and reset the current block
-                    self.instructions[file_path].append(current_block)
-                    current_block = {}
-                elif wait_match := config.wait_pattern.match(adjusted_line):
-                    # Parse wait instruction
-                    duration = float(wait_match.group(1))
-                    
-                    # Use the last movement's leg positions to maintain consistency
-                    last_instr = self.instructions[file_path][-1]
-                    
-                    current_block.update({
-                        "duration": duration,
-                        "rf": last_instr["rf"],
-                        "rb": last_instr["rb"],
-                        "lf": last_instr["lf"],
-                        "lb": last_instr["lb"],
-                    })
-                elif duration_match := config.duration_pattern.match(adjusted_line):
-                    current_block["duration"] = float(duration_match.group(1))
-                elif coords_match := config.coordinate_pattern.match(adjusted_line):
-                    part, coords = coords_match.groups()
-                    coord_data: dict[str, float] = {}
-
-                    for pair in coords.split(", "):
-                        if "=" not in pair:
-                            raise ValueError(f"Invalid coordinate pair in line {idx}! Got '{pair}'; expected 'x=...', 'y=...' or 'z=...'.")
-                        
-                        # Extract the coordinate value and the axis
-                        xyz, value = pair.split("=")
-
-                        # Try to add the value to the corresponding coordinate
-                        try:               coord_data[xyz.strip()] = float(value.strip())  # Strip spaces before conversion
-                        except ValueError: raise ValueError(f"Invalid float value at line {idx}: '{value.strip()}'")
-
-                    # Add the coordinates to the current block
-                    current_block[part.strip()] = Coordinate(x=coord_data["x"], y=coord_data["y"], z=coord_data["z"])
-        
         # Final validation for unclosed blocks
         if current_block:
             raise ValueError(f"Unclosed movement block at the end of the file. --> {current_block}")
-        
-    @validate_types
-    def parse_files(self, file_paths: list[str]) -> None:
-        """Parse all files in the given list of file paths."""
-        for file_path in file_paths:
-            self.parse_file(file_path)
 
-    @cached
+    def parse_files(self, file_paths: list[str], workers: Optional[int] = config.mmt_parse_workers) -> list[str]:
+        """
+        Parses multiple MMT-Files in a process pool (each file in one worker; the compiled forms are sent back).<br>
+        Invalid files are skipped with a warning, so one broken file doesn't stop the others. Files which are parsed and unchanged are skipped.
+        The workers are started with forkserver (spawn where that isn't available), because forking this process while its threads hold locks can deadlock the workers.
+
+        :param file_paths: Paths of the MMT-Files.
+        :param workers: Amount of worker processes (None = one per CPU). With 1 worker (or 1 CPU) or a single file the files are parsed in this process.
+        :return (list[str]): The paths of all files which are parsed now.
+        """
+        pending: list[str] = [file_path for file_path in dict.fromkeys(file_paths) if not self.is_current(file_path)]
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+
+        if workers < 2:
+            for file_path in pending:
+                try:                               self.parse_file(file_path)
+                except (ValueError, OSError) as e: dprint(f"{config.color_yellow}[ WARNING ] Skipping MMT-File '{file_path}'. Error: {e}{config.color_reset}")
+        else:
+            stamps: dict[str, Optional[tuple[int, int]]] = {}
+            for file_path in pending:
+                try:            stamps[file_path] = file_stamp(file_path)  # Before the worker reads the file, like parse_file
+                except OSError: stamps[file_path] = None  # Reported by the worker
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+                for file_path, future in [(file_path, executor.submit(_parse_compiled, file_path)) for file_path in pending]:
+                    try:
+                        self._store(file_path, future.result(), stamps[file_path])
+                    except (ValueError, OSError) as e:
+                        self._forget(file_path)
+                        dprint(f"{config.color_yellow}[ WARNING ] Skipping MMT-File '{file_path}'. Error: {e}{config.color_reset}")
+
+        with self._lock:
+            return [file_path for file_path in file_paths if file_path in self.compiled]
+
+    def get_leg_trajectory(self, file_path: str, leg: str) -> CoordinateArray:
+        """Returns the coordinates of one leg in all movements of a parsed file as a CoordinateArray."""
+        with self._lock:
+            compiled: Optional[tuple[NDArray[float64], NDArray[float64]]] = self.compiled.get(file_path)
+        if compiled is None:
+            return CoordinateArray.zeros(0)
+        return CoordinateArray(compiled[1][:, config.mmt_legs.index(leg)].copy())
+
+    def get_durations(self, file_path: str) -> NDArray[float64]:
+        """Returns the durations of all movements of a parsed file."""
+        with self._lock:
+            compiled: Optional[tuple[NDArray[float64], NDArray[float64]]] = self.compiled.get(file_path)
+        return compiled[0] if compiled is not None else array([], dtype=float64)
+
+    def get_coordinates(self, file_path: str) -> NDArray[float64]:
+        """Returns the coordinates of all legs in all movements of a parsed file (blocks, legs in the order of config.mmt_legs, 3)."""
+        with self._lock:
+            compiled: Optional[tuple[NDArray[float64], NDArray[float64]]] = self.compiled.get(file_path)
+        return compiled[1] if compiled is not None else empty((0, len(config.mmt_legs), 3), dtype=float64)
+
     def get_instructions(self, file_path: str) -> Optional[list[dict[str, float|Optional[Coordinate]]]]:
-        return self.instructions.get(file_path, [])
+        # Files loaded from their compiled form only have arrays; Build the instructions from them
+        with self._lock:
+            if file_path not in self.instructions and file_path in self.compiled:
+                durations, coordinates = self.compiled[file_path]
+                self.instructions[file_path] = [
+                    {"duration": float(duration)} | {leg: Coordinate(x, y, z) for leg, (x, y, z) in zip(config.mmt_legs, block.tolist())}
+                    for duration, block in zip(durations, coordinates)
+                ]
+            return self.instructions.get(file_path, [])
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """Returns the start method of the parse workers: forkserver (spawn where that isn't available)."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+
+    # The server only imports the parser (instead of __main__), so it is started without any threads and the workers are forked from it quickly
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+def _parse_compiled(file_path: str) -> tuple[NDArray[float64], NDArray[float64]]:
+    """Parses an MMT-File in a worker process of Parser.parse_files and returns its compiled form."""
+    parser: Parser = Parser()
+    parser.parse_file(file_path)
+    return parser.compiled[file_path]
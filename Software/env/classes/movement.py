@@ -1,16 +1,29 @@
 import os
-from typing import Callable, Literal
+from typing import Callable, Iterable, Literal, Optional, Union, cast
+from numpy import arange, array, arctan2, cos, sin, degrees, radians, hypot, stack, float64
+from numpy.typing import NDArray
 
 # Func
 from env.classes.leg import Leg
 from env.func.DEBUG import dprint
+from env.func.calculations import calc_circle_coordinate_array
+from env.func.symmetry import solve_paths
+from env.func.mmt_compiler import compile_mmt
 
 # Classes
 from env.classes.leg import SServo
 from env.classes.mmt_parser import Parser
-from env.classes.Classes import Coordinate
+from env.classes.catalogue import MovementCatalogue, CatalogueEntry
+from env.classes.clock import VirtualClock
+from env.classes.Classes import Coordinate, CoordinateArray
 from env.classes.db import DB
 from env.classes.events import StopEvent
+from env.classes.gait import TrotGait
+from env.classes.calculator import Calculator
+from env.classes.timeline import JointTimeline, TimelineCache
+from env.classes.command_queue import CommandQueue
+from env.classes.scheduler import motion_scheduler
+from env.classes.servo_backend import get_servo_backend
 
 # Decorators
 from env.decr.decorators import validate_types
@@ -35,14 +48,16 @@ class Movement:
         function_map(dict[str, Callable]): Dictionary mapping movement names to functions.
     """
     def __init__(self) -> None:
-        # Initialize parser
+        # Initialize parser and the catalogue of the parsed movements
         self.parser = Parser()
+        self.catalogue: MovementCatalogue = MovementCatalogue(parser=self.parser)
         
         # Initialize database
         self.db = DB()
 
         # Initialize stop event to stop leg movements if new key has been pressed
         self.stop_event = StopEvent()
+        self._interrupts: int = 0  # Counts interrupt_movements calls, so a running MMT stream notices it even after the stop event has been reset
 
         # Initialize all servos
         self.leg_right_front: Leg = Leg(leg_configurations=config.leg_configuration_rf, leg="rf", stop_event = self.stop_event)
@@ -62,6 +77,23 @@ class Movement:
             "lb": self.leg_left_back
         }
 
+        # Initialize trot gait (used for steps and turns if config.gait is 'trot')
+        self.gait: TrotGait = TrotGait(legs={
+            "left-front":  self.leg_left_front,
+            "left-back":   self.leg_left_back,
+            "right-front": self.leg_right_front,
+            "right-back":  self.leg_right_back,
+        })
+
+        # Circle table for walk (pregenerated on the first walk)
+        self.calculator: Calculator = Calculator()
+
+        # Compiled timelines of the steps and turns (filled in the background by timelines.compile_async)
+        self.timelines: TimelineCache = TimelineCache(compile=self.compile_timelines)
+
+        # Compiled timelines of the MMT-Files ((file path, interpolation) -> stamp of the parsed file, timeline)
+        self.mmt_timelines: dict[tuple[str, str], tuple[Optional[tuple[int, int]], JointTimeline]] = {}
+
         self.function_map: dict[str, Callable] = {
             # Steps
             "step-forwards" : lambda: self.make_step(direction="step-forward"  ),
@@ -79,14 +111,21 @@ class Movement:
             "lift"          : lambda: self.adjust_height_body(distance_mm=-config.height_step, duration_s=0.1),
         }
 
+        # Commands added by parse_folder (one per movement of the catalogue)
+        self._mmt_commands: set[str] = set()
+
+        # Lookahead queue of the controller commands (see CommandQueue)
+        self.commands: CommandQueue = CommandQueue(commands=self.function_map)
+
     @validate_types
-    def set_all_legs(self, coordinate: Coordinate, duration: float) -> None:
+    def set_all_legs(self, coordinate: Coordinate, duration: float, profile: str = config.servo_motion_profile) -> None:
         """Set the target coordinate and duration for all legs.
 
         Args:
             self(Legs): Instance of the Legs class.
             coordinate(Coordinate): Target coordinate for all legs.
             duration(float): Duration to hold the target coordinate (in seconds).
+            profile(str): Speed curve of the movement ('linear', 'trapezoid' or 'minimum-jerk').
 
         Returns:
             None: No return value.
@@ -95,7 +134,7 @@ class Movement:
             Exception: Generic exception during leg setting.
         """
         for leg in self.all_legs:
-            leg.set_to_coordinate(coordinate=coordinate, duration_s=duration)
+            leg.set_to_coordinate(coordinate=coordinate, duration_s=duration, profile=profile)
 
     def start_all_legs(self) -> None:
         """Starts all legs.
@@ -109,8 +148,9 @@ class Movement:
         Raises:
             Exception: Generic exception during leg start.
         """
-        for leg in self.all_legs:
-            leg.start()
+        with motion_scheduler.atomic():  # Start all servos in the same tick
+            for leg in self.all_legs:
+                leg.start()
 
     def join_all_legs(self) -> None:
         """Joins all legs.
@@ -127,6 +167,32 @@ class Movement:
         for leg in self.all_legs:
             leg.join()
 
+    def get_ik_cache_stats(self) -> dict[str, dict[str, float]]:
+        """Returns the statistics (hit rate, size, evictions, ...) of the IK cache of each leg. Legs with the same geometry share their cache (and statistics)."""
+        return {leg: leg_obj.ik_cache.stats() for leg, leg_obj in self.parser_legs.items()}
+
+    def get_servo_frame_stats(self) -> dict[str, float]:
+        """Returns the write time and start skew of the frames written to the servo controller."""
+        return get_servo_backend().frame_stats.as_dict()
+
+    def get_servo_bus_stats(self) -> dict[str, float]:
+        """Returns how many servo updates were written, skipped (unchanged), merged and deferred (bandwidth budget)."""
+        return get_servo_backend().bus_stats()
+
+    def get_control_jitter(self) -> dict[str, float]:
+        """Returns the lateness histogram of the motion scheduler ticks."""
+        return motion_scheduler.ticker.histogram.as_dict()
+
+    def dump_control_jitter(self, reset: bool = False) -> None:
+        """Writes the lateness histogram of the motion scheduler ticks to the log (and resets it if 'reset' is set)."""
+        motion_scheduler.ticker.histogram.dump()
+        if reset:
+            motion_scheduler.ticker.histogram.reset()
+
+    def get_preemption_latency(self) -> dict[str, float]:
+        """Returns the histogram of the time between queuing a trajectory (Leg.queue_trajectory) and it replacing the running motion."""
+        return motion_scheduler.preemption_latency.as_dict()
+
     def interrupt_movements(self) -> None:
         """Interrupt all ongoing leg movements.
 
@@ -139,6 +205,8 @@ class Movement:
         Raises:
             Exception: Generic exception during leg movement interruption.
         """
+        self.gait.interrupt()
+        self._interrupts += 1
         self.stop_event.set()
 
         self.join_all_legs()
@@ -146,13 +214,14 @@ class Movement:
 
     #? Maybe remove this function (Doesn't make sense)
     @validate_types
-    def normalize_all_legs(self, duration_s: float = config.servo_default_normalize_speed) -> None:
+    def normalize_all_legs(self, duration_s: float = config.servo_default_normalize_speed, profile: str = config.servo_motion_profile) -> None:
         """Normalize all legs to their normal position."""
         dprint("Moving servos to normal position...")
+        self.gait.finish()  # Let a running gait end its cycle instead of interrupting it
 
         # Set normal position for all legs
         for leg in self.all_legs:
-            leg.set_to_normal_position(duration_s=duration_s)
+            leg.set_to_normal_position(duration_s=duration_s, profile=profile)
 
         self.start_all_legs()
         self.join_all_legs()
@@ -163,24 +232,148 @@ class Movement:
     @validate_types
     def execute_mmt(self, mmt_name: str) -> None:
         """Execute a movement from the movement manager table (mmt)."""
-        #! Has to be changed
-        #? Why
-        #? Maybe better parsing?
-        for instruction in self.parser.get_instructions(os.path.join(config.mmt_default_path, f"{mmt_name}.mmt")):
-            if not instruction:
-                continue
+        entry: Optional[CatalogueEntry] = self.catalogue.get(mmt_name)
+        self.play_mmt(entry.file_path if entry else os.path.join(config.mmt_default_path, f"{mmt_name}.mmt"))
+
+    def play_mmt(self, file_path: str) -> None:
+        """Compiles (once) and plays an MMT-File and waits until it is done.
+
+        Args:
+            file_path(str): Path of the MMT-File.
+
+        Raises:
+            MMTCompileError: If any block can't be reached or exceeds the range of a servo.
+        """
+        timeline: JointTimeline = self.compile_mmt(file_path)
+        self.gait.finish()  # Let a running gait end its cycle instead of interrupting it
+
+        # Play the precompiled angles of all servos (no kinematics at runtime)
+        legs: list[Leg] = [self.parser_legs[leg] for leg in config.mmt_legs]
+        timeline.play(servos=[servo for leg_obj in legs for servo in leg_obj.get_servos()])
+        for leg, leg_obj in zip(config.mmt_legs, legs):
+            leg_obj.current_position = cast(Coordinate, self.parser.get_leg_trajectory(file_path, leg)[-1])
+
+        self.join_all_legs()
+
+    def compile_mmt(self, file_path: str) -> JointTimeline:
+        """Compiles an MMT-File into a joint-space timeline (once per file; again after the file was edited).
+
+        Args:
+            file_path(str): Path of the MMT-File.
+
+        Returns:
+            JointTimeline: The movement of all servos in the leg order of config.mmt_legs.
 
-            for leg, coord in instruction.items():
-                # Pass duration
-                if leg == "duration":
+        Raises:
+            MMTCompileError: If any block can't be reached or exceeds the range of a servo (lists every invalid block with its line).
+        """
+        key: tuple[str, str] = (file_path, config.mmt_interpolation)
+        self.parser.parse_file(file_path)  # Parses the file again if it changed
+        stamp: Optional[tuple[int, int]] = self.parser.stamps.get(file_path)
+
+        if key not in self.mmt_timelines or self.mmt_timelines[key][0] != stamp:
+            self.mmt_timelines[key] = (stamp, compile_mmt(parser=self.parser, file_path=file_path, legs=[self.parser_legs[leg] for leg in config.mmt_legs], interpolation=config.mmt_interpolation))
+
+            # Update the metadata of the catalogue as well
+            name: str = os.path.splitext(os.path.basename(file_path))[0]
+            if (entry := self.catalogue.get(name)) is not None and entry.file_path == file_path:
+                self.catalogue.add(file_path)
+        return self.mmt_timelines[key][1]
+
+    def stream_mmt(self, source: Union[str, Iterable[str]]) -> int:
+        """Plays MMT movements while they are still being read.
+
+        Each block starts as soon as its MOVEMENT-JOIN has been parsed; the next block is read while the legs move.
+        Nothing is stored, so arbitrarily long files or endless streams (pipes, sockets) can be played.
+        Blocks which hold the previous position (e.g. WAIT) only wait; Nothing is sent to the servos.
+
+        Args:
+            source(Union[str, Iterable[str]]): Path of an MMT-File or an iterable of lines (e.g. sys.stdin or socket.makefile("r")).
+
+        Returns:
+            int: Amount of blocks played (stops early if the movements are interrupted).
+
+        Raises:
+            ValueError: If the input contains an invalid line or an unreachable position (all blocks before it have been played).
+        """
+        interrupts: int = self._interrupts
+        played: int = 0
+        previous: Optional[dict] = None
+
+        try:
+            for _, block in self.parser.iter_blocks(source):
+                # Blocks which hold the previous position (e.g. WAIT) are idle intervals; Nothing is sent to the servos
+                if previous is not None and all(block[leg] == previous[leg] for leg in self.parser_legs):
+                    self.join_all_legs()
+                    if not self._hold(cast(float, block["duration"]), interrupts=interrupts):
+                        break
+                    played += 1
                     continue
+                previous = block
+
+                angles: dict[str, NDArray] = {leg: leg_obj.solve_coordinates([cast(Coordinate, block[leg])])[0] for leg, leg_obj in self.parser_legs.items()}
 
-                # Move to coordinate
-                self.parser_legs[leg].set_to_coordinate(coordinate=coord, duration_s=instruction["duration"])
+                # Wait for the previous block before moving on
+                self.join_all_legs()
+                if self._interrupts != interrupts:
+                    break
+
+                for leg, leg_obj in self.parser_legs.items():
+                    thigh, lower_leg, side_axis = angles[leg]
+                    leg_obj.set_to_angles(thigh=int(thigh), lower_leg=int(lower_leg), side_axis=int(side_axis), duration_s=cast(float, block["duration"]))
+                    leg_obj.current_position = cast(Coordinate, block[leg])
+
+                self.start_all_legs()
+                played += 1
+        finally:
+            self.join_all_legs()
+
+        return played
+
+    def _hold(self, duration: float, interrupts: int) -> bool:
+        """Waits for the duration of an idle block (e.g. WAIT).
+
+        Args:
+            duration(float): Seconds to wait.
+            interrupts(int): Value of _interrupts when the movement started.
+
+        Returns:
+            bool: False if the movements were interrupted while waiting (returns at once); True otherwise.
+        """
+        clock = motion_scheduler.ticker.clock
+        end_ns: int = clock.now_ns() + round(duration * 1e9)
+
+        while self._interrupts == interrupts:
+            remaining: float = (end_ns - clock.now_ns()) / 1e9
+            if remaining <= 0:
+                return True
+
+            if isinstance(clock, VirtualClock):
+                clock.sleep(remaining)  # Simulated time passes at once
+            else:
+                self.stop_event.wait(remaining)  # Woken up by interrupt_movements
+        return False
 
     @validate_types
-    def parse_folder(self, folder_path: str) -> None:
-        self.parser.parse_files(file_paths=[file for file in os.listdir(folder_path) if file.endswith(".mmt") and os.path.isfile(file) and not "test" in file.lower() and not file.startswith(".")])
+    def parse_folder(self, folder_path: str = config.mmt_default_path) -> list[str]:
+        """Parses all MMT-Files of a folder into the catalogue and makes them available as commands (function_map).
+
+        Args:
+            folder_path(str): Folder of the MMT-Files (default: config.mmt_default_path).
+
+        Returns:
+            list[str]: Names of the added movements.
+        """
+        names: list[str] = self.catalogue.load_folder(folder_path=folder_path)
+
+        for name in names:
+            if name in self.function_map and name not in self._mmt_commands:
+                dprint(f"{config.color_yellow}[ WARNING ] Movement '{name}' has the same name as a built-in command; It can only be run with execute_mmt.{config.color_reset}")
+                continue
+            self.function_map[name] = lambda name=name: self.execute_mmt(name)
+            self._mmt_commands.add(name)
+
+        return names
 
 
     # * Step functions
@@ -251,8 +444,87 @@ class Movement:
         # Validate direction
         assert direction in ["step-forward", "step-backward", "sidestep-right", "sidestep-left"], f"Direction {direction} is not valid. Use 'step-forward', 'step-backward', 'sidestep-right' or 'sidestep-left'."
 
+        self._gait_or_step(direction=direction, step_width=step_width, duration=duration)
+
+    def _gait_or_step(self, direction: Literal["step-forward", "step-backward", "sidestep-right", "sidestep-left", "turn-left", "turn-right"], step_width: float, duration: float) -> None:
+        """Walks one cycle with the trot gait if config.gait is 'trot'; Makes a single step otherwise. Plays the compiled timeline of the direction if there is one.
+
+        Args:
+            direction(Literal["step-forward", "step-backward", "sidestep-right", "sidestep-left", "turn-left", "turn-right"]): Direction of the step (key of config.step_map_angles).
+            step_width(float): Width of the step.
+            duration(float): Duration of the step (only used without the trot gait; the gait uses config.gait_cycle_time).
+
+        Returns:
+            None: No return value.
+        """
         angles: dict[Literal["left-front", "left-back", "right-front", "right-back"], int] = config.step_map_angles[direction]
-        self._step(step_width=step_width, angles=angles, duration=duration)
+
+        # Timelines are compiled with the default step width and duration only
+        timeline: Optional[JointTimeline] = self.timelines.get(direction) if step_width == config.step_width and duration == config.duration else None
+
+        if config.gait == "trot":
+            self.gait.step(circles=self.gait.circles(angles=angles, step_width=step_width), cycle=timeline)
+        elif timeline is not None:
+            timeline.play(self.all_servos)
+            self.join_all_legs()
+
+            # Same end positions as _step
+            self.leg_left_front.current_position = Coordinate(0.0, 0.0, 0.0)
+            self.leg_right_back.current_position = Coordinate(0.0, 0.0, 0.0)
+            for leg, angle in ((self.leg_right_front, angles["right-front"]), (self.leg_left_back, angles["left-back"])):
+                leg.current_position = cast(Coordinate, calc_circle_coordinate_array(step_width=step_width, angle=angle, max_points=config.max_points)[-1])
+        else:
+            self._step(step_width=step_width, angles=angles, duration=duration)
+
+    def _compile_step(self, step_width: float, angles: dict[Literal["left-front", "left-back", "right-front", "right-back"], int], duration: float) -> JointTimeline:
+        """Renders _step into a joint-space timeline (both phases, without the stop between them).
+
+        Args:
+            step_width(float): Width of the step to be taken.
+            angles(dict[Literal["left-front", "left-back", "right-front", "right-back"], int]): Dictionary containing the angles for each leg.
+            duration(float): Total duration of the step movement.
+
+        Returns:
+            JointTimeline: Timeline with one column per servo of all_servos.
+        """
+        duration_single: float = duration / 2
+        motion_time: float = duration_single / config.max_points
+        phase_end: float = max(duration_single, motion_time * (config.max_points + 1))  # The circle has max_points + 1 points (see Leg.set_circle)
+        keyframes: dict[Leg, tuple[list[float], list[NDArray]]] = {leg: ([], []) for leg in self.all_legs}
+
+        def circle(leg: Leg, angle: int, start: float) -> None:
+            coords: CoordinateArray = calc_circle_coordinate_array(step_width=step_width, angle=angle, max_points=config.max_points) * (0.5, 1.0, 1.0)
+            keyframes[leg][0].extend((start + motion_time * arange(1, len(coords) + 1)).tolist())
+            keyframes[leg][1].extend(coords.xyz)
+
+        def normal(leg: Leg, start: float) -> None:
+            keyframes[leg][0].append(start + duration_single)
+            keyframes[leg][1].append(Coordinate(0.0, 0.0, 0.0).get_xyz())
+
+        # Left front and right back leg, then right front and left back leg
+        normal(self.leg_right_front, 0.0)
+        normal(self.leg_left_back, 0.0)
+        circle(self.leg_left_front, angles["left-front"], 0.0)
+        circle(self.leg_right_back, angles["right-back"], 0.0)
+
+        normal(self.leg_left_front, phase_end)
+        normal(self.leg_right_back, phase_end)
+        circle(self.leg_right_front, angles["right-front"], phase_end)
+        circle(self.leg_left_back, angles["left-back"], phase_end)
+
+        # Solve the paths of all legs at once (shared paths only once; see solve_paths)
+        solved: dict[Leg, NDArray] = solve_paths({leg: (leg, CoordinateArray(keyframes[leg][1])) for leg in self.all_legs})
+        return JointTimeline.render([(keyframes[leg][0], solved[leg][:, servo_idx].tolist()) for leg in self.all_legs for servo_idx in range(3)])
+
+    def compile_timelines(self) -> dict[str, JointTimeline]:
+        """Compiles the steps and turns of all directions of config.step_map_angles (with the gait selected by config.gait).
+
+        Returns:
+            dict[str, JointTimeline]: Direction -> compiled timeline.
+        """
+        if config.gait == "trot":
+            return {direction: self.gait.compile(self.gait.circles(angles=angles)) for direction, angles in config.step_map_angles.items()}
+        return {direction: self._compile_step(step_width=config.step_width, angles=angles, duration=config.duration) for direction, angles in config.step_map_angles.items()}
 
     def turn(self, direction: Literal["turn-left", "turn-right"], step_width: float = config.step_width, duration: float = config.duration) -> None:
         """Turns the robot to the specified direction.
@@ -269,8 +541,72 @@ class Movement:
             AssertionError: Raised if the direction is not "turn-left" or "turn-right".
         """
         assert direction in ["turn-left", "turn-right"], f"Direction {direction} is not valid. Use 'left' or 'right'."
-        angles: dict[Literal["left-front", "left-back", "right-front", "right-back"], int] = config.step_map_angles[direction]
-        self._step(step_width=step_width, angles=angles, duration=duration)
+        self._gait_or_step(direction=direction, step_width=step_width, duration=duration)
+
+    def walk(self, heading_deg: float, step_width: float = config.step_width) -> None:
+        """Walks one gait cycle in any direction with any step width (trot gait).
+
+        The circles are looked up in the pregenerated table of the Calculator (interpolated between the neighbouring
+        step widths and angles), so no trigonometry runs per command.
+
+        Args:
+            heading_deg(float): Direction in degrees like config.step_map_angles (0 = forwards, 90 = left, 180 = backwards, 270 = right).
+            step_width(float): Width of the step in mm (inside of config.circle_table_min_width - config.circle_table_max_width).
+
+        Returns:
+            None: No return value.
+
+        Raises:
+            KeyError: Raised if the step width is outside of the pregenerated table.
+        """
+        circle: CoordinateArray = self._get_calculator().interpolate(step_width=step_width, angle=heading_deg)
+        self.gait.step(circles={name: circle for name in self.gait.legs})
+
+    def walk_arc(self, speed_mm_s: float, yaw_rate_deg_s: float, heading_deg: float = 0.0) -> None:
+        """Walks one gait cycle on an arc: the body moves with a linear velocity and turns with a yaw rate at the same time (trot gait).
+
+        Each foot swings in the direction (and by the distance) its mount point moves over the ground during the stance,
+        so the swing direction and width differ per leg (see config.leg_mount_positions).
+        All distances are in mm of the leg coordinate system (before config.coord_multiplier): a foot travels speed * stance time over the ground.
+        The gait halves the x axis (forwards) of every circle like Leg.set_circle, so the table circles are looked up twice as long in x to cancel that.
+
+        Args:
+            speed_mm_s(float): Speed of the body center in mm/s.
+            yaw_rate_deg_s(float): Turn rate in degrees per second (positive = left).
+            heading_deg(float): Direction of the speed like config.step_map_angles (0 = forwards, 90 = left).
+
+        Returns:
+            None: No return value.
+
+        Raises:
+            ValueError: Raised if a foot would need a circle wider than config.circle_table_max_width.
+        """
+        stance_time: float = self.gait.duty_factor * self.gait.cycle_time
+
+        # Velocity of each mount point: v + ω × r
+        omega: float = radians(yaw_rate_deg_s)
+        velocity: NDArray = speed_mm_s * array([cos(radians(heading_deg)), sin(radians(heading_deg))])
+        mounts: NDArray = array([config.leg_mount_positions[name] for name in self.gait.legs], dtype=float64)
+        feet: NDArray = velocity + omega * stack((-mounts[:, 1], mounts[:, 0]), axis=1)
+
+        # Travel of each foot during the stance in mm (x = forwards, y = left); x is doubled for the circle, because the gait halves it
+        travel: NDArray = feet * stance_time * (2.0, 1.0)
+        widths: NDArray = hypot(travel[:, 0], travel[:, 1])
+        angles: NDArray = degrees(arctan2(travel[:, 1], travel[:, 0])) % 360
+        if widths.max() > config.circle_table_max_width:
+            raise ValueError(f"Circle width of {widths.max():.1f} mm needed; Maximum is {config.circle_table_max_width} mm. Walk slower or turn less.")
+
+        calculator: Calculator = self._get_calculator()
+        self.gait.step(circles={
+            name: calculator.interpolate(step_width=max(float(width), config.circle_table_min_width), angle=float(angle))  # Narrower steps are stepped in place
+            for name, width, angle in zip(self.gait.legs, widths, angles)
+        })
+
+    def _get_calculator(self) -> Calculator:
+        """Returns the calculator with its circle table (pregenerated on first use)."""
+        if self.calculator.table is None:
+            self.calculator.pregenerate_coordinates(frm=config.circle_table_min_width, to=config.circle_table_max_width, step=config.circle_table_width_step)
+        return self.calculator
 
     @validate_types
     def adjust_height_body(self, *, distance_mm: float, duration_s: float) -> None:
@@ -286,6 +622,8 @@ class Movement:
         Raises:
             Exception: Generic exception during leg movement.
         """
+        self.gait.finish()  # Let a running gait end its cycle instead of interrupting it
+
         for leg in self.all_legs:
             current_coordinate: Coordinate = leg.get_current_position()
 
@@ -0,0 +1,147 @@
+import time
+from typing import Optional, Protocol
+
+# Config
+from env.config import config
+
+# Registers
+MODE1: int     = 0x00
+PRESCALE: int  = 0xFE
+LED0_ON_L: int = 0x06
+
+# MODE1 bits
+MODE1_RESTART: int = 0x80
+MODE1_AI: int      = 0x20  # Register auto-increment
+MODE1_SLEEP: int   = 0x10
+
+OSCILLATOR_HZ: int = 25_000_000
+
+class I2CBus(Protocol):
+    """Minimal I2C interface (subset of busio.I2C) the PCA9685 driver needs."""
+    def writeto(self, address: int, buffer: bytes) -> None: ...
+    def writeto_then_readfrom(self, address: int, buffer_out: bytes, buffer_in: bytearray) -> None: ...
+
+class BusioI2C:
+    """Adapter for busio.I2C which handles the bus lock."""
+    def __init__(self) -> None:
+        import board  # type:ignore[import-untyped, import-not-found]
+        import busio  # type:ignore[import-untyped, import-not-found]
+        self._i2c = busio.I2C(board.SCL, board.SDA)
+
+    def _lock(self) -> None:
+        while not self._i2c.try_lock():
+            pass
+
+    def writeto(self, address: int, buffer: bytes) -> None:
+        self._lock()
+        try:     self._i2c.writeto(address, buffer)
+        finally: self._i2c.unlock()
+
+    def writeto_then_readfrom(self, address: int, buffer_out: bytes, buffer_in: bytearray) -> None:
+        self._lock()
+        try:     self._i2c.writeto_then_readfrom(address, buffer_out, buffer_in)
+        finally: self._i2c.unlock()
+
+class FakeI2CBus:
+    """
+    I2C bus without hardware. Keeps a register file per address and records every transaction,
+    so the PCA9685 output path can be tested and benchmarked on any machine.
+
+    :param bus_speed_hz (Optional[float]): If set, every transaction blocks as long as it would take on a real bus of this speed.
+    """
+    def __init__(self, bus_speed_hz: Optional[float] = None) -> None:
+        self.bus_speed_hz: Optional[float] = bus_speed_hz
+        self.registers: dict[int, bytearray] = {}
+        self.transactions: list[tuple[int, int, bytes]] = []  # (perf_counter_ns, address, buffer)
+
+    def _transfer(self, byte_count: int) -> None:
+        """Simulates the transfer time (address byte + data bytes; 9 clocks each)."""
+        if not self.bus_speed_hz:
+            return
+
+        end: float = time.perf_counter() + (byte_count + 1) * 9 / self.bus_speed_hz
+        while time.perf_counter() < end:
+            pass
+
+    def writeto(self, address: int, buffer: bytes) -> None:
+        self._transfer(len(buffer))
+        registers: bytearray = self.registers.setdefault(address, bytearray(256))
+        register, data = buffer[0], buffer[1:]
+        registers[register:register + len(data)] = data
+        self.transactions.append((time.perf_counter_ns(), address, bytes(buffer)))
+
+    def writeto_then_readfrom(self, address: int, buffer_out: bytes, buffer_in: bytearray) -> None:
+        self._transfer(len(buffer_out) + len(buffer_in))
+        registers: bytearray = self.registers.setdefault(address, bytearray(256))
+        buffer_in[:] = registers[buffer_out[0]:buffer_out[0] + len(buffer_in)]
+
+class PCA9685:
+    """
+    Driver of the PCA9685 PWM controller which converts servo angles to pulse widths.<br>
+    write_frame updates any number of channels with a single auto-increment block write to the LED registers.
+
+    :param bus (I2CBus): The I2C bus of the controller.
+    :param address (int): I2C address of the controller.
+    """
+    def __init__(self, bus: I2CBus, address: int = config.pca9685_address, frequency: float = config.pca9685_frequency) -> None:
+        self.bus: I2CBus = bus
+        self.address: int = address
+        self.frequency: float = frequency
+
+        # Pulse width range of the servos in 12 bit ticks (like adafruit_motor.servo)
+        ticks_per_us: float = 4096 * frequency / 1_000_000
+        self.min_ticks: float = config.servo_min_pulse_us * ticks_per_us
+        self.range_ticks: float = (config.servo_max_pulse_us - config.servo_min_pulse_us) * ticks_per_us
+
+        # Mirror of the OFF values of all channels, so a block can be written without reading it first
+        self.off_ticks: list[int] = [0] * 16
+
+        self._initialize()
+
+    def _initialize(self) -> None:
+        """Sets the PWM frequency and enables register auto-increment."""
+        self.bus.writeto(self.address, bytes((MODE1, MODE1_SLEEP | MODE1_AI)))
+        self.bus.writeto(self.address, bytes((PRESCALE, round(OSCILLATOR_HZ / (4096 * self.frequency)) - 1)))
+        self.bus.writeto(self.address, bytes((MODE1, MODE1_AI)))
+        time.sleep(0.005)  # Oscillator needs 500 µs to start
+        self.bus.writeto(self.address, bytes((MODE1, MODE1_RESTART | MODE1_AI)))
+
+        # Read the current OFF values to keep the servos where they are
+        for channel in range(16):
+            self.off_ticks[channel] = self._read_off_ticks(channel)
+
+    def _read_off_ticks(self, channel: int) -> int:
+        buffer: bytearray = bytearray(4)
+        self.bus.writeto_then_readfrom(self.address, bytes((LED0_ON_L + 4 * channel,)), buffer)
+        return buffer[2] | (buffer[3] & 0x0F) << 8
+
+    def angle_to_ticks(self, angle: int) -> int:
+        return int(self.min_ticks + angle / 180 * self.range_ticks)
+
+    def ticks_to_angle(self, ticks: int) -> Optional[int]:
+        if ticks == 0: return None  # Channel has never been set
+        return round((ticks - self.min_ticks) / self.range_ticks * 180)
+
+    def read_angle(self, channel: int) -> Optional[int]:
+        return self.ticks_to_angle(self.off_ticks[channel])
+
+    def write_frame(self, angles: dict[int, int]) -> int:
+        """
+        Writes the angles of multiple channels in a single block write (from the lowest to the highest channel; channels in between are rewritten with their current value).
+
+        :param angles: channel -> angle
+        :return (int): Amount of bytes written.
+        """
+        if not angles:
+            return 0
+
+        for channel, angle in angles.items():
+            self.off_ticks[channel] = self.angle_to_ticks(angle)
+
+        first, last = min(angles), max(angles)
+        buffer: bytearray = bytearray((LED0_ON_L + 4 * first,))
+        for ticks in self.off_ticks[first:last + 1]:
+            buffer += bytes((0, 0, ticks & 0xFF, ticks >> 8))  # ON at tick 0, OFF at 'ticks'
+
+        self.bus.writeto(self.address, bytes(buffer))
+        return len(buffer)
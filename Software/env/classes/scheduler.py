@@ -0,0 +1,399 @@
+from heapq import heappush, heappop
+from queue import SimpleQueue, Empty
+from threading import Thread, Event, Lock, RLock
+from typing import Callable, Iterator, Optional, Sequence
+from contextlib import contextmanager
+from numpy import float64
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.clock import VirtualClock
+from env.classes.events import StopEvent
+from env.classes.Classes import ServoWrapper
+from env.classes.servo_backend import ServoBackend
+from env.classes.ticker import DeadlineTicker, LatenessHistogram
+
+# Func
+from env.func.DEBUG import dprint
+from env.func.motion_profiles import get_motion_profile
+
+# Config
+from env.config import config
+
+class MotionHandle:
+    """
+    Future-like handle of a motion submitted to the MotionScheduler.
+
+    :param channel (int): The servo channel of the motion.
+    :param scheduler (Optional[MotionScheduler]): Scheduler of the motion; Waiting steps it if it runs synchronously (see MotionScheduler.synchronous).
+    """
+    __slots__: tuple[str, ...] = ("channel", "_scheduler", "_done", "_cancel_requested", "cancelled")
+
+    def __init__(self, channel: int, scheduler: Optional["MotionScheduler"] = None) -> None:
+        self.channel: int = channel
+        self._scheduler: Optional[MotionScheduler] = scheduler
+        self._done: Event = Event()
+        self._cancel_requested: bool = False
+        self.cancelled: bool = False
+
+    def done(self) -> bool:
+        """Returns True if the motion has finished or was cancelled."""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the motion has finished. Returns False if the timeout expired."""
+        if self._scheduler is not None and self._scheduler.synchronous:
+            self._scheduler.run_until(self.done)
+            return self.done()
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """Requests to cancel the motion. The scheduler stops it at its next tick."""
+        self._cancel_requested = True
+
+    def _finish(self, cancelled: bool = False) -> None:
+        self.cancelled = cancelled
+        self._done.set()
+
+class _Motion:
+    """Interpolation state of a single channel. A motion passes one or more keyframes (target angle + time it is reached) without stopping in between."""
+    __slots__: tuple[str, ...] = (
+        "handle", "wrapper", "targets", "times", "min_angle", "max_angle", "stop_events", "profile", "profile_last", "blend", "submitted_ns",
+        "segment", "start_angle", "start_time", "start_velocity", "angle", "velocity", "last_tick"
+    )
+
+    def __init__(self, *, handle: MotionHandle, wrapper: ServoWrapper, targets: tuple[int, ...], times: tuple[float, ...], min_angle: int, max_angle: int, stop_events: tuple[StopEvent, ...], profile: NDArray[float64], blend: bool, submitted_ns: int) -> None:
+        self.handle: MotionHandle = handle
+        self.wrapper: ServoWrapper = wrapper
+        self.targets: tuple[int, ...] = targets
+        self.times: tuple[float, ...] = times  # Seconds after the start at which each target is reached
+        self.min_angle: int = min_angle
+        self.max_angle: int = max_angle
+        self.stop_events: tuple[StopEvent, ...] = stop_events
+        self.profile: NDArray[float64] = profile
+        self.profile_last: int = len(profile) - 1
+        self.blend: bool = blend                # Continue from the angle and speed of the replaced motion
+        self.submitted_ns: int = submitted_ns
+        self.segment: int = 0                   # Index of the keyframe currently moved to
+        self.start_angle: float = wrapper.angle  # Angle at the start of the current segment
+        self.start_time: int = 0                # perf_counter_ns
+        self.start_velocity: Optional[float] = None  # Speed (°/s) at the start of the first segment if the motion blends into a replaced one
+        self.angle: float = wrapper.angle       # Unrounded angle of the last tick
+        self.velocity: float = 0.0              # Speed (°/s) of the last tick
+        self.last_tick: int = 0
+
+class MotionScheduler:
+    """
+    Single thread which owns all servo channels and advances their interpolation at a fixed tick rate (absolute deadlines, see DeadlineTicker).<br>
+    Motions are passed to the thread through a queue; Their completion is signaled with MotionHandles.
+    All channel updates of a tick are staged in the backends and written as one frame per backend.
+    On a virtual clock there is no thread: The ticks are run by the threads which wait for the scheduler (see synchronous).
+
+    :param tick_rate (float): Ticks per second of the control loop.
+    :param policy (str): What to do with missed ticks ('catch-up' or 'skip').
+    """
+    def __init__(self, tick_rate: float = config.control_tick_rate, policy: str = config.control_tick_policy) -> None:
+        self.ticker: DeadlineTicker = DeadlineTicker(tick_rate=tick_rate, policy=policy)
+        self.tick_rate: float = tick_rate
+
+        self._queue: SimpleQueue[Optional[_Motion]] = SimpleQueue()  # None only wakes up the thread (see wait_until)
+        self._motions: dict[int, _Motion] = {}  # channel -> active motion
+        self._backends: set[ServoBackend] = set()  # Backends with staged angles
+        self._thread: Optional[Thread] = None
+        self._thread_lock: Lock = Lock()
+        self._step_lock: Lock = Lock()  # Held by the thread which runs the ticks of a synchronous scheduler
+        self._submit_lock: RLock = RLock()  # Held while taking over queued motions (see atomic)
+        self.preemption_latency: LatenessHistogram = LatenessHistogram()  # Time from submitting a blending motion until it replaced the running one
+        self._timers: list[tuple[int, int, Event]] = []  # Heap of (clock ns, id, event) of wait_until
+        self._timer_lock: Lock = Lock()
+        self._idle_callbacks: list[Callable[[], None]] = []  # Called in the scheduler thread whenever the last motion has ended (see add_idle_callback)
+        self._idle: bool = True
+
+    def submit(self,
+            *,
+            channel: int,
+            wrapper: ServoWrapper,
+            target: int,
+            duration: float,
+            min_angle: int,
+            max_angle: int,
+            stop_events: tuple[StopEvent, ...] = (),
+            profile: str = config.servo_motion_profile,
+            blend: bool = False
+        ) -> MotionHandle:
+        """
+        Submits a motion of a channel to its target angle. A running motion of the same channel is replaced at the next tick.
+
+        :param channel: The servo channel.
+        :param wrapper: The ServoWrapper which writes the angles of the channel.
+        :param target: The (already adjusted) target angle.
+        :param duration: Time in seconds to complete the movement (measured on the monotonic clock). The motion lasts this long even if the servo is already at the target.
+        :param min_angle, max_angle: Range the interpolated angles are clamped to.
+        :param stop_events: The motion is cancelled as soon as one of these events is set.
+        :param profile: Speed curve of the motion (see motion_profiles.MOTION_PROFILES).
+        :param blend: If a motion of the channel is running, start from its current angle and speed (cubic Hermite curve to the first target) instead of stopping it first.
+        :return (MotionHandle): Handle to wait for or cancel the motion.
+        """
+        return self.submit_trajectory(channel=channel, wrapper=wrapper, targets=(target,), times=(duration,), min_angle=min_angle, max_angle=max_angle, stop_events=stop_events, profile=profile, blend=blend)
+
+    def submit_trajectory(self,
+            *,
+            channel: int,
+            wrapper: ServoWrapper,
+            targets: Sequence[int],
+            times: Sequence[float],
+            min_angle: int,
+            max_angle: int,
+            stop_events: tuple[StopEvent, ...] = (),
+            profile: str = config.servo_motion_profile,
+            blend: bool = False
+        ) -> MotionHandle:
+        """
+        Submits a motion of a channel through multiple keyframes. Consecutive keyframes are interpolated within the scheduler, so there is no pause between them.
+
+        :param targets: The (already adjusted) target angles.
+        :param times: Seconds after the start at which each target is reached (increasing).
+        :param profile: Speed curve between two keyframes.
+        :return (MotionHandle): Handle to wait for or cancel the whole motion.
+        :raises ValueError: If there are no keyframes or the times aren't increasing.
+
+        See submit for the other parameters.
+        """
+        if not targets or len(targets) != len(times):
+            raise ValueError(f"A trajectory needs the same amount (> 0) of targets and times; got {len(targets)} targets and {len(times)} times.")
+        if any(t < 0 for t in times) or any(later < earlier for earlier, later in zip(times, times[1:])):
+            raise ValueError(f"The times of a trajectory must be positive and increasing; got {times}.")
+
+        handle: MotionHandle = MotionHandle(channel=channel, scheduler=self)
+        self._queue.put(_Motion(
+            handle =       handle,
+            wrapper =      wrapper,
+            targets =      tuple(targets),
+            times =        tuple(times),
+            min_angle =    min_angle,
+            max_angle =    max_angle,
+            stop_events =  stop_events,
+            profile =      get_motion_profile(profile),
+            blend =        blend,
+            submitted_ns = self.ticker.clock.now_ns(),
+        ))
+        self._ensure_running()
+        return handle
+
+    def wait_until(self, time_ns: int) -> None:
+        """
+        Blocks until the scheduler has reached a point in time (of its clock; e.g. shortly before the end of the submitted motions).
+        Returns early as soon as no motion is running anymore.
+
+        :param time_ns: The point in time in ns.
+        """
+        if self.synchronous:
+            self.run_until(lambda: self.ticker.clock.now_ns() >= time_ns)
+            return
+
+        event: Event = Event()
+        with self._timer_lock:
+            if time_ns <= self.ticker.clock.now_ns():
+                return
+            heappush(self._timers, (time_ns, id(event), event))
+
+        self._ensure_running()
+        self._queue.put(None)  # Wake up the thread if it is idle
+        event.wait()
+
+    def wait_idle(self) -> None:
+        """Blocks until no motion is running anymore and all frames are written."""
+        if self.synchronous:
+            self.run_until(lambda: False)
+            return
+
+        while self._motions or self._backends or not self._queue.empty():
+            self.wait_until(self.ticker.clock.now_ns() + self.ticker.period_ns)
+
+    @property
+    def synchronous(self) -> bool:
+        """
+        True if the scheduler runs on a virtual clock. Then it has no thread; Every thread which waits for it (MotionHandle.wait, wait_until, wait_idle)
+        runs the ticks itself until its wait is over. The virtual time only advances while somebody waits for it, so it doesn't matter
+        how long the producers need between two waits; A simulation gives the same ticks and writes on every run.
+        """
+        return isinstance(self.ticker.clock, VirtualClock)
+
+    def run_until(self, done: Callable[[], bool]) -> None:
+        """Runs ticks in the calling thread until done returns True or no motion is running anymore (synchronous scheduler only)."""
+        with self._step_lock:
+            while not done():
+                if not self._step(block=False):
+                    return
+
+    def _fire_timers(self, now: Optional[int]) -> None:
+        """Releases all wait_until calls which are due (all if 'now' is None)."""
+        with self._timer_lock:
+            while self._timers and (now is None or self._timers[0][0] <= now):
+                heappop(self._timers)[2].set()
+
+    def add_idle_callback(self, callback: Callable[[], None]) -> None:
+        """Registers a function which is called (in the scheduler thread) every time the last running motion has ended and all frames are written."""
+        self._idle_callbacks.append(callback)
+
+    def _notify_idle(self) -> None:
+        if self._idle:
+            return
+
+        self._idle = True
+        for callback in self._idle_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                dprint(f"{config.color_yellow}[ WARNING ] Idle callback of the motion scheduler failed. Error: {e}{config.color_reset}")
+
+    @contextmanager
+    def atomic(self) -> Iterator[None]:
+        """All motions submitted inside of this context are started in the same tick (and therefore written in the same frame)."""
+        with self._submit_lock:
+            yield
+
+    def _ensure_running(self) -> None:
+        """Starts the scheduler thread on first use (not on a virtual clock; see synchronous)."""
+        if self._thread and self._thread.is_alive() or self.synchronous:
+            return
+
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            self._thread = Thread(target=self._run, name="MotionScheduler", daemon=True)
+            self._thread.start()
+            dprint(f"Started motion scheduler with {self.tick_rate:.0f} Hz")
+
+    def _activate(self, motion: _Motion, now: int) -> None:
+        """Makes a queued motion the active motion of its channel."""
+        replaced: Optional[_Motion] = self._motions.get(motion.handle.channel)
+        if replaced:
+            replaced.handle._finish(cancelled=True)
+
+        if replaced and motion.blend:
+            motion.start_angle = replaced.angle
+            motion.start_velocity = replaced.velocity
+            self.preemption_latency.record(max(0, self.ticker.clock.now_ns() - motion.submitted_ns))
+        else:
+            motion.start_angle = motion.wrapper.angle
+
+        motion.angle = motion.start_angle
+        motion.velocity = motion.start_velocity or 0.0
+        motion.start_time = motion.last_tick = now
+        self._motions[motion.handle.channel] = motion
+        self._idle = False
+
+    def _advance(self, motion: _Motion, now: int) -> bool:
+        """Stages the interpolated angle of a motion in the backend. Returns True if the motion is finished."""
+        if motion.handle._cancel_requested or any(event.is_set() for event in motion.stop_events):
+            motion.handle._finish(cancelled=True)
+            return True
+
+        elapsed: float = (now - motion.start_time) / 1e9
+        last: int = len(motion.times) - 1
+
+        # Move on to the keyframe the elapsed time belongs to
+        while motion.segment < last and elapsed >= motion.times[motion.segment]:
+            motion.start_angle = motion.targets[motion.segment]
+            motion.segment += 1
+
+        segment_start: float = motion.times[motion.segment - 1] if motion.segment else 0.0
+        segment_duration: float = motion.times[motion.segment] - segment_start
+        finished: bool = elapsed >= motion.times[last]
+
+        target: int = motion.targets[motion.segment]
+        if finished or segment_duration <= 0:
+            angle: float = target
+        elif motion.segment == 0 and motion.start_velocity is not None:
+            angle = self._blend(motion, elapsed / segment_duration, segment_duration)
+        else:
+            position: float = motion.profile[int((elapsed - segment_start) / segment_duration * motion.profile_last + 0.5)]  # Share of the distance of the current segment covered
+            angle = motion.start_angle + position * (target - motion.start_angle)
+
+        # Remember the speed, so a motion replacing this one can continue from it
+        if now > motion.last_tick:
+            motion.velocity = (angle - motion.angle) / ((now - motion.last_tick) / 1e9)
+        motion.angle, motion.last_tick = angle, now
+
+        new_angle: int = max(motion.min_angle, min(motion.max_angle, round(angle)))
+        motion.wrapper.stage(new_angle)  # Unchanged angles are dropped by the shadow registers of the backend
+        self._backends.add(motion.wrapper.backend)
+
+        if finished:
+            motion.handle._finish()
+            return True
+        return False
+
+    @staticmethod
+    def _blend(motion: _Motion, s: float, segment_duration: float) -> float:
+        """Cubic Hermite curve from the angle and speed of the replaced motion to the first target (arriving with the speed towards the second target)."""
+        end_velocity: float = (motion.targets[1] - motion.targets[0]) / (motion.times[1] - motion.times[0]) if len(motion.targets) > 1 and motion.times[1] > motion.times[0] else 0.0
+        s2, s3 = s * s, s * s * s
+        return (
+            (2 * s3 - 3 * s2 + 1) * motion.start_angle
+            + (s3 - 2 * s2 + s) * segment_duration * (motion.start_velocity or 0.0)
+            + (-2 * s3 + 3 * s2) * motion.targets[0]
+            + (s3 - s2) * segment_duration * end_velocity
+        )
+
+    def _run(self) -> None:
+        while True:
+            self._step(block=True)
+
+    def _step(self, block: bool) -> bool:
+        """
+        Runs one tick of the control loop.
+
+        :param block: Wait for the next motion if nothing is running. Otherwise return at once.
+        :return (bool): False if nothing was running and no motion was queued (only without block).
+        """
+        # Block while there is nothing to do; The deadlines restart with the first new motion
+        if not self._motions and not self._backends:
+            self._fire_timers(now=None)  # Nothing moves anymore, so there is nothing to wait for
+            self._notify_idle()
+            try:            queued: Optional[_Motion] = self._queue.get() if block else self._queue.get_nowait()
+            except Empty:   return False
+            if queued is None:
+                return True
+
+            now: int = self.ticker.reset()
+            with self._submit_lock:
+                self._activate(queued, now)
+        else:
+            now = self.ticker.wait()
+
+        # Take over all newly submitted motions
+        with self._submit_lock:
+            while True:
+                try:               queued = self._queue.get_nowait()
+                except Empty:      break
+                if queued is not None:
+                    self._activate(queued, now)
+
+        for channel, motion in list(self._motions.items()):
+            try:
+                finished: bool = self._advance(motion, now)
+            except Exception as e:
+                dprint(f"{config.color_red}Motion of channel {channel} failed: {e}{config.color_reset}")
+                motion.handle._finish(cancelled=True)
+                finished = True
+
+            if finished:
+                del self._motions[channel]
+
+        # Write all updates of this tick at once; Backends which are over their budget keep the rest for the next tick
+        for backend in list(self._backends):
+            try:
+                if not backend.flush():
+                    self._backends.discard(backend)
+            except Exception as e:
+                dprint(f"{config.color_red}Failed to write frame: {e}{config.color_reset}")
+                self._backends.discard(backend)
+
+        self._fire_timers(now=now)
+        return True
+
+# The scheduler which owns all servos
+motion_scheduler: MotionScheduler = MotionScheduler()
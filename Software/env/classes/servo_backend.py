@@ -0,0 +1,264 @@
+import time
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Optional
+
+# Classes
+from env.classes.pca9685 import PCA9685, BusioI2C
+from env.classes.clock import Clock, get_clock
+
+# Decorators
+from env.decr.decorators import cached
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+class FrameStats:
+    """Timing of the frames (all channel updates of one scheduler tick) written by a backend."""
+    __slots__: tuple[str, ...] = ("frames", "last_write_ns", "max_write_ns", "total_write_ns", "last_skew_ns", "max_skew_ns")
+
+    def __init__(self) -> None:
+        self.frames: int = 0
+        self.last_write_ns: int = 0   # Time the last frame needed to be written
+        self.max_write_ns: int = 0
+        self.total_write_ns: int = 0
+        self.last_skew_ns: int = 0    # Spread of the last frame on the bus: first to last channel write (per channel writes) or transfer start to stop condition (block write)
+        self.max_skew_ns: int = 0
+
+    def record(self, write_ns: int, skew_ns: int) -> None:
+        self.frames += 1
+        self.last_write_ns, self.last_skew_ns = write_ns, skew_ns
+        self.max_write_ns = max(self.max_write_ns, write_ns)
+        self.max_skew_ns = max(self.max_skew_ns, skew_ns)
+        self.total_write_ns += write_ns
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "frames":        self.frames,
+            "last_write_ms": self.last_write_ns / 1e6,
+            "mean_write_ms": self.total_write_ns / self.frames / 1e6 if self.frames else 0.0,
+            "max_write_ms":  self.max_write_ns / 1e6,
+            "last_skew_ms":  self.last_skew_ns / 1e6,
+            "max_skew_ms":   self.max_skew_ns / 1e6,
+        }
+
+class ShadowRegisters:
+    """
+    Copy of the angles last written to each channel and of the angles staged for the next frame.<br>
+    Staging the written angle again is skipped, staging a channel twice before a flush only keeps the last angle.
+
+    :param channel_count (int): Amount of channels of the controller.
+    """
+    def __init__(self, channel_count: int = config.servo_channel_count) -> None:
+        self.written: list[Optional[int]] = [None] * channel_count  # Angle last written to each channel (None if unknown)
+        self.pending: dict[int, int] = {}                          # channel -> angle staged for the next frame; Deferred channels keep their position, so they are written first
+
+        # Statistics
+        self.writes: int = 0    # Channel updates written to the bus
+        self.skipped: int = 0   # Updates dropped because the channel already had the angle
+        self.merged: int = 0    # Updates replaced by a later update of the same channel before they were written
+        self.deferred: int = 0  # Times a channel had to wait for the next frame because of the bandwidth budget
+        self.bytes: int = 0     # Bytes written to the bus
+
+    def stage(self, channel: int, angle: int) -> None:
+        if channel in self.pending:
+            self.merged += 1
+            if angle == self.written[channel]:  # Back to the written angle; Nothing to do anymore
+                del self.pending[channel]
+                return
+        elif angle == self.written[channel]:
+            self.skipped += 1
+            return
+
+        self.pending[channel] = angle
+
+    def stats(self) -> dict[str, float]:
+        updates: int = self.writes + self.skipped + self.merged
+        return {
+            "writes":     self.writes,
+            "skipped":    self.skipped,
+            "merged":     self.merged,
+            "deferred":   self.deferred,
+            "bytes":      self.bytes,
+            "skip_rate":  (self.skipped + self.merged) / updates if updates else 0.0,
+        }
+
+class ServoBackend(ABC):
+    """
+    Interface of the hardware which receives the servo angles.<br>
+    Angles are staged in shadow registers and written with flush (once per scheduler tick). Each flush writes at most 'budget' bytes.
+
+    :param budget (Optional[int]): Maximum amount of bytes per flush. Defaults to the share config.i2c_bus_budget of the bus time of one scheduler tick.
+    """
+    def __init__(self, budget: Optional[int] = None) -> None:
+        self.frame_stats: FrameStats = FrameStats()
+        self.shadow: ShadowRegisters = ShadowRegisters()
+        self.budget: int = budget if budget is not None else int(config.i2c_bus_speed_hz / 9 / config.control_tick_rate * config.i2c_bus_budget)  # 9 clocks per byte
+        self._shadow_lock: Lock = Lock()
+        self.assumed_angles: dict[int, int] = {}  # Angles the channels are known to be at without reading them (e.g. from the saved servo state)
+
+    @abstractmethod
+    def read(self, channel: int) -> Optional[int]:
+        """Returns the current angle of a channel (None if unknown)."""
+
+    def initial_angle(self, channel: int) -> Optional[int]:
+        """Returns the assumed angle of a channel if there is one; Reads it otherwise."""
+        if channel in self.assumed_angles:
+            return self.assumed_angles[channel]
+        return self.read(channel)
+
+    @abstractmethod
+    def frame_bytes(self, channels: list[int]) -> int:
+        """Returns the amount of bytes a frame with these channels puts on the bus."""
+
+    @abstractmethod
+    def _write_frame(self, angles: dict[int, int]) -> list[int]:
+        """
+        Writes the angles and returns the perf_counter_ns timestamps which bound the frame on the bus; The skew of the frame is the spread of them
+        (e.g. one timestamp per channel write, or the start and the stop condition of a single transaction).
+        """
+
+    def stage(self, channel: int, angle: int) -> None:
+        """Stages the angle of a channel for the next flush. Unchanged angles are dropped."""
+        with self._shadow_lock:
+            self.shadow.stage(channel, angle)
+
+    def flush(self) -> bool:
+        """
+        Writes the staged angles as one frame. Channels which don't fit into the budget stay staged for the next flush
+        (at least one channel is always written).
+
+        :return (bool): True if there are still staged angles.
+        """
+        with self._shadow_lock:
+            if not self.shadow.pending:
+                return False
+
+            channels: list[int] = []
+            for channel in self.shadow.pending:
+                if channels and self.frame_bytes(channels + [channel]) > self.budget:
+                    continue
+                channels.append(channel)
+
+            frame: dict[int, int] = {channel: self.shadow.pending.pop(channel) for channel in channels}
+            self.shadow.deferred += len(self.shadow.pending)
+            still_pending: bool = bool(self.shadow.pending)  # The frame isn't staged anymore; Channels staged while it is written are picked up by the next flush
+
+        self.write_frame(frame)
+        return still_pending
+
+    def write_frame(self, angles: dict[int, int]) -> None:
+        """Writes the angles of multiple channels (channel -> angle) as one frame and records its timing."""
+        if not angles:
+            return
+
+        start_ns: int = time.perf_counter_ns()
+        committed_ns: list[int] = self._write_frame(angles)
+        self.frame_stats.record(write_ns=time.perf_counter_ns() - start_ns, skew_ns=max(committed_ns) - min(committed_ns))
+
+        with self._shadow_lock:
+            for channel, angle in angles.items():
+                self.shadow.written[channel] = angle
+                self.shadow.pending.pop(channel, None)
+            self.shadow.writes += len(angles)
+            self.shadow.bytes += self.frame_bytes(list(angles))
+
+    def write(self, channel: int, angle: int) -> None:
+        """Writes the angle of a channel immediately (even if it is unchanged)."""
+        self.write_frame({channel: angle})
+
+    def bus_stats(self) -> dict[str, float]:
+        """Returns the write, skip, merge and deferral counters of the shadow registers."""
+        with self._shadow_lock:
+            return self.shadow.stats() | {"budget": self.budget}
+
+class ServoKitBackend(ServoBackend):
+    """Writes every channel on its own through adafruit_servokit (one I2C transaction per channel)."""
+    def __init__(self) -> None:
+        super().__init__()
+        from adafruit_servokit import ServoKit  # type:ignore[import-untyped, import-not-found]
+        self.servo_kit: ServoKit = ServoKit(channels=config.servo_channel_count)
+
+    def read(self, channel: int) -> Optional[int]:
+        angle: Optional[float] = self.servo_kit.servo[channel].angle
+        return int(angle) if angle is not None else None
+
+    def frame_bytes(self, channels: list[int]) -> int:
+        return 6 * len(channels)  # Address, register and 4 bytes per channel
+
+    def _write_frame(self, angles: dict[int, int]) -> list[int]:
+        committed_ns: list[int] = []
+        for channel, angle in angles.items():
+            self.servo_kit.servo[channel].angle = angle
+            committed_ns.append(time.perf_counter_ns())
+        return committed_ns
+
+class PCA9685Backend(ServoBackend):
+    """Writes all channels of a frame with a single auto-increment block write, so they start moving at the same time."""
+    def __init__(self, pca9685: Optional[PCA9685] = None) -> None:
+        super().__init__()
+        self.pca9685: PCA9685 = pca9685 or PCA9685(bus=BusioI2C())
+
+    def read(self, channel: int) -> Optional[int]:
+        return self.pca9685.read_angle(channel)
+
+    def frame_bytes(self, channels: list[int]) -> int:
+        return 2 + 4 * (max(channels) - min(channels) + 1)  # Address, register and 4 bytes per channel of the block
+
+    def _write_frame(self, angles: dict[int, int]) -> list[int]:
+        start_ns: int = time.perf_counter_ns()
+        self.pca9685.write_frame(angles)
+        stop_ns: int = time.perf_counter_ns()  # The PCA9685 latches all outputs at the stop condition, so the spread is the transfer time of the block
+        return [start_ns, stop_ns]
+
+class SimulatedBackend(ServoBackend):
+    """
+    Backend without hardware. Records every channel write with the time of the (virtual) clock of the control loop,
+    so movements can be run and measured on any machine.
+
+    :param clock (Optional[Clock]): Clock of the write timestamps. Defaults to get_clock().
+    :param initial_angles (Optional[dict[int, int]]): Angles the channels start at (channel -> angle). Unset channels are unknown (None).
+    """
+    def __init__(self, clock: Optional[Clock] = None, initial_angles: Optional[dict[int, int]] = None) -> None:
+        super().__init__()
+        self.clock: Clock = clock or get_clock()
+        self.angles: list[Optional[int]] = [None] * config.servo_channel_count
+        self.writes: list[tuple[int, int, int]] = []  # (clock ns, channel, angle)
+
+        for channel, angle in (initial_angles or {}).items():
+            self.angles[channel] = angle
+
+    def read(self, channel: int) -> Optional[int]:
+        return self.angles[channel]
+
+    def frame_bytes(self, channels: list[int]) -> int:
+        return 6 * len(channels)  # Same as ServoKitBackend
+
+    def _write_frame(self, angles: dict[int, int]) -> list[int]:
+        now_ns: int = self.clock.now_ns()
+        for channel, angle in angles.items():
+            self.angles[channel] = angle
+            self.writes.append((now_ns, channel, angle))
+        return [now_ns]  # All channels are written at the same (virtual) time; No bus, so the skew is 0
+
+    def trace(self, channel: int) -> list[tuple[float, int]]:
+        """Returns all writes of a channel as (seconds since the first write, angle)."""
+        start_ns: int = self.writes[0][0] if self.writes else 0
+        return [((time_ns - start_ns) / 1e9, angle) for time_ns, written_channel, angle in self.writes if written_channel == channel]
+
+    def clear(self) -> None:
+        """Removes all recorded writes."""
+        self.writes.clear()
+
+@cached
+def get_servo_backend() -> ServoBackend:
+    """Returns the servo backend selected with config.servo_output (created on first use)."""
+    dprint(f"Initializing servo backend '{config.servo_output}'...")
+    if config.servo_output == "pca9685":
+        return PCA9685Backend()
+    if config.servo_output == "simulated":
+        return SimulatedBackend()
+    return ServoKitBackend()
@@ -1,20 +1,24 @@
 import time
-from threading import Thread, Lock
-from adafruit_servokit import ServoKit, Servo  # type:ignore[import-untyped, import-not-found]
-from typing import Optional
-import board  # type:ignore[import-untyped, import-not-found]
-import busio  # type:ignore[import-untyped, import-not-found]
+import atexit
+from typing import Optional, Sequence
+from numpy import asarray, flatnonzero
+from numpy.typing import NDArray
 
 # Decorators
-from env.decr.decorators import validate_types
+from env.decr.decorators import validate_types, cached
 
 # Func
 from env.func.DEBUG import dprint
-from env.func.leg_helper import initialize_servos, adjust_angle, adjust_min_max_angles
+from env.func.leg_helper import initialize_servos, adjust_angle, adjust_angles, adjust_min_max_angles
+from env.func.motion_profiles import MOTION_PROFILES
+from env.func.servo_state import get_used_channels, load_servo_state, save_servo_state, install_sigterm_handler
 
 # Classes
 from env.classes.events import StopEvent
 from env.classes.Classes import ServoWrapper
+from env.classes.scheduler import motion_scheduler, MotionHandle
+from env.classes.servo_backend import ServoBackend, get_servo_backend
+from env.classes.clock import get_clock
 
 # Config
 from env.config import config
@@ -22,18 +26,39 @@ from env.config import config
 # Errors
 from env.err.Errors import NoThreadError
 
-# Initialize servo kit
-try:
-    servo_kit: ServoKit = ServoKit(channels=config.servo_channel_count)
-    initialize_servos(servo_kit=servo_kit)  # Safe initialization of servos
-except Exception as e:
-    dprint(f"Failed to initialize ServoKit. Skipping... Error: {e}")
+@cached
+def get_initialized_backend() -> ServoBackend:
+    """
+    Creates the servo backend on first use (not at import, so the servo output can still be configured) and initializes the servos once.<br>
+    With config.fast_boot only the used channels are initialized; If there is a saved servo state, the servos aren't probed at all.
+    """
+    start: float = time.perf_counter()
+    servo_backend: ServoBackend = get_servo_backend()
+
+    if config.fast_boot:
+        servo_backend.assumed_angles = load_servo_state(consume=True)  # Consumed, so a crash before the next save falls back to probing
+
+        # Start from the same angles next time: Save whenever the servos stop, on exit and on SIGTERM
+        motion_scheduler.add_idle_callback(lambda: save_servo_state(servo_backend))
+        atexit.register(save_servo_state, servo_backend)
+        install_sigterm_handler()
+
+    try:
+        if not config.fast_boot:
+            initialize_servos(servo_backend=servo_backend)  # Safe initialization of servos
+        elif not servo_backend.assumed_angles:
+            initialize_servos(servo_backend=servo_backend, channels=get_used_channels())
+    except Exception as e:
+        dprint(f"Failed to initialize servos. Skipping... Error: {e}")
+
+    dprint(f"Initialized servo backend in {time.perf_counter() - start:.3f} seconds (fast_boot={config.fast_boot}, saved angles={len(servo_backend.assumed_angles)})")
+    return servo_backend
 
 class SServo:
     """
     Manages a single servo's movement and state.
 
-    :param servo_channel (int): The channel number of the servo on the ServoKit.
+    :param servo_channel (int): The channel number of the servo on the servo controller.
     :param min_angle (int): Minimum allowable angle for the servo.
     :param max_angle (int): Maximum allowable angle for the servo.
     :param deviation (int): Offset to apply to the servo's normal position.
@@ -55,36 +80,38 @@ class SServo:
             raise ValueError(f"Servo channel must be between or equal to 0 and {config.servo_channel_count - 1}!")
         elif not servo_type in ["thigh", "lower_leg", "side_axis"]:  raise ValueError(f"Servo type must be one of the following: 'thigh', 'lower_leg', 'side_axis'!")
 
-        # Initialize threading
-        self.lock: Lock = Lock()
+        # Initialize stop event
         self._master_stop_event: StopEvent = stop_event
-        self._internal_stop_event: StopEvent = StopEvent()
 
         # Initialize servo
-        self.servo: Servo =                   servo_kit.servo[servo_channel]
-        self.servo_wrapper: ServoWrapper =    ServoWrapper(servo=self.servo)  # Create a ServoWrapper instance to fix the bug that servo.angle is None sometimes (hardware issue); We call it "Pfusch"
+        self.servo_wrapper: ServoWrapper =    ServoWrapper(backend=get_initialized_backend(), channel=servo_channel)  # Create a ServoWrapper instance to fix the bug that servo.angle is None sometimes (hardware issue); We call it "Pfusch"
         self.servo_channel: int =             servo_channel
         self.deviation: int =                 deviation
         self.min_angle, self.max_angle =      adjust_min_max_angles(is_mirrored=mirrored, min_angle=min_angle, max_angle=max_angle, deviation=deviation)
         self.adjusted_normal_position: int =  config.servo_normal_position + deviation
         self.calculation_angle: float =       self.adjusted_normal_position
         self.mirrored: bool =                 mirrored
-        self.servo_thread: Optional[Thread] = None
+        self.pending_motion: Optional[tuple[list[int], list[float], str, bool]] = None  # (adjusted targets, times, profile, blend) until start() is called
+        self.motion: Optional[MotionHandle] = None                # Running motion of the scheduler
         self.leg: str =                       leg
         self.servo_type: str =                servo_type
         self.start_time: Optional[float] =    None
 
     @validate_types
-    def set_angle(self, target_angle: int, duration: float, nm_action: bool = False) -> None:
+    def set_angle(self, target_angle: int, duration: float, nm_action: bool = False, profile: str = config.servo_motion_profile) -> None:
         """
         Moves the servo to a target angle over a specified duration.
 
         :param target_angle (int): The target angle to start the servo to.
         :param duration (float): Time in seconds to complete the movement.
         :param nm_action (bool): Flag indicating if this is a 'start to normal' action with fixed steps.
-        :raises ValueError: If the target angle is outside the valid range.
+        :param profile (str): Speed curve of the movement ('linear', 'trapezoid' or 'minimum-jerk').
+        :raises ValueError: If the target angle is outside the valid range or the profile is unknown.
         """
-        # Interrupt running threads
+        if not profile in MOTION_PROFILES:
+            raise ValueError(f"Motion profile must be one of the following: {', '.join(MOTION_PROFILES)}; got '{profile}'!")
+
+        # Interrupt running motions
         self.interrupt()
 
         # Adjust target angle for mirroring and deviation
@@ -94,89 +121,92 @@ class SServo:
         if not (self.min_angle <= adjusted_target <= self.max_angle):
             raise ValueError(f"Servo ({self.leg}:{self.servo_type}) (mirrored={self.mirrored}): Adjusted target angle {adjusted_target} is out of range [{self.min_angle} - {self.max_angle}]")
 
-        # Determine current angle
-        current_angle = self.servo_wrapper.angle if self.servo_wrapper.angle is not None else self.adjusted_normal_position
-
         # Debug logging
-        dprint(f"Leg: {self.leg}, Servo: {self.servo_type}, Target: {target_angle}, Adjusted Target: {adjusted_target}, Current Angle: {current_angle}")
-
-        def move_to_target() -> None:
-            nonlocal current_angle
-
-            if current_angle == adjusted_target:
-                for _ in range(100):
-                    if self._master_stop_event.is_set() or self._internal_stop_event.is_set():
-                        return  # Skip if interrupted
-                    time.sleep(duration / 100)
-                return
-
-            with self.lock:
-                if duration == 0:
-                    self.servo_wrapper.angle = adjusted_target
-                    return
-
-                # Time-based loop for smooth and interruptable motion
-                start_time = time.time()
-                end_time = start_time + duration
-                initial_angle = current_angle
-                angle_diff = adjusted_target - initial_angle
-
-                while time.time() < end_time:
-                    if self._master_stop_event.is_set() or self._internal_stop_event.is_set():
-                        return
-
-                    elapsed = time.time() - start_time
-                    t = min(elapsed / duration, 1.0)  # Percentage of completion
-                    new_angle = initial_angle + t * angle_diff
-                    clamped_angle = max(self.min_angle, min(self.max_angle, round(new_angle)))
-                    self.servo_wrapper.angle = clamped_angle
-                    time.sleep(0.01)  # You can tune this for smoothness vs CPU load
-
-                # Final adjustment to guarantee target
-                self.servo_wrapper.angle = adjusted_target
-
-        # Create the new movement thread
-        self.start_time = time.time()
-        self.servo_thread = Thread(target=move_to_target, daemon=True)
-        dprint(f"Created servo thread for leg {self.leg} and servo {self.servo_type}")
+        dprint(f"Leg: {self.leg}, Servo: {self.servo_type}, Target: {target_angle}, Adjusted Target: {adjusted_target}, Current Angle: {self.servo_wrapper.angle}")
+
+        # The motion is submitted to the scheduler on start()
+        self.pending_motion = ([adjusted_target], [duration], profile, False)
+
+    def set_trajectory(self, target_angles: Sequence[int], times: Sequence[float], profile: str = config.servo_motion_profile, preempt: bool = False) -> None:
+        """
+        Moves the servo through multiple target angles without stopping in between.
+
+        :param target_angles (Sequence[int]): The target angles (not adjusted).
+        :param times (Sequence[float]): Seconds after start() at which each target angle is reached (increasing).
+        :param profile (str): Speed curve between two target angles ('linear', 'trapezoid' or 'minimum-jerk').
+        :param preempt (bool): Don't interrupt the running motion; start() replaces it at the next tick and blends from its current angle and speed.
+        :raises ValueError: If a target angle is outside the valid range, the times are invalid or the profile is unknown.
+        """
+        if not profile in MOTION_PROFILES:
+            raise ValueError(f"Motion profile must be one of the following: {', '.join(MOTION_PROFILES)}; got '{profile}'!")
+        if not target_angles or len(target_angles) != len(times):
+            raise ValueError(f"Servo ({self.leg}:{self.servo_type}): A trajectory needs the same amount (> 0) of target angles and times; got {len(target_angles)} and {len(times)}.")
+
+        # Interrupt running motions
+        if not preempt:
+            self.interrupt()
+
+        # Adjust and validate all target angles before anything is moved
+        adjusted: NDArray = adjust_angles(is_mirrored=self.mirrored, angles=asarray(target_angles).astype(int), deviation=self.deviation)
+        if len(invalid := flatnonzero((adjusted < self.min_angle) | (adjusted > self.max_angle))):
+            idx: int = int(invalid[0])
+            raise ValueError(f"Servo ({self.leg}:{self.servo_type}) (mirrored={self.mirrored}): Adjusted target angle {adjusted[idx]} of point {idx} is out of range [{self.min_angle} - {self.max_angle}]")
+        adjusted_targets: list[int] = adjusted.tolist()
+
+        dprint(f"Leg: {self.leg}, Servo: {self.servo_type}, Trajectory of {len(adjusted_targets)} point(s) over {times[-1]:.2f} seconds, Current Angle: {self.servo_wrapper.angle}")
+
+        # The motion is submitted to the scheduler on start()
+        self.pending_motion = (adjusted_targets, [float(t) for t in times], profile, preempt)
 
     def start(self) -> None:
         """Starts the servo movement."""
-        if not self.servo_thread:
-            raise NoThreadError(f"There was no thread to set_angle servos (leg={self.leg}, servo_type={self.servo_type}) with servo channel '{self.servo_channel}'!")
-
-        self.servo_thread.start()
+        if not self.pending_motion:
+            raise NoThreadError(f"There was no motion to start for servo (leg={self.leg}, servo_type={self.servo_type}) with servo channel '{self.servo_channel}'!")
+
+        adjusted_targets, times, profile, blend = self.pending_motion
+        self.pending_motion = None
+        self.start_time = get_clock().now_ns() / 1e9
+        self.motion = motion_scheduler.submit_trajectory(
+            channel =     self.servo_channel,
+            wrapper =     self.servo_wrapper,
+            targets =     adjusted_targets,
+            times =       times,
+            min_angle =   self.min_angle,
+            max_angle =   self.max_angle,
+            stop_events = (self._master_stop_event,),
+            profile =     profile,
+            blend =       blend,
+        )
 
     def join(self) -> None:
-        """Joins the servo thread."""
-        # Check if there is an existing thread to join
-        if not self.servo_thread or not self.servo_thread.is_alive():
-            dprint(f"{config.color_yellow}[ WARNING ] There was no thread to join at servo ({self.leg = }, {self.servo_type = }) with servo channel '{self.servo_channel}'!{config.color_reset}")
-            self.servo_thread = None  # Clear servo thread
+        """Waits until the servo movement has finished."""
+        # Check if there is a motion to join
+        if not self.motion:
+            dprint(f"{config.color_yellow}[ WARNING ] There was no motion to join at servo ({self.leg = }, {self.servo_type = }) with servo channel '{self.servo_channel}'!{config.color_reset}")
             return
 
-        self.servo_thread.join()  # Wait for servo to finish its movement
-        self.servo_thread = None  # Clear servo thread
+        self.motion.wait()  # Wait for servo to finish its movement
+        self.motion = None
 
         if not self.start_time: 
             return  # No movement started
-        dprint(f"✅ Finished movement of servo ({self.leg}:{self.servo_type}) with servo channel '{self.servo_channel}' took {(time.time() - self.start_time):.2f} seconds")
+        dprint(f"✅ Finished movement of servo ({self.leg}:{self.servo_type}) with servo channel '{self.servo_channel}' took {(get_clock().now_ns() / 1e9 - self.start_time):.2f} seconds")
         self.start_time = None
 
     def clear_thread(self) -> None:
-        """Clears the servo thread."""
-        if self.servo_thread: self.servo_thread = None
+        """Clears the pending and the running motion."""
+        self.pending_motion = None
+        self.motion = None
 
     def interrupt(self) -> None:
         """Interrupts the servo movement if it is running."""
-        # Check if a thread exists to interrupt
-        if not self.servo_thread or not self.servo_thread.is_alive(): return
+        # Check if a motion exists to interrupt
+        if not self.motion or self.motion.done(): return
 
         dprint(f"Interrupting servo ({self.leg}:{self.servo_type}) with servo channel '{self.servo_channel}'")
 
-        self._internal_stop_event.set()
-        self.join()
-        self._internal_stop_event.reset()
+        self.motion.cancel()
+        self.motion.wait()
         self.clear_thread()
 
         dprint(f"Servo (leg={self.leg}, servo_type={self.servo_type}) has been interrupted!")
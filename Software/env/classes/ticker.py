@@ -0,0 +1,120 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Optional
+
+# Classes
+from env.classes.clock import Clock, get_clock
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+TICK_POLICIES: tuple[str, ...] = ("catch-up", "skip")
+
+class LatenessHistogram:
+    """
+    Histogram of how late the ticks of a control loop started compared to their deadline.
+
+    :param bounds_us (tuple[int, ...]): Upper bounds of the buckets in µs. Later ticks are counted in an overflow bucket.
+    """
+    def __init__(self, bounds_us: tuple[int, ...] = config.control_jitter_buckets_us) -> None:
+        self.bounds_ns: tuple[int, ...] = tuple(bound * 1000 for bound in bounds_us)
+        self._lock: Lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts: list[int] = [0] * (len(self.bounds_ns) + 1)
+            self.ticks: int = 0
+            self.skipped: int = 0  # Ticks dropped by the 'skip' policy
+            self.total_ns: int = 0
+            self.max_ns: int = 0
+
+    def record(self, lateness_ns: int, skipped: int = 0) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.bounds_ns, lateness_ns)] += 1
+            self.ticks += 1
+            self.skipped += skipped
+            self.total_ns += lateness_ns
+            self.max_ns = max(self.max_ns, lateness_ns)
+
+    def percentile(self, share: float) -> Optional[float]:
+        """Returns the upper bound (in ms) of the bucket containing the given share of all ticks (None if it is the overflow bucket)."""
+        with self._lock:
+            threshold: float = share * self.ticks
+            count: int = 0
+            for bound_ns, bucket in zip(self.bounds_ns, self.counts):
+                count += bucket
+                if count >= threshold:
+                    return bound_ns / 1e6
+            return None
+
+    def as_dict(self) -> dict[str, float]:
+        with self._lock:
+            labels: list[str] = [f"<= {bound_ns / 1e6:g} ms" for bound_ns in self.bounds_ns] + [f"> {self.bounds_ns[-1] / 1e6:g} ms"]
+            return {
+                "ticks":   self.ticks,
+                "skipped": self.skipped,
+                "mean_ms": self.total_ns / self.ticks / 1e6 if self.ticks else 0.0,
+                "max_ms":  self.max_ns / 1e6,
+            } | dict(zip(labels, self.counts))
+
+    def dump(self, title: str = "Control loop lateness") -> None:
+        """Writes the histogram to the log."""
+        stats: dict[str, float] = self.as_dict()
+        dprint(f"{title}: {stats['ticks']:.0f} ticks, {stats['skipped']:.0f} skipped, mean {stats['mean_ms']:.3f} ms, max {stats['max_ms']:.3f} ms")
+        for label, count in list(stats.items())[4:]:
+            share: float = count / stats["ticks"] if stats["ticks"] else 0.0
+            dprint(f"  {label:>12} {count:>8.0f} {'#' * round(share * 50)}")
+
+class DeadlineTicker:
+    """
+    Paces a control loop with absolute deadlines on the monotonic perf_counter clock, so the period neither drifts with the load of the loop nor with clock adjustments.<br>
+    If a tick is late by more than a period, the 'catch-up' policy runs the missed ticks back to back, the 'skip' policy drops them and continues with the next deadline in the future.
+
+    :param tick_rate (float): Ticks per second.
+    :param policy (str): 'catch-up' or 'skip'.
+    :param clock (Optional[Clock]): Clock to wait on. Defaults to get_clock() (resolved on first use, so the servo output can still be configured).
+    """
+    def __init__(self, tick_rate: float = config.control_tick_rate, policy: str = config.control_tick_policy, clock: Optional[Clock] = None) -> None:
+        if tick_rate <= 0:             raise ValueError(f"Tick rate must be greater than 0; got {tick_rate}.")
+        if not policy in TICK_POLICIES: raise ValueError(f"Tick policy must be one of the following: {', '.join(TICK_POLICIES)}; got '{policy}'!")
+
+        self.period_ns: int = round(1e9 / tick_rate)
+        self.policy: str = policy
+        self.histogram: LatenessHistogram = LatenessHistogram()
+        self._deadline_ns: int = 0
+        self._clock: Optional[Clock] = clock
+
+    @property
+    def clock(self) -> Clock:
+        if self._clock is None:
+            self._clock = get_clock()
+        return self._clock
+
+    def reset(self) -> int:
+        """Restarts the deadlines from now (e.g. after the loop was idle). Returns the current time in ns."""
+        now_ns: int = self.clock.now_ns()
+        self._deadline_ns = now_ns + self.period_ns
+        return now_ns
+
+    def wait(self) -> int:
+        """Sleeps until the next deadline and records how late it woke up. Returns the current time in ns."""
+        remaining_ns: int = self._deadline_ns - self.clock.now_ns()
+        if remaining_ns > 0:
+            self.clock.sleep(remaining_ns / 1e9)
+
+        now_ns: int = self.clock.now_ns()
+        lateness_ns: int = max(0, now_ns - self._deadline_ns)
+
+        missed: int = lateness_ns // self.period_ns
+        if self.policy == "skip" and missed:
+            self._deadline_ns += (missed + 1) * self.period_ns
+            self.histogram.record(lateness_ns, skipped=missed)
+        else:
+            self._deadline_ns += self.period_ns
+            self.histogram.record(lateness_ns)
+
+        return now_ns
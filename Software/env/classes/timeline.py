@@ -0,0 +1,243 @@
+import os
+import json
+from math import ceil
+from threading import Lock, Thread
+from typing import Callable, Optional, Sequence
+from numpy import arange, asarray, clip, diff, errstate, full, isnan, load, ones, savez, searchsorted, sign, where, zeros_like, abs as np_abs, nan, float64, intp
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.servos import SServo
+from env.classes.scheduler import motion_scheduler
+from env.classes.ik_lut import geometry_fingerprint
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+class JointTimeline:
+    """
+    Movement rendered into joint space: the target angle of every servo at every scheduler tick.<br>
+    NaN marks ticks before the first keyframe of a servo; Playback moves the servo from its current angle to its first keyframe.
+
+    :param times (NDArray[float64]): Seconds after the start of each row (increasing).
+    :param angles (NDArray[float64]): Array of shape (len(times), servos) with the (not adjusted) angle of each servo.
+    """
+    def __init__(self, times: NDArray[float64], angles: NDArray[float64]) -> None:
+        if angles.ndim != 2 or len(times) != len(angles) or len(times) == 0:
+            raise ValueError(f"Angles must have the shape (ticks, servos) with one row per time; got {angles.shape} for {len(times)} time(s).")
+
+        self.times: NDArray[float64] = asarray(times, dtype=float64)
+        self.angles: NDArray[float64] = asarray(angles, dtype=float64)
+
+    @classmethod
+    def render(cls, tracks: Sequence[tuple[Sequence[float], Sequence[float]]], tick_rate: float = config.control_tick_rate) -> "JointTimeline":
+        """
+        Renders the keyframes of each servo onto the tick grid of the scheduler (linear between two keyframes, like the 'linear' motion profile).<br>
+        Each servo is resampled on its own (see resample); Servos which end earlier hold their last keyframe.
+
+        :param tracks: (times, angles) keyframes of each servo.
+        :param tick_rate: Ticks per second.
+        """
+        ticks: NDArray[float64] = _tick_grid(max(times[-1] for times, _ in tracks), tick_rate)
+        angles: NDArray[float64] = full((len(ticks), len(tracks)), nan)
+
+        for idx, (times, track_angles) in enumerate(tracks):
+            track: NDArray[float64] = cls.resample(times=times, keyframes=asarray(track_angles, dtype=float64)[:, None], tick_rate=tick_rate).angles[:, 0]
+            angles[:len(track), idx] = track
+            angles[len(track):, idx] = track[-1]
+
+        return cls(times=ticks, angles=angles)
+
+    @classmethod
+    def resample(cls, times: Sequence[float], keyframes: NDArray[float64], tick_rate: float = config.control_tick_rate, interpolation: str = "linear") -> "JointTimeline":
+        """
+        Resamples keyframes shared by all servos onto the tick grid of the scheduler (all servos in one vectorized pass).<br>
+        'cubic' uses monotone cubic Hermite splines (PCHIP): The servos don't stop at every keyframe, but never overshoot the keyframes,
+        so angles validated at the keyframes stay valid, and equal keyframes stay an idle interval.
+
+        :param times: Seconds after the start of each keyframe (increasing).
+        :param keyframes: Array of shape (len(times), servos) with the angle of each servo at each keyframe.
+        :param tick_rate: Ticks per second.
+        :param interpolation: 'linear' or 'cubic'.
+        :raises ValueError: If the interpolation is unknown or the times aren't increasing.
+        """
+        if interpolation not in ("linear", "cubic"):
+            raise ValueError(f"Interpolation must be 'linear' or 'cubic'; got '{interpolation}'.")
+
+        x: NDArray[float64] = asarray(times, dtype=float64)
+        y: NDArray[float64] = asarray(keyframes, dtype=float64).reshape(len(x), -1)
+        if len(x) > 1 and (diff(x) <= 0).any():
+            raise ValueError("Keyframe times must be increasing.")
+
+        ticks: NDArray[float64] = _tick_grid(x[-1], tick_rate)
+        angles: NDArray[float64] = full((len(ticks), y.shape[1]), nan)
+        active = ticks >= x[0] - 0.5 / tick_rate  # The first keyframe is moved to the nearest tick
+        t: NDArray[float64] = clip(ticks[active], x[0], x[-1])
+
+        if len(x) == 1:
+            angles[active] = y[0]
+            return cls(times=ticks, angles=angles.round())
+
+        # Polynomial coefficients of each segment (constant term first)
+        h: NDArray[float64] = diff(x)[:, None]
+        delta: NDArray[float64] = diff(y, axis=0) / h
+        coefficients: tuple[NDArray[float64], ...]
+        if interpolation == "linear":
+            coefficients = (y[:-1], delta)
+        else:
+            d: NDArray[float64] = _pchip_slopes(h[:, 0], delta)
+            coefficients = (y[:-1], d[:-1], (3 * delta - 2 * d[:-1] - d[1:]) / h, (d[:-1] + d[1:] - 2 * delta) / h**2)
+
+        # Evaluate the segment of each tick (Horner)
+        idx: NDArray[intp] = clip(searchsorted(x, t, side="right") - 1, 0, len(x) - 2)
+        dt: NDArray[float64] = (t - x[idx])[:, None]
+        result: NDArray[float64] = coefficients[-1][idx]
+        for coefficient in reversed(coefficients[:-1]):
+            result = result * dt + coefficient[idx]
+
+        angles[active] = result
+        return cls(times=ticks, angles=angles.round())
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1])
+
+    def keyframes(self, servo: int) -> tuple[list[float], list[int]]:
+        """Returns the (times, angles) keyframes of a servo."""
+        column: NDArray[float64] = self.angles[:, servo]
+        active = ~isnan(column)
+        times, angles = self.times[active], column[active]
+
+        # Skip the ticks inside of idle intervals (same angle as both neighbours); Linear playback between the remaining ticks is the same
+        keep = ones(len(angles), dtype=bool)
+        keep[1:-1] = (angles[1:-1] != angles[:-2]) | (angles[1:-1] != angles[2:])
+        return times[keep].tolist(), angles[keep].astype(int).tolist()
+
+    def play(self, servos: Sequence[SServo], preempt: bool = False) -> None:
+        """Starts the timeline on the servos (in the order of the columns) in the same scheduler tick. Use join on the servos to wait for the end."""
+        for idx, servo in enumerate(servos):
+            times, angles = self.keyframes(idx)
+            servo.set_trajectory(target_angles=angles, times=times, profile="linear", preempt=preempt)
+
+        with motion_scheduler.atomic():
+            for servo in servos:
+                servo.start()
+
+def _tick_grid(end: float, tick_rate: float) -> NDArray[float64]:
+    """Returns the times of all scheduler ticks up to the end (the first tick is one period after the start)."""
+    return arange(1, ceil(round(end * tick_rate, 6)) + 1) / tick_rate
+
+def _pchip_slopes(h: NDArray[float64], delta: NDArray[float64]) -> NDArray[float64]:
+    """Slopes at the keyframes of a monotone cubic spline (Fritsch-Carlson): Weighted harmonic mean of the neighbouring secants; 0 at extrema and in flat segments."""
+    d: NDArray[float64] = zeros_like(delta, shape=(len(delta) + 1, delta.shape[1]))
+    if len(delta) == 1:
+        d[:] = delta[0]
+        return d
+
+    w1: NDArray[float64] = (2 * h[1:] + h[:-1])[:, None]
+    w2: NDArray[float64] = (h[1:] + 2 * h[:-1])[:, None]
+    with errstate(divide="ignore", invalid="ignore"):
+        d[1:-1] = where(delta[:-1] * delta[1:] > 0, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0.0)
+
+    d[0], d[-1] = _edge_slope(h[0], h[1], delta[0], delta[1]), _edge_slope(h[-1], h[-2], delta[-1], delta[-2])
+    return d
+
+def _edge_slope(h0: float, h1: float, delta0: NDArray[float64], delta1: NDArray[float64]) -> NDArray[float64]:
+    """Slope at the first or last keyframe of a monotone cubic spline (three-point estimate, limited so the end segment doesn't overshoot)."""
+    d: NDArray[float64] = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+    d = where(sign(d) != sign(delta0), 0.0, d)
+    return where((sign(delta0) != sign(delta1)) & (np_abs(d) > np_abs(3 * delta0)), 3 * delta0, d)
+
+def timeline_fingerprint() -> str:
+    """Returns all config values the compiled timelines depend on. A config change invalidates all timelines."""
+    return json.dumps({name: getattr(config, name) for name in (
+        "gait", "gait_cycle_time", "gait_duty_factor", "gait_phase_offsets", "gait_samples_per_cycle",
+        "step_width", "step_height", "duration", "max_points", "smoothness", "step_map_angles", "coord_multiplier", "control_tick_rate", "ik_solver",
+        "leg_configuration_rf", "leg_configuration_rb", "leg_configuration_lf", "leg_configuration_lb",
+    )} | {"geometry": geometry_fingerprint()}, sort_keys=True, default=str)
+
+class TimelineCache:
+    """
+    Compiled timelines of the movement commands (in memory and optionally in a .npz file).<br>
+    Timelines are compiled in a background thread; Until they are ready (or after a config change) get returns None, so the command has to be calculated live.
+
+    :param compile (Callable[[], dict[str, JointTimeline]]): Compiles all timelines (name -> timeline).
+    :param file_path (Optional[str]): .npz file the timelines are saved to and loaded from. None keeps them in memory only.
+    """
+    def __init__(self, compile: Callable[[], dict[str, JointTimeline]], file_path: Optional[str] = config.timeline_cache_file) -> None:
+        self._compile: Callable[[], dict[str, JointTimeline]] = compile
+        self.file_path: Optional[str] = file_path
+
+        self._timelines: dict[str, JointTimeline] = {}
+        self._fingerprint: Optional[str] = None  # Fingerprint of the config the timelines were compiled with
+        self._thread: Optional[Thread] = None
+        self._lock: Lock = Lock()
+
+    def compile_async(self) -> Thread:
+        """Starts compiling (or loading) the timelines in a background thread if that isn't already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="TimelineCompiler", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def wait(self) -> None:
+        """Waits until the running compilation is done."""
+        if self._thread is not None:
+            self._thread.join()
+
+    def get(self, name: str) -> Optional[JointTimeline]:
+        """Returns the compiled timeline of a command; None if it isn't compiled (yet). A config change starts a recompilation."""
+        if self._fingerprint is not None and self._fingerprint != timeline_fingerprint():
+            dprint(f"{config.color_yellow}[ WARNING ] Config changed; Recompiling movement timelines...{config.color_reset}")
+            with self._lock:
+                self._timelines, self._fingerprint = {}, None
+            self.compile_async()
+
+        return self._timelines.get(name)
+
+    def _run(self) -> None:
+        fingerprint: str = timeline_fingerprint()
+        timelines: Optional[dict[str, JointTimeline]] = self._load(fingerprint)
+
+        if timelines is None:
+            start_ns: int = motion_scheduler.ticker.clock.now_ns()
+            timelines = self._compile()
+            dprint(f"Compiled {len(timelines)} movement timelines in {(motion_scheduler.ticker.clock.now_ns() - start_ns) / 1e6:.1f} ms")
+            self._save(timelines, fingerprint)
+
+        with self._lock:
+            self._timelines, self._fingerprint = timelines, fingerprint
+
+    def _load(self, fingerprint: str) -> Optional[dict[str, JointTimeline]]:
+        """Returns the timelines of the cache file if it was written with the same config; None otherwise."""
+        if not self.file_path or not os.path.exists(self.file_path):
+            return None
+
+        try:
+            with load(self.file_path) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    dprint(f"Timeline cache '{self.file_path}' was compiled with a different config; Recompiling...")
+                    return None
+                return {str(name): JointTimeline(times=data[f"{name}:times"], angles=data[f"{name}:angles"]) for name in data["names"]}
+        except (OSError, ValueError, KeyError) as e:
+            dprint(f"{config.color_yellow}[ WARNING ] Failed to load timeline cache '{self.file_path}'; Recompiling. Error: {e}{config.color_reset}")
+            return None
+
+    def _save(self, timelines: dict[str, JointTimeline], fingerprint: str) -> None:
+        if not self.file_path:
+            return
+
+        arrays: dict[str, NDArray] = {"fingerprint": asarray(fingerprint), "names": asarray(list(timelines))}
+        for name, timeline in timelines.items():
+            arrays[f"{name}:times"], arrays[f"{name}:angles"] = timeline.times, timeline.angles
+
+        try:
+            with open(f"{self.file_path}.tmp", "wb") as f:
+                savez(f, **arrays)
+            os.replace(f"{self.file_path}.tmp", self.file_path)
+        except OSError as e:
+            dprint(f"{config.color_yellow}[ WARNING ] Failed to save timeline cache '{self.file_path}'. Error: {e}{config.color_reset}")
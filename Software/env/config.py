@@ -25,7 +25,7 @@
 
 
 from re import compile, Pattern
-from typing import Literal
+from typing import Literal, Optional
 from env.types.typing import LegConfigDict
 
 class Config:
@@ -42,11 +42,28 @@ class Config:
         # Developer settings
         self.debug: bool = True
 
+        # Boot settings
+        self.fast_boot: bool = False                     # Only touch the used servo channels, start from the saved servo state instead of probing the servos and accept controller input while the startup script runs
+        self.servo_state_file: str = "servo_state.json"  # Last commanded servo angles (with fast_boot: saved whenever the servos stop and on exit or SIGTERM; deleted while loading)
+
         # Servo general (default)
         self.servo_channel_count: int = 16               # Channel amount of the servo controller
         self.servo_normal_position: int = 0              # Normal position of all servos
         self.servo_default_normalize_speed: float = 3.0  # How many seconds the servos should need to normalize their position
         self.servo_default_speed: float = 1.0            # Default speed of the servos
+        self.control_tick_rate: float = 100.0            # Ticks per second of the motion scheduler which moves all servos
+        self.control_tick_policy: Literal["catch-up", "skip"] = "skip"  # What the scheduler does with ticks it missed: run them back to back or drop them
+        self.control_jitter_buckets_us: tuple[int, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000)  # Buckets of the lateness histogram of the scheduler ticks
+        self.servo_motion_profile: Literal["linear", "trapezoid", "minimum-jerk"] = "linear"  # Default speed curve of servo motions; Use 'linear' for motions which are chained (e.g. circles)
+        self.motion_profile_samples: int = 1024          # Resolution of the precomputed motion profiles (1024 points are finer than one tick for motions up to ~10 s)
+        self.trapezoid_ramp: float = 0.25                # Share of the duration the trapezoid profile accelerates (and decelerates); Must be < 0.5
+        self.servo_output: Literal["servokit", "pca9685", "simulated"] = "servokit"  # 'pca9685' writes all servo updates of a tick with a single I2C block write; 'simulated' runs without hardware on a virtual clock
+        self.pca9685_address: int = 0x40                 # I2C address of the servo controller
+        self.pca9685_frequency: float = 50.0             # PWM frequency of the servos in Hz
+        self.servo_min_pulse_us: int = 750               # Pulse width at 0° in µs (same as adafruit_servokit)
+        self.servo_max_pulse_us: int = 2250              # Pulse width at 180° in µs (same as adafruit_servokit)
+        self.i2c_bus_speed_hz: int = 100_000             # Clock of the I2C bus of the servo controller
+        self.i2c_bus_budget: float = 0.8                 # Share of the bus time per scheduler tick servo writes may use; Channels above the budget are written one tick later
         # self.servo_stopping_threshold: float = 5.0     # The threshold that determines when the servo movement should stop.  (The smaller the more accurate); Shouldn't be too small to ensure functionality!
         self.max_legs: int = 4                           # How many legs DEBBIE has
 
@@ -59,6 +76,14 @@ class Config:
         self.deviation_y: float = 1.6
         self.deviation_z: float = -2.1
 
+        # Inverse kinematics settings
+        self.ik_solver: Literal["exact", "lut"] = "exact"  # 'exact' solves the servo angles analytically, 'lut' interpolates them from a prebuilt lookup table (see build_ik_lut.py)
+        self.ik_lut_file: str = "ik_lut.npy"              # File of the IK lookup table (memory-mapped at startup)
+        self.ik_lut_resolution: float = 2.0               # Distance between two points of the IK lookup table in mm
+        self.ik_cache_size: int = 16_384                  # Maximum amount of cached positions per leg geometry (least recently used are evicted first)
+        self.ik_cache_quantum: float = 0.01               # Positions are rounded to this grid (in mm) before they are cached
+        self.ik_symmetry: Literal["off", "on", "validate"] = "on"  # 'on' solves paths shared by several legs (mirrored or phase shifted) only once, 'validate' also compares them with a full solve (see solve_paths)
+
         # Decorator config
         self.max_lru_cache: int = 100                     # The maximum amount of cache entries for the lru decorator
 
@@ -68,6 +93,11 @@ class Config:
         self.wait_pattern: Pattern = compile(r"WAIT=\s*(-?\d*\.\d+|\d+\.?)\s*")
         self.mmt_default_path: str = "movements"
         self.auto_parse_startup: bool = True
+        self.mmt_legs: tuple[str, ...] = ("rf", "rb", "lf", "lb")  # Leg order of the compiled MMT-Files
+        self.mmt_cache: bool = True                # Save the parsed MMT-Files in a compiled form next to them and load that instead of the text while the file is unchanged
+        self.mmt_cache_suffix: str = ".mmtc"       # Suffix of the compiled MMT-Files
+        self.mmt_parse_workers: Optional[int] = None  # Worker processes to parse a folder of MMT-Files (None = one per CPU; 1 = no process pool)
+        self.mmt_interpolation: str = "linear"     # Interpolation between the blocks of an MMT-File ('linear' or 'cubic'; cubic doesn't stop at every block and never overshoots)
 
         # Controller settings
         self.bufsize: int = 1024                  # Buffer size for the controller
@@ -117,6 +147,26 @@ class Config:
         self.min_height: float = -30.0  # The minimum height of the leg in mm
         self.height_step: float =  5.0  # The height of the step in mm
 
+        # Gait settings
+        self.gait: Literal["step", "trot"] = "trot"          # 'step' moves the diagonal leg pairs one after another; 'trot' walks with a continuous phase clock (see TrotGait)
+        self.gait_cycle_time: float = self.duration          # Seconds of one gait cycle (every leg swings once)
+        self.gait_duty_factor: float = 0.5                   # Share of the cycle a leg is on the ground
+        self.gait_phase_offsets: dict[Literal["left-front", "left-back", "right-front", "right-back"], float] = {"left-front": 0.0, "right-back": 0.0, "right-front": 0.5, "left-back": 0.5}  # Diagonal pairs swing together
+        self.gait_samples_per_cycle: int = 2 * self.max_points  # Keyframes per leg and cycle
+        self.gait_lookahead: float = 0.5 * self.duration     # A step returns this many seconds before its cycle ends, so the next step can continue the motion
+        self.circle_table_min_width: float = 1.0             # Smallest step width of the circle table used by Movement.walk
+        self.circle_table_max_width: float = 40.0            # Largest step width of the circle table
+        self.circle_table_width_step: float = 0.5            # Step width resolution of the circle table (interpolated in between)
+        self.leg_mount_positions: dict[Literal["left-front", "left-back", "right-front", "right-back"], tuple[float, float]] = {  # Position of the foot in normal position relative to the body center in mm (x = forwards, y = left)
+            "left-front":  ( 110.0,  75.0),
+            "left-back":   (-110.0,  75.0),
+            "right-front": ( 110.0, -75.0),
+            "right-back":  (-110.0, -75.0),
+        }
+        self.command_lookahead: int = 1                      # Controller commands queued ahead of the running movement, so the next step is ready before the running one ends
+        self.precompile_timelines: bool = True               # Compile the steps and turns into joint-space timelines while the startup script runs (played without solving them again)
+        self.timeline_cache_file: Optional[str] = "timelines.npz"  # File the compiled timelines are saved to (recompiled if the config changed); None keeps them in memory only
+
         # Step map settings
         # (left_front, left_back, right_front, right_back)
         self.step_map_angles: dict[Literal["step-forward", "step-backward", "sidestep-left", "sidestep-right", "turn-left", "turn-right"], dict[Literal["left-front", "left-back", "right-front", "right-back"], int]] = {
@@ -2,3 +2,4 @@ class ProgrammingError(Exception): pass
 class NoThreadError(Exception): pass
 class InvalidOSError(Exception): pass
 class ThreadAlreadySetError(Exception): pass
+class MMTCompileError(ValueError): pass
@@ -1,3 +1,5 @@
+import os
+from threading import Thread
 from time import sleep
 
 # Classes
@@ -8,7 +10,17 @@ from env.config import config
 
 def startup_script(mvmnt: Movement) -> None:
     """Startup behavior."""
-    # Sleep for a moment to ensure I2C devices are ready
-    sleep(2)
+    # Sleep for a moment to ensure I2C devices are ready (the servos were already initialized when creating mvmnt with fast_boot)
+    if not config.fast_boot:
+        sleep(2)
+
+    # Compile the movement timelines while the legs are normalized
+    if config.precompile_timelines:
+        mvmnt.timelines.compile_async()
+
+    # Index the movements of the MMT folder (in worker processes) in the background so the controller can run them by name.
+    # Until then a movement can still be run by name; It's read from config.mmt_default_path directly (see Movement.execute_mmt)
+    if config.auto_parse_startup and os.path.isdir(config.mmt_default_path):
+        Thread(target=mvmnt.parse_folder, args=(config.mmt_default_path,), name="MMTIndexer", daemon=True).start()
 
     mvmnt.normalize_all_legs()
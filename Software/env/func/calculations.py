@@ -1,5 +1,6 @@
-from numpy import sin, cos, tan, arcsin, arccos, arctan, radians, degrees
-from typing import Literal
+from numpy import sin, cos, tan, arcsin, arccos, arctan, radians, degrees, arange, stack, sqrt, asarray, broadcast_arrays, float64
+from numpy.typing import NDArray
+from typing import Literal, Optional
 from decimal import getcontext
 
 # Set high precision for Decimal calculations
@@ -12,11 +13,14 @@ from env.config import config
 from env.func.DEBUG import dprint
 
 # Classes
-from env.classes.Classes import Coordinate
+from env.classes.Classes import Coordinate, CoordinateArray
+from env.classes.kinematics import LegKinematics
 
 # Decorators
 from env.decr.decorators import cached, validate_types
 
+_kinematics: Optional[LegKinematics] = None  # Model of calc_servo_angles_batch (config geometry); Created on first use
+
 # Trigonometric functions
 def _deg(num: float) -> float:  return degrees(num)
 def _rad(num: float) -> float:  return radians(num)
@@ -68,6 +72,49 @@ def calc_circle_coordinates(step_width: float, angle: int, max_points: int = con
         smoothness=smoothness
     ) for point in range(max_points+1)]
 
+@cached
+@validate_types
+def calc_circle_coordinate_array(step_width: float, angle: int, max_points: int = config.max_points, smoothness: float = config.smoothness) -> CoordinateArray:
+    """
+    Vectorized version of calc_circle_coordinates which calculates all points at once and returns them as a CoordinateArray.<br>
+    The result is cached and shared, therefore its array is read-only.
+    """
+    # Calculate the radius and height based on the step width and smoothness
+    r: float = _get_r(smoothness=smoothness, step_width=step_width)
+    h_m: float = _get_h_m(r=r, smoothness=smoothness)
+
+    # Calculate the coordinates of all points (see _calc_circle_coordinate)
+    point: NDArray = arange(max_points + 1)
+    c1: float = abs(_asin(smoothness))
+    p_wm: NDArray[float64] = (180 * point - c1 * (2 * point - max_points)) / (max_points)
+    c3: NDArray[float64] = r * _cos(p_wm) - step_width / 2
+
+    xyz: NDArray[float64] = stack((-_cos(angle) * c3, _sin(angle) * c3, h_m * r * (_sin(p_wm) + smoothness)), axis=1).round(6)
+    xyz.setflags(write=False)
+
+    return CoordinateArray(xyz)
+
+def calc_circle_coordinate_table(step_widths: NDArray[float64], angles: NDArray[float64], max_points: int = config.max_points, smoothness: float = config.smoothness) -> NDArray[float64]:
+    """
+    Calculates the circles of calc_circle_coordinate_array for every combination of step width and angle in a single pass.
+
+    :param step_widths: Step widths (W,).
+    :param angles: Angles in degrees (A,).
+    :return (NDArray[float64]): Array of shape (W, A, max_points + 1, 3).
+    """
+    widths: NDArray[float64] = asarray(step_widths, dtype=float64)[:, None, None]
+    angle: NDArray[float64] = asarray(angles, dtype=float64)[None, :, None]
+
+    # Same as calc_circle_coordinate_array (h_m * r doesn't depend on the step width)
+    r: NDArray[float64] = sqrt(widths**2 / (4 - 4 * smoothness**2))
+    c1: float = abs(_asin(smoothness))
+    point: NDArray = arange(max_points + 1)
+    p_wm: NDArray[float64] = (180 * point - c1 * (2 * point - max_points)) / (max_points)
+    c3: NDArray[float64] = r * _cos(p_wm) - widths / 2
+    z: NDArray[float64] = config.step_height / (1 + smoothness) * (_sin(p_wm) + smoothness)
+
+    return stack(broadcast_arrays(-_cos(angle) * c3, _sin(angle) * c3, z), axis=-1).round(6)
+
 @cached
 @validate_types
 def _get_r(smoothness: float, step_width: float) -> float: return _sqrt((step_width**2) / (4 - 4 * smoothness**2))
@@ -165,10 +212,10 @@ def _get_l_ds() -> float: return _sqrt(2) * config.d_s
 @validate_types
 def _get_d_cpsum(y: float) -> float: return config.d_ys + config.d_cpm + (-(config.f_w / 2) if y > 0 else (config.f_w / 2))
 
-@cached
 @validate_types
 def calc_servo_angles(coordinate: Coordinate) -> dict[Literal["thigh", "lower-leg", "side-axis"], int]:
-    coordinate.add_xyz_tuple(config.coord_deviation)
+    # Apply the deviation on a copy; The coordinate must not be mutated (see IKCache for caching)
+    coordinate = coordinate + Coordinate(*config.coord_deviation)
 
     # General calculations for servo angles
     l_ds   : float = _get_l_ds()
@@ -211,3 +258,23 @@ def calc_servo_angles(coordinate: Coordinate) -> dict[Literal["thigh", "lower-le
     # <-- End -->
 
     return {"thigh": int(round(alpha, 0)), "lower-leg": int(round(beta, 0)), "side-axis": int(round(gamma, 0))}
+
+
+def calc_servo_angles_batch(coordinates: NDArray[float64], rounded: bool = True, strict: bool = True) -> NDArray:
+    """Vectorized version of calc_servo_angles for a whole trajectory at once.
+
+    Args:
+        coordinates(NDArray[float64]): Array of shape (N, 3) containing the xyz foot positions (servo coordinate system).
+        rounded(bool): If True, the angles are rounded to integers like calc_servo_angles does. (Default = True)
+        strict(bool): If False, unreachable positions result in NaN angles instead of an AssertionError. Only useful with rounded=False. (Default = True)
+
+    Returns:
+        NDArray: Array of shape (N, 3) with the thigh, lower-leg and side-axis angles of each position.
+
+    Raises:
+        AssertionError: If any position is out of reach (acos of a value outside the range [-1, 1]) and strict is set.
+    """
+    global _kinematics
+    if _kinematics is None:
+        _kinematics = LegKinematics()
+    return _kinematics.solve_batch(coordinates=coordinates, rounded=rounded, strict=strict)
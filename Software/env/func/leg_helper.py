@@ -1,6 +1,9 @@
 import time
-from adafruit_servokit import ServoKit  # type:ignore[import-untyped, import-not-found]
-from typing import cast
+from typing import Iterable, Optional, TypeVar, cast
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.servo_backend import ServoBackend
 
 # Decorators
 from env.decr.decorators import validate_types, cached
@@ -8,17 +11,22 @@ from env.decr.decorators import validate_types, cached
 # Config
 from env.config import config
 
+Angles = TypeVar("Angles", int, NDArray)
+
 @validate_types
-def initialize_servos(servo_kit: ServoKit) -> None:
+def initialize_servos(servo_backend: ServoBackend, channels: Optional[Iterable] = None) -> None:
     """
-    Initialize the servos on the servo kit.
+    Initialize the servos on the servo backend.
 
-    :param servo_kit: The servo kit to control the servos.
+    :param servo_backend: The backend to control the servos.
+    :param channels: The channels to initialize (Default = all channels).
     :return: None
     """
-    for i in range(config.servo_channel_count):
-        servo_kit.servo[i].angle = servo_kit.servo[i].angle
-        time.sleep(0.1)  # Add a small delay to avoid abrupt movements
+    for i in (channels if channels is not None else range(config.servo_channel_count)):
+        angle: Optional[int] = servo_backend.read(i)
+        if angle is not None:
+            servo_backend.write(i, angle)
+            time.sleep(0.1)  # Add a small delay to avoid abrupt movements
 
 @validate_types
 def adjust_angle(is_mirrored: bool, max_angle: int, angle: int, deviation: int, min_angle: int) -> int:
@@ -27,7 +35,18 @@ def adjust_angle(is_mirrored: bool, max_angle: int, angle: int, deviation: int,
     Assumes 90° is the neutral (internal 0°) position.
     Deviation is applied before mirroring to ensure symmetric movement.
     """
-    adjusted = angle + 90 + deviation
+    return adjust_angles(is_mirrored=is_mirrored, angles=angle, deviation=deviation)
+
+def adjust_angles(is_mirrored: bool, angles: Angles, deviation: int) -> Angles:
+    """
+    The mapping of adjust_angle for a single angle or a whole array of angles at once (not type checked, so it's cheap enough for trajectories and compiled movements).
+
+    :param is_mirrored: Whether the servo is mirrored.
+    :param angles: The angles (not adjusted; 0° = neutral).
+    :param deviation: Deviation of the servo.
+    :return (Angles): The adjusted angles (same type as angles).
+    """
+    adjusted = angles + 90 + deviation
 
     if is_mirrored:
         return 180 - adjusted  # It's a feature, not a bug! Even if the mirrored servos look like they have a skill issue.
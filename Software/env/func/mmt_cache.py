@@ -0,0 +1,83 @@
+import os
+from hashlib import sha256
+from typing import Optional
+from numpy import asarray, load, savez, float64, int64
+from numpy.typing import NDArray
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+MMT_CACHE_VERSION: int = 2  # Increase if the compiled format changes
+
+def get_cache_path(file_path: str) -> str:
+    """Returns the path of the compiled file of an MMT-File (next to it)."""
+    return f"{file_path}{config.mmt_cache_suffix}"
+
+def file_stamp(file_path: str) -> tuple[int, int]:
+    """Returns the mtime (ns) and size of a file; Both change when the file is edited."""
+    stat: os.stat_result = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+def _file_hash(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return sha256(f.read()).hexdigest()
+
+def load_compiled_mmt(file_path: str) -> Optional[tuple[NDArray[float64], NDArray[float64]]]:
+    """
+    Loads the compiled form of an MMT-File if it is up to date.<br>
+    Unchanged size and mtime are trusted; Otherwise the file hash decides (e.g. after a checkout which only touched the mtime) and the new mtime is saved.
+    The compiled file is only valid for the leg order of config.mmt_legs it was written with.
+
+    :param file_path: Path of the MMT-File.
+    :return (Optional[tuple[NDArray[float64], NDArray[float64]]]): Durations (blocks,) and coordinates (blocks, 4, 3) in the leg order of config.mmt_legs; None if there is no valid compiled file.
+    """
+    cache_path: str = get_cache_path(file_path)
+    if not os.path.isfile(cache_path):
+        return None
+
+    try:
+        with load(cache_path) as data:
+            if int(data["version"]) != MMT_CACHE_VERSION or data["legs"].tolist() != list(config.mmt_legs):
+                return None
+            moved: bool = (int(data["mtime_ns"]), int(data["size"])) != file_stamp(file_path)
+            if moved and str(data["sha256"]) != _file_hash(file_path):
+                return None
+            durations, coordinates = data["durations"], data["coordinates"]
+    except (OSError, ValueError, KeyError) as e:
+        dprint(f"{config.color_yellow}[ WARNING ] Failed to load compiled MMT-File '{cache_path}'; Parsing the text instead. Error: {e}{config.color_reset}")
+        return None
+
+    # Same text with a new mtime; Save the new one, so the next load doesn't have to hash the file again
+    if moved:
+        save_compiled_mmt(file_path, durations, coordinates)
+    return durations, coordinates
+
+def save_compiled_mmt(file_path: str, durations: NDArray[float64], coordinates: NDArray[float64]) -> None:
+    """
+    Saves the compiled form of an MMT-File next to it (keyed by the hash, size and mtime of the text and the leg order of config.mmt_legs).
+
+    :param file_path: Path of the MMT-File.
+    :param durations: Durations of all blocks (blocks,).
+    :param coordinates: Coordinates of all blocks (blocks, 4, 3) in the leg order of config.mmt_legs.
+    """
+    mtime_ns, size = file_stamp(file_path)
+    cache_path: str = get_cache_path(file_path)
+
+    # Write to a temporary file first, so an interrupted write can't leave a broken cache
+    try:
+        with open(f"{cache_path}.tmp", "wb") as f:
+            savez(f,
+                version =     asarray(MMT_CACHE_VERSION, dtype=int64),
+                legs =        asarray(config.mmt_legs),
+                mtime_ns =    asarray(mtime_ns, dtype=int64),
+                size =        asarray(size, dtype=int64),
+                sha256 =      asarray(_file_hash(file_path)),
+                durations =   asarray(durations, dtype=float64),
+                coordinates = asarray(coordinates, dtype=float64).reshape(-1, len(config.mmt_legs), 3),
+            )
+        os.replace(f"{cache_path}.tmp", cache_path)
+    except OSError as e:
+        dprint(f"{config.color_yellow}[ WARNING ] Failed to save compiled MMT-File '{cache_path}'. Error: {e}{config.color_reset}")
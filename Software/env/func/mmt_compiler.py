@@ -0,0 +1,75 @@
+from typing import Optional, Sequence
+from numpy import cumsum, isnan, rint, stack, where, float64
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.leg import Leg
+from env.classes.mmt_parser import Parser
+from env.classes.timeline import JointTimeline
+
+# Func
+from env.func.leg_helper import adjust_angles
+
+# Errors
+from env.err.Errors import MMTCompileError
+
+# Config
+from env.config import config
+
+def check_mmt(coordinates: NDArray[float64], legs: Sequence[Leg]) -> tuple[NDArray[float64], dict[int, list[str]]]:
+    """
+    Solves the servo angles of all blocks of an MMT-File and checks them against the range of each servo.
+
+    :param coordinates: Array of shape (blocks, legs, 3) with the position of each leg in each block.
+    :param legs: The legs in the order of the coordinates.
+    :return (tuple[NDArray[float64], dict[int, list[str]]]): Array of shape (blocks, legs * 3) with the (not adjusted) thigh, lower-leg and side-axis angles of each leg,
+        and the problems of every invalid block (block index -> problems).
+    """
+    columns: list[NDArray[float64]] = []
+    issues: dict[int, list[str]] = {}
+
+    for idx, leg in enumerate(legs):
+        angles: NDArray[float64] = rint(leg.kinematics.solve_batch(coordinates[:, idx] * config.coord_multiplier, rounded=False, strict=False))
+        unreachable = isnan(angles).any(axis=1)
+        for block in unreachable.nonzero()[0].tolist():
+            issues.setdefault(block, []).append(f"Leg {leg.leg}: Position {tuple(coordinates[block, idx].tolist())} can't be reached.")
+
+        for column, servo in enumerate(leg.get_servos()):
+            adjusted: NDArray[float64] = adjust_angles(is_mirrored=servo.mirrored, angles=angles[:, column], deviation=servo.deviation)
+
+            for block in ((~unreachable) & ((adjusted < servo.min_angle) | (adjusted > servo.max_angle))).nonzero()[0].tolist():
+                issues.setdefault(block, []).append(f"Servo ({leg.leg}:{servo.servo_type}): Adjusted angle {int(adjusted[block])} is out of range [{servo.min_angle} - {servo.max_angle}].")
+
+            columns.append(where(unreachable, 0.0, angles[:, column]))
+
+    return stack(columns, axis=1), dict(sorted(issues.items()))
+
+def compile_mmt(parser: Parser, file_path: str, legs: Sequence[Leg], tick_rate: float = config.control_tick_rate, interpolation: Optional[str] = None) -> JointTimeline:
+    """
+    Compiles an MMT-File ahead of time into a joint-space timeline (one column per servo: thigh, lower-leg and side-axis of each leg).<br>
+    All blocks are solved and validated before anything is returned, so playing the timeline needs no kinematics and can't fail halfway.
+    The blocks are the keyframes of all servos; Blocks which hold the previous position (e.g. WAIT) become idle intervals.
+
+    :param parser: Parser of the MMT-File (its compiled form is reused if it's already parsed).
+    :param file_path: Path of the MMT-File.
+    :param legs: The legs in the order of config.mmt_legs.
+    :param tick_rate: Ticks per second of the timeline.
+    :param interpolation: 'linear' or 'cubic' (see JointTimeline.resample). Defaults to config.mmt_interpolation.
+    :return (JointTimeline): The movement of all servos.
+    :raises MMTCompileError: If any block can't be reached or exceeds the range of a servo (lists every invalid block with its line).
+    """
+    parser.parse_file(file_path)
+    durations: NDArray[float64] = parser.get_durations(file_path)
+    if not len(durations):
+        raise MMTCompileError(f"'{file_path}' doesn't contain any movement.")
+
+    coordinates: NDArray[float64] = stack([parser.get_leg_trajectory(file_path, leg).xyz for leg in config.mmt_legs], axis=1)
+    angles, issues = check_mmt(coordinates=coordinates, legs=legs)
+
+    if issues:
+        # Lines are only known from the text; Read it again to report them
+        lines: list[int] = [line for line, _ in parser.iter_blocks(file_path)]
+        report: list[str] = [f"  Block {block + 1} (line {lines[block]}): {issue}" for block, block_issues in issues.items() for issue in block_issues]
+        raise MMTCompileError(f"'{file_path}' has {len(issues)} invalid block(s):\n" + "\n".join(report))
+
+    return JointTimeline.resample(times=cumsum(durations), keyframes=angles, tick_rate=tick_rate, interpolation=interpolation or config.mmt_interpolation)
@@ -0,0 +1,43 @@
+from numpy import linspace, where, float64
+from numpy.typing import NDArray
+
+# Decorators
+from env.decr.decorators import cached
+
+# Config
+from env.config import config
+
+MOTION_PROFILES: tuple[str, ...] = ("linear", "trapezoid", "minimum-jerk")
+
+def _trapezoid(t: NDArray[float64], ramp: float) -> NDArray[float64]:
+    """Constant acceleration for the first 'ramp' share of the time, constant speed, then constant deceleration."""
+    v_max: float = 1 / (1 - ramp)  # Peak speed so the whole distance is covered
+    accelerating: NDArray[float64] = 0.5 * v_max / ramp * t**2
+    cruising: NDArray[float64] = 0.5 * v_max * ramp + v_max * (t - ramp)
+    decelerating: NDArray[float64] = 1 - 0.5 * v_max / ramp * (1 - t)**2
+    return where(t < ramp, accelerating, where(t > 1 - ramp, decelerating, cruising))
+
+def _minimum_jerk(t: NDArray[float64]) -> NDArray[float64]:
+    """Quintic polynomial with zero speed and acceleration at both ends."""
+    return t**3 * (10 - 15 * t + 6 * t**2)
+
+@cached
+def get_motion_profile(profile: str) -> NDArray[float64]:
+    """
+    Returns the normalized position (0 -> 1) of a motion profile sampled at config.motion_profile_samples points in time (0 -> 1).<br>
+    The table is computed once and reused for every duration; The position after an elapsed share t of the motion is table[round(t * (len(table) - 1))].
+
+    :param profile: One of MOTION_PROFILES.
+    :return (NDArray[float64]): Read-only array of the positions.
+    :raises ValueError: If the profile is unknown.
+    """
+    if not profile in MOTION_PROFILES:
+        raise ValueError(f"Motion profile must be one of the following: {', '.join(MOTION_PROFILES)}; got '{profile}'!")
+
+    t: NDArray[float64] = linspace(0.0, 1.0, config.motion_profile_samples, dtype=float64)
+    if profile == "trapezoid":       table: NDArray[float64] = _trapezoid(t, ramp=config.trapezoid_ramp)
+    elif profile == "minimum-jerk":  table = _minimum_jerk(t)
+    else:                            table = t
+
+    table.setflags(write=False)  # Shared between all motions
+    return table
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import signal
+import threading
+
+# Classes
+from env.classes.servo_backend import ServoBackend
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+def get_used_channels() -> list[int]:
+    """Returns the servo channels of all legs (sorted)."""
+    legs = (config.leg_configuration_rf, config.leg_configuration_rb, config.leg_configuration_lf, config.leg_configuration_lb)
+    return sorted(channel for leg in legs for channel in leg["channels"].values())
+
+def load_servo_state(file_path: str = config.servo_state_file, consume: bool = False) -> dict[int, int]:
+    """
+    Loads the last commanded servo angles.
+
+    :param file_path: Path of the state file.
+    :param consume: Delete the state file after loading it. It is written again when the servos stop (see save_servo_state),
+        so after an exit which couldn't save (SIGKILL, power loss) there is no stale state and the servos are probed.
+    :return (dict[int, int]): channel -> angle; Empty if there is no (valid) state file.
+    """
+    if not os.path.isfile(file_path):
+        return {}
+
+    try:
+        with open(file_path, "r", encoding="UTF-8") as f:
+            state: dict[str, int] = json.load(f)
+        if consume:
+            os.remove(file_path)
+        return {int(channel): int(angle) for channel, angle in state.items() if 0 <= int(channel) < config.servo_channel_count and 0 <= int(angle) <= 180}
+    except (OSError, ValueError, AttributeError) as e:
+        dprint(f"{config.color_yellow}[ WARNING ] Failed to load servo state from '{file_path}'; Probing the servos instead. Error: {e}{config.color_reset}")
+        return {}
+
+_saved_states: dict[str, dict[int, int]] = {}  # file path -> last saved state (unchanged states aren't written again; the file is only read before the first save)
+
+def save_servo_state(servo_backend: ServoBackend, file_path: str = config.servo_state_file) -> None:
+    """
+    Saves the last commanded angle of every channel (channels which weren't written keep their saved angle).<br>
+    Runs on the scheduler thread whenever the servos stop, so the file is only written if the state changed.
+
+    :param servo_backend: The backend whose written angles are saved.
+    :param file_path: Path of the state file.
+    """
+    if file_path not in _saved_states:
+        _saved_states[file_path] = load_servo_state(file_path)
+
+    state: dict[int, int] = _saved_states[file_path] | servo_backend.assumed_angles
+    for channel, angle in enumerate(servo_backend.shadow.written):
+        if angle is not None:
+            state[channel] = angle
+
+    if state == _saved_states[file_path]:
+        return
+
+    # Write to a temporary file first, so a power loss can't leave a half written state file
+    tmp_path: str = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="UTF-8") as f:
+        json.dump({str(channel): angle for channel, angle in sorted(state.items())}, f)
+    os.replace(tmp_path, file_path)
+    _saved_states[file_path] = state
+    dprint(f"Saved servo state of {len(state)} channel(s) to '{file_path}'.")
+
+def install_sigterm_handler() -> None:
+    """Turns SIGTERM (systemd stop, shutdown) into a normal exit, so the atexit handlers (e.g. save_servo_state) run."""
+    if threading.current_thread() is not threading.main_thread():
+        dprint(f"{config.color_yellow}[ WARNING ] SIGTERM handler can only be installed from the main thread; The servo state is only saved when the servos stop.{config.color_reset}")
+        return
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
@@ -0,0 +1,88 @@
+from typing import Hashable, Optional, TypeVar
+from numpy import abs as np_abs, allclose, array_equal, concatenate, flatnonzero, roll
+from numpy.typing import NDArray
+
+# Classes
+from env.classes.Classes import CoordinateArray
+from env.classes.leg import Leg
+
+# Func
+from env.func.DEBUG import dprint
+
+# Config
+from env.config import config
+
+Key = TypeVar("Key", bound=Hashable)
+
+_TOLERANCE: float = 1e-9  # Positions closer than this (in mm) are the same position
+
+def find_shift(path: NDArray, canonical: NDArray) -> Optional[int]:
+    """
+    Returns the shift s with path[i] == canonical[(i + s) % n] for all points (up to float noise),
+    e.g. the path of a leg whose gait phase is s samples ahead; None if the path isn't a cyclic shift of the canonical path.
+    """
+    if path.shape != canonical.shape or not len(path):
+        return None
+
+    for shift in flatnonzero((np_abs(canonical - path[0]) <= _TOLERANCE).all(axis=1)).tolist():  # Only rows equal to the first point can be the start
+        if allclose(path, roll(canonical, -shift, axis=0), rtol=0, atol=_TOLERANCE):
+            return shift
+    return None
+
+def _solve_groups(paths: dict[Key, tuple[Leg, CoordinateArray]]) -> dict[Key, NDArray]:
+    """Solves the paths; The paths of all legs with the same IK (same geometry, shared IK cache) are stacked and solved in a single batch."""
+    groups: dict[int, list[Key]] = {}
+    for key, (leg, _) in paths.items():
+        groups.setdefault(id(leg.ik_cache), []).append(key)
+
+    solved: dict[Key, NDArray] = {}
+    for keys in groups.values():
+        angles: NDArray = paths[keys[0]][0].solve_coordinates(CoordinateArray(concatenate([paths[key][1].xyz for key in keys])))
+        start: int = 0
+        for key in keys:
+            solved[key] = angles[start:start + len(paths[key][1])]
+            start += len(paths[key][1])
+    return solved
+
+def solve_paths(paths: dict[Key, tuple[Leg, CoordinateArray]], symmetry: Optional[str] = None) -> dict[Key, NDArray]:
+    """
+    Solves the servo angles of the paths of multiple legs (positions in the coordinate system of each leg).<br>
+    The positions are in the coordinate system of each leg and the mirrored servos are mirrored by adjust_angle, so a mirrored leg which walks
+    the same path needs the same (not adjusted) angles; A leg which walks the same path shifted in phase (like the diagonal pairs of a trot)
+    needs the same angles shifted by the same amount of rows. With symmetry 'on' every path is only solved once per geometry,
+    the angles of the other legs are derived from it, and all remaining paths of one geometry are solved in a single batch.
+
+    :param paths: Key -> (leg, positions).
+    :param symmetry: 'off' solves every path, 'on' derives the shared paths, 'validate' derives them and compares the result with a full solve. (Default = config.ik_symmetry)
+    :return (dict[Key, NDArray]): Key -> array of shape (N, 3) with the thigh, lower-leg and side-axis angles.
+    :raises ValueError: If symmetry is unknown.
+    """
+    symmetry = symmetry or config.ik_symmetry
+    if symmetry not in ("off", "on", "validate"):
+        raise ValueError(f"Symmetry must be 'off', 'on' or 'validate'; got '{symmetry}'.")
+    if symmetry == "off":
+        return _solve_groups(paths)
+
+    # Find the canonical path (same IK, same path up to a phase shift) of every path
+    canonical: dict[Key, tuple[Key, int]] = {}  # key -> (canonical key, shift)
+    for key, (leg, path) in paths.items():
+        for other in dict.fromkeys(canonical_key for canonical_key, _ in canonical.values()):
+            other_leg, other_path = paths[other]
+            if other_leg.ik_cache is leg.ik_cache and (shift := find_shift(path.xyz, other_path.xyz)) is not None:
+                canonical[key] = (other, shift)
+                break
+        else:
+            canonical[key] = (key, 0)
+
+    unique: dict[Key, NDArray] = _solve_groups({key: paths[key] for key, (canonical_key, _) in canonical.items() if canonical_key == key})
+    solved: dict[Key, NDArray] = {key: roll(unique[canonical_key], -shift, axis=0) if shift else unique[canonical_key] for key, (canonical_key, shift) in canonical.items()}
+    dprint(f"Solved {len(unique)} of {len(paths)} path(s); Derived the others by symmetry")
+
+    if symmetry == "validate":
+        full: dict[Key, NDArray] = _solve_groups(paths)
+        for key in paths:
+            if not array_equal(full[key], solved[key]):
+                dprint(f"{config.color_red}[ ERROR ] Symmetry derived angles of '{key}' differ from the full solve by up to {np_abs(full[key] - solved[key]).max()}°; Using the full solve.{config.color_reset}")
+                return full
+
+    return solved
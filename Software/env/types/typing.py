@@ -1,4 +1,4 @@
-from typing import TypeVar, TypedDict
+from typing import NotRequired, TypeVar, TypedDict
 
 # TypedDicts for the structure
 class ChannelsDict(TypedDict):
@@ -24,10 +24,27 @@ class MirroredDict(TypedDict):
     lower_leg: bool
     side_axis: bool
 
+class GeometryDict(TypedDict, total=False):
+    z_def: float
+    d_s: float
+    d_ys: float
+    d_cpm: float
+    f_w: float
+    l_1: float
+    l_2: float
+    l_3: float
+    l_4: float
+    l_5: float
+    l_6: float
+    l_7: float
+    l_8: float
+    l_9: float
+
 class LegConfigDict(TypedDict):
     channels: ChannelsDict
     angles: AnglesDict
     deviations: DeviationsDict
     mirrored: MirroredDict
+    geometry: NotRequired[GeometryDict]  # Optional overrides of the leg lengths
 
 ITER = TypeVar('ITER')
@@ -1,4 +1,5 @@
 import time
+from threading import Thread
 from typing import Optional, Literal
 
 # Classes
@@ -12,8 +13,15 @@ from env.func.autostart import startup_script
 # Config
 from env.config import config
 
+boot_start: float = time.perf_counter()
+
 def run_input_thread(mvmnt: Movement) -> None:
-    """Thread to handle input from the controller."""
+    """
+    Thread to handle input from the controller.
+
+    :param mvmnt: The movement instance to execute the commands with.
+    """
+    dprint(f"{config.color_green}Ready for controller input after {time.perf_counter() - boot_start:.3f} second(s) (fast_boot={config.fast_boot}){config.color_reset}")
     while True:
         try:
             # Initialize the reset flag to True
@@ -34,13 +42,15 @@ def run_input_thread(mvmnt: Movement) -> None:
                     dprint(f"{config.color_yellow}[ NOTE ] No input received, waiting...{config.color_reset}")
                 elif input_command == "RESET" and reset:
                     dprint(f"{config.color_yellow}Received RESET command, stopping all movements...{config.color_reset}")
+                    mvmnt.commands.clear()                                                  # Drop the queued commands
                     mvmnt.interrupt_movements()
+                    mvmnt.commands.wait_idle()
                     mvmnt.normalize_all_legs(duration_s=0.3)                                # Normalize all legs to their default position
                     reset = False                                                           # Set the reset flag to True to prevent multiple resets
                 elif input_command in mvmnt.function_map:
-                    mvmnt.function_map[input_command]()
+                    mvmnt.commands.put(input_command)                                       # Blocks while the lookahead queue is full
                     reset = True                                                            # Reset the reset flag after executing the command
-                    dprint(f"{config.color_green}Finished executing command: {input_command}")
+                    continue                                                                # The queue paces the loop; Sleeping would leave a gap between two steps
 
                 # If the command is not valid, print an error message
                 if not reset and input_command != "RESET":
@@ -64,7 +74,14 @@ def main() -> None:
     mvmnt = Movement()
 
     # Execute startup script
-    startup_script(mvmnt=mvmnt)
-    run_input_thread(mvmnt=mvmnt)  # Start the input thread
+    if config.fast_boot:
+        # Accept controller input while the legs are normalized
+        startup_thread: Thread = Thread(target=startup_script, kwargs={"mvmnt": mvmnt}, name="StartupScript", daemon=True)
+        startup_thread.start()
+        mvmnt.commands.run_after(startup_thread)  # Commands are queued right away and executed once the legs are normalized
+        run_input_thread(mvmnt=mvmnt)
+    else:
+        startup_script(mvmnt=mvmnt)
+        run_input_thread(mvmnt=mvmnt)  # Start the input thread
 
 if __name__ == "__main__": main()
@@ -3,7 +3,7 @@ import numpy
 # Classes
 from env.classes.db import DB
 from env.classes.calculator import Calculator
-from env.classes.Classes import Coordinate
+from env.classes.Classes import CoordinateArray
 
 def main() -> None:
     db = DB()
@@ -14,9 +14,8 @@ def main() -> None:
     for step_width in numpy.arange(1.0, 20.1, 0.1):
         print(f"Saving coordinates for step width {step_width:.1f}...")
         for angle in range(360):
-            coords: list[Coordinate] = clctr.get_coordinates(step_width=round(step_width, 1), angle=angle)
-            for coord in coords:
-                db.store_coordinates(step_width=round(float(step_width), 1), angle=angle, coord=coord)
+            coords: CoordinateArray = clctr.get_coordinates(step_width=round(step_width, 1), angle=angle)
+            db.store_coordinate_array(step_width=round(float(step_width), 1), angle=angle, coords=coords)
     db.save()
 
     print("Done!")
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import argparse
+
+# Config
+from env.config import config
+config.servo_output = "simulated"  # Has to be set before the first servo is created
+
+# Classes
+from env.classes.movement import Movement
+from env.classes.clock import get_clock
+from env.classes.scheduler import motion_scheduler
+from env.classes.servo_backend import SimulatedBackend, get_servo_backend
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Runs movements on the simulated servo backend (virtual clock) and reports their timing.")
+    arg_parser.add_argument("commands", nargs="+", help="Commands of Movement.function_map (e.g. step-forwards turn-left), names of the movements in config.mmt_default_path, MMT files (*.mmt) or - to stream MMT text from stdin.")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="How often each command is run.")
+    arg_parser.add_argument("--debug", action="store_true", help="Print the debug output of the movements.")
+    args = arg_parser.parse_args()
+    config.debug = args.debug
+
+    movement: Movement = Movement()
+    if os.path.isdir(config.mmt_default_path):
+        movement.parse_folder(config.mmt_default_path)  # Makes the movements available by name
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    clock = get_clock()
+
+    for command in args.commands:
+        backend.clear()
+        virtual_start_ns: int = clock.now_ns()
+        wall_start_ns: int = time.perf_counter_ns()
+
+        for _ in range(args.repeat):
+            if command == "-":                     movement.stream_mmt(sys.stdin)
+            elif command.endswith(".mmt"):         movement.play_mmt(command)
+            elif command in movement.function_map: movement.function_map[command]()
+            else:                                  movement.execute_mmt(command)  # Movements parse_folder skips (e.g. test files) are looked up in config.mmt_default_path
+        motion_scheduler.wait_idle()  # A gait step returns before its cycle ends
+
+        virtual_s: float = (clock.now_ns() - virtual_start_ns) / 1e9 / args.repeat
+        wall_s: float = (time.perf_counter_ns() - wall_start_ns) / 1e9 / args.repeat
+        print(f"{command}: {virtual_s:.3f} s simulated, {wall_s * 1000:.2f} ms real ({virtual_s / wall_s:.0f}x), {len(backend.writes) / args.repeat:.0f} channel writes")
+
+    print(f"Scheduler lateness: {movement.get_control_jitter()}")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Make the env package importable when pytest is run from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config
+from env.config import config
+config.servo_output = "simulated"  # Has to be set before the first servo is created
+config.debug = False
+
+@pytest.fixture
+def movement(tmp_path, monkeypatch):
+    """Movement on the simulated backend; Database, servo state and caches are written to a temporary working directory."""
+    from env.classes.movement import Movement
+    monkeypatch.chdir(tmp_path)
+    return Movement()
@@ -0,0 +1,14 @@
+import pytest
+from numpy import arange
+
+# Func
+from env.func.leg_helper import adjust_angle, adjust_angles
+
+@pytest.mark.parametrize("is_mirrored", [False, True])
+@pytest.mark.parametrize("deviation", [-7, 0, 12])
+def test_adjust_angles_matches_adjust_angle(is_mirrored: bool, deviation: int) -> None:
+    angles = arange(-90, 91)
+
+    adjusted = adjust_angles(is_mirrored=is_mirrored, angles=angles, deviation=deviation)
+
+    assert adjusted.tolist() == [adjust_angle(is_mirrored=is_mirrored, max_angle=180, angle=angle, deviation=deviation, min_angle=0) for angle in angles.tolist()]
@@ -0,0 +1,30 @@
+from numpy import isnan
+from numpy.random import default_rng
+
+# Classes
+from env.classes.Classes import Coordinate
+
+# Func
+import env.func.calculations as calculations
+from env.func.calculations import calc_servo_angles, calc_servo_angles_batch
+
+POINTS: int = 2000
+
+def test_batch_matches_scalar_on_random_points() -> None:
+    coordinates = default_rng(0).uniform(low=(-40.0, -30.0, -30.0), high=(40.0, 30.0, 30.0), size=(POINTS, 3))
+    coordinates = coordinates[~isnan(calc_servo_angles_batch(coordinates, rounded=False, strict=False)).any(axis=1)]  # Reachable positions only
+    assert len(coordinates) > POINTS // 2
+
+    batch = calc_servo_angles_batch(coordinates)
+
+    for (x, y, z), angles in zip(coordinates.tolist(), batch.tolist()):
+        scalar = calc_servo_angles(Coordinate(x, y, z))
+        assert angles == [scalar["thigh"], scalar["lower-leg"], scalar["side-axis"]], (x, y, z)
+
+def test_batch_reuses_the_kinematics_model() -> None:
+    calc_servo_angles_batch(default_rng(1).uniform(-5.0, 5.0, size=(4, 3)))
+    model = calculations._kinematics
+
+    calc_servo_angles_batch(default_rng(2).uniform(-5.0, 5.0, size=(4, 3)))
+
+    assert model is not None and calculations._kinematics is model
@@ -0,0 +1,45 @@
+# Classes
+from env.classes.catalogue import MovementCatalogue
+from env.classes.mmt_parser import Parser
+
+# Config
+from env.config import config
+
+def block(seconds: float, z: float) -> str:
+    return "MOVEMENT-START\n" f"seconds={seconds}\n" + "".join(f"{leg}: x=0.0, y=0.0, z={z}\n" for leg in config.mmt_legs) + "MOVEMENT-JOIN\n\n"
+
+def write_library(folder, broken: list[str]) -> list[str]:
+    names: list[str] = [f"move{idx}" for idx in range(4)] + broken
+    for idx, name in enumerate(names):
+        text: str = block(0.5, idx) + block(0.25, idx + 1)
+        (folder / f"{name}.mmt").write_text(text[:-len("MOVEMENT-JOIN\n\n")] if name in broken else text, encoding="UTF-8")  # Broken: unclosed block
+    return names
+
+def test_pool_parsing_skips_broken_files(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(config, "mmt_cache", False)
+    write_library(tmp_path, broken=["broken"])
+    catalogue: MovementCatalogue = MovementCatalogue(Parser())
+
+    names: list[str] = catalogue.load_folder(str(tmp_path), workers=2)
+
+    assert names == [f"move{idx}" for idx in range(4)]
+    assert "broken" not in catalogue
+    assert catalogue.get("move2").blocks == 2 and catalogue.get("move2").duration == 0.75  # type:ignore[union-attr]
+    assert catalogue.get("move2").bounds_max[2] == 3.0  # type:ignore[union-attr]
+
+def test_pool_parsing_skips_unchanged_files_and_drops_broken_edits(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(config, "mmt_cache", False)
+    write_library(tmp_path, broken=[])
+    parser: Parser = Parser()
+    parser.parse_files([str(file_path) for file_path in sorted(tmp_path.glob("*.mmt"))], workers=2)
+    compiled: dict = dict(parser.compiled)
+
+    assert parser.parse_files(list(compiled), workers=2) == list(compiled)  # Unchanged files are skipped
+    assert all(parser.compiled[file_path] is arrays for file_path, arrays in compiled.items())
+
+    changed: str = list(compiled)[0]
+    with open(changed, "a", encoding="UTF-8") as f:
+        f.write("MOVEMENT-START\n")  # Broken now
+
+    assert parser.parse_files(list(compiled), workers=2) == list(compiled)[1:]
+    assert changed not in parser.compiled and changed not in parser.stamps
@@ -0,0 +1,85 @@
+from threading import Event, Thread
+
+# Classes
+from env.classes.command_queue import CommandQueue
+from env.classes.movement import Movement
+from env.classes.servo_backend import SimulatedBackend, get_servo_backend
+
+# Config
+from env.config import config
+
+TIMEOUT: float = 5.0
+
+def blocking_queue(lookahead: int) -> tuple[CommandQueue, Event, list[str]]:
+    """Queue whose commands block until the returned event is set; Executed commands are appended to the returned list."""
+    release: Event = Event()
+    done: list[str] = []
+
+    def command(name: str):
+        def run() -> None:
+            release.wait(TIMEOUT)
+            done.append(name)
+        return run
+
+    return CommandQueue({name: command(name) for name in ("a", "b", "c", "d")}, lookahead=lookahead), release, done
+
+def test_put_blocks_while_lookahead_is_full() -> None:
+    queue, release, done = blocking_queue(lookahead=2)
+    queue.put("a")
+    with queue._condition:
+        assert queue._condition.wait_for(lambda: queue._running == "a", timeout=TIMEOUT)
+
+    assert queue.put("b") and queue.put("c")
+    assert not queue.put("d", timeout=0.05)  # 'a' runs, 'b' and 'c' wait
+
+    release.set()
+    assert queue.wait_idle(timeout=TIMEOUT)
+    assert done == ["a", "b", "c"]
+
+def test_clear_drops_waiting_commands_and_finishes_the_running_one() -> None:
+    queue, release, done = blocking_queue(lookahead=3)
+    queue.put("a")
+    with queue._condition:
+        assert queue._condition.wait_for(lambda: queue._running == "a", timeout=TIMEOUT)
+    queue.put("b")
+    queue.put("c")
+
+    queue.clear()
+    release.set()
+
+    assert queue.wait_idle(timeout=TIMEOUT)
+    assert done == ["a"]
+
+def test_interrupt_drops_a_step_which_did_not_submit_yet(movement: Movement, monkeypatch) -> None:
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    backend.clear()
+    compile_cycle = movement.gait.compile
+
+    def interrupted_compile(circles):
+        cycle = compile_cycle(circles)
+        movement.interrupt_movements()  # RESET arrives while the step is still compiling
+        return cycle
+    monkeypatch.setattr(movement.gait, "compile", interrupted_compile)
+
+    circles = movement.gait.circles(angles=config.step_map_angles["step-forward"], step_width=config.step_width)
+    queue: CommandQueue = CommandQueue({"step": lambda: movement.gait.step(circles=circles)}, lookahead=1)
+    queue.put("step")
+
+    assert queue.wait_idle(timeout=TIMEOUT)
+    assert not backend.writes
+    assert all(servo.pending_motion is None for servo in movement.gait.servos)
+
+def test_commands_wait_for_run_after_thread() -> None:
+    startup_done: Event = Event()
+    startup: Thread = Thread(target=startup_done.wait, args=(TIMEOUT,), daemon=True)
+    startup.start()
+    done: list[str] = []
+    queue: CommandQueue = CommandQueue({"a": lambda: done.append("a"), "b": lambda: done.append("b")}, lookahead=2)
+    queue.run_after(startup)
+
+    assert queue.put("a", timeout=0) and queue.put("b", timeout=0)  # Queued right away while the startup runs
+    assert not queue.wait_idle(timeout=0.05) and not done
+
+    startup_done.set()
+    assert queue.wait_idle(timeout=TIMEOUT)
+    assert done == ["a", "b"]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+# Classes
+from env.classes.Classes import Coordinate, CoordinateArray
+
+@pytest.fixture
+def coords() -> CoordinateArray:
+    return CoordinateArray(np.arange(12, dtype=float).reshape(4, 3))
+
+@pytest.mark.parametrize("idx", [1, np.int64(1), np.int32(1), np.intp(1)])
+def test_integer_index_returns_a_coordinate(coords: CoordinateArray, idx) -> None:
+    assert coords[idx] == Coordinate(3.0, 4.0, 5.0)
+
+def test_negative_index(coords: CoordinateArray) -> None:
+    assert coords[np.int64(-1)] == Coordinate(9.0, 10.0, 11.0)
+
+def test_slice_is_a_view(coords: CoordinateArray) -> None:
+    part = coords[1:3]
+    assert isinstance(part, CoordinateArray)
+    assert part.xyz.tolist() == [[3.0, 4.0, 5.0], [6.0, 7.0, 8.0]]
+    assert np.shares_memory(part.xyz, coords.xyz)
+
+def test_mask_index(coords: CoordinateArray) -> None:
+    part = coords[np.array([True, False, True, False])]
+    assert isinstance(part, CoordinateArray)
+    assert part.xyz.tolist() == [[0.0, 1.0, 2.0], [6.0, 7.0, 8.0]]
+
+def test_integer_array_index(coords: CoordinateArray) -> None:
+    assert coords[np.array([3, 0])].xyz.tolist() == [[9.0, 10.0, 11.0], [0.0, 1.0, 2.0]]
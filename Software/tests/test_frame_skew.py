@@ -0,0 +1,15 @@
+# Classes
+from env.classes.pca9685 import PCA9685, FakeI2CBus
+from env.classes.servo_backend import PCA9685Backend
+
+BUS_SPEED_HZ: float = 100_000
+
+def test_block_write_skew_is_the_transfer_time() -> None:
+    backend: PCA9685Backend = PCA9685Backend(PCA9685(bus=FakeI2CBus(bus_speed_hz=BUS_SPEED_HZ)))
+    angles: dict[int, int] = {channel: 90 for channel in range(12)}
+
+    backend.write_frame(angles)
+
+    transfer_ns: float = backend.frame_bytes(list(angles)) * 9 / BUS_SPEED_HZ * 1e9
+    assert backend.frame_stats.last_skew_ns >= transfer_ns
+    assert backend.frame_stats.last_skew_ns <= backend.frame_stats.last_write_ns
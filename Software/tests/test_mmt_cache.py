@@ -0,0 +1,53 @@
+import os
+from numpy import arange, array, load
+
+# Classes
+from env.classes.mmt_parser import Parser
+
+# Func
+from env.func.mmt_cache import file_stamp, get_cache_path, load_compiled_mmt, save_compiled_mmt
+
+# Config
+from env.config import config
+
+TEXT: str = "MOVEMENT-START\nseconds=0.5\n" + "".join(f"{leg}: x={idx}.0, y=0.0, z=1.0\n" for idx, leg in enumerate(config.mmt_legs)) + "MOVEMENT-JOIN\n"
+
+def mmt_file(tmp_path) -> str:
+    file_path: str = str(tmp_path / "move.mmt")
+    with open(file_path, "w", encoding="UTF-8") as f:
+        f.write(TEXT)
+    return file_path
+
+def test_compiled_file_is_keyed_by_the_leg_order(tmp_path, monkeypatch) -> None:
+    file_path: str = mmt_file(tmp_path)
+    save_compiled_mmt(file_path, array([0.5]), arange(12, dtype=float).reshape(1, 4, 3))
+    assert load_compiled_mmt(file_path) is not None
+
+    monkeypatch.setattr(config, "mmt_legs", tuple(reversed(config.mmt_legs)))
+    assert load_compiled_mmt(file_path) is None
+
+    # The parser compiles the text again in the new leg order
+    parser: Parser = Parser()
+    parser.parse_file(file_path)
+    assert parser.get_coordinates(file_path)[0, :, 0].tolist() == [3.0, 2.0, 1.0, 0.0]
+
+def test_touched_file_refreshes_the_stamp(tmp_path) -> None:
+    file_path: str = mmt_file(tmp_path)
+    save_compiled_mmt(file_path, array([0.5]), arange(12, dtype=float).reshape(1, 4, 3))
+    mtime_ns, _ = file_stamp(file_path)
+    os.utime(file_path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))  # Same text, new mtime (e.g. a checkout)
+
+    compiled = load_compiled_mmt(file_path)
+
+    assert compiled is not None and compiled[1].ravel().tolist() == list(range(12))
+    with load(get_cache_path(file_path)) as data:
+        assert (int(data["mtime_ns"]), int(data["size"])) == file_stamp(file_path)
+
+def test_edited_file_invalidates_the_compiled_file(tmp_path) -> None:
+    file_path: str = mmt_file(tmp_path)
+    save_compiled_mmt(file_path, array([0.5]), arange(12, dtype=float).reshape(1, 4, 3))
+
+    with open(file_path, "a", encoding="UTF-8") as f:
+        f.write("\n// Edited\n")
+
+    assert load_compiled_mmt(file_path) is None
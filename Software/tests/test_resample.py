@@ -0,0 +1,47 @@
+import pytest
+from numpy import array, diff, interp, isnan
+
+# Classes
+from env.classes.timeline import JointTimeline
+
+TICK_RATE: float = 100.0
+TIMES: list[float] = [0.1, 0.4, 0.5, 1.0, 1.3]
+KEYFRAMES = array([[0.0, 10.0], [30.0, 10.0], [35.0, 10.0], [-20.0, 40.0], [-20.0, 40.0]])
+
+def test_linear_matches_interp() -> None:
+    timeline: JointTimeline = JointTimeline.resample(times=TIMES, keyframes=KEYFRAMES, tick_rate=TICK_RATE, interpolation="linear")
+
+    assert timeline.times[-1] == pytest.approx(TIMES[-1])
+    active = timeline.times >= TIMES[0] - 0.5 / TICK_RATE
+    assert isnan(timeline.angles[~active]).all()  # Before the first keyframe
+    for servo in range(KEYFRAMES.shape[1]):
+        assert timeline.angles[active, servo].tolist() == interp(timeline.times[active], TIMES, KEYFRAMES[:, servo]).round().tolist()
+
+@pytest.mark.parametrize("interpolation", ["linear", "cubic"])
+def test_keyframes_are_hit_and_never_overshot(interpolation: str) -> None:
+    timeline: JointTimeline = JointTimeline.resample(times=TIMES, keyframes=KEYFRAMES, tick_rate=TICK_RATE, interpolation=interpolation)
+
+    for time, keyframe in zip(TIMES, KEYFRAMES):
+        assert timeline.angles[round(time * TICK_RATE) - 1].tolist() == keyframe.tolist()
+
+    for start, end in zip(range(len(TIMES) - 1), range(1, len(TIMES))):
+        segment = timeline.angles[round(TIMES[start] * TICK_RATE) - 1:round(TIMES[end] * TICK_RATE)]
+        low, high = KEYFRAMES[[start, end]].min(axis=0), KEYFRAMES[[start, end]].max(axis=0)
+        assert ((segment >= low) & (segment <= high)).all()  # Monotone between two keyframes; Equal keyframes stay idle
+
+def test_cubic_is_smooth_but_keeps_straight_lines() -> None:
+    times, keyframes = [0.0, 0.5, 1.0], array([[0.0], [50.0], [100.0]])
+    linear: JointTimeline = JointTimeline.resample(times=times, keyframes=keyframes, tick_rate=TICK_RATE, interpolation="linear")
+    cubic: JointTimeline = JointTimeline.resample(times=times, keyframes=keyframes, tick_rate=TICK_RATE, interpolation="cubic")
+
+    assert (diff(cubic.angles[:, 0]) >= 0).all()
+    assert cubic.angles[:, 0].tolist() == linear.angles[:, 0].tolist()  # Constant speed stays a straight line
+
+    curved: JointTimeline = JointTimeline.resample(times=TIMES, keyframes=KEYFRAMES, tick_rate=TICK_RATE, interpolation="cubic")
+    assert curved.angles.tolist() != JointTimeline.resample(times=TIMES, keyframes=KEYFRAMES, tick_rate=TICK_RATE).angles.tolist()
+
+def test_invalid_input_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        JointTimeline.resample(times=TIMES, keyframes=KEYFRAMES, interpolation="quadratic")
+    with pytest.raises(ValueError):
+        JointTimeline.resample(times=[0.1, 0.1], keyframes=array([[0.0], [1.0]]))
@@ -0,0 +1,37 @@
+import os
+import shutil
+
+# Classes
+from env.classes.movement import Movement
+from env.classes.clock import get_clock
+from env.classes.servo_backend import SimulatedBackend, get_servo_backend
+
+# Config
+from env.config import config
+
+TEST_MOVEMENT: str = os.path.join(os.path.dirname(__file__), "..", "..", "movements", "TEST_movement.mmt")
+
+def test_backend_is_simulated() -> None:
+    assert isinstance(get_servo_backend(), SimulatedBackend)
+
+def test_command_runs_on_the_virtual_clock(movement: Movement) -> None:
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    backend.clear()
+    start_ns: int = get_clock().now_ns()
+
+    movement.function_map["step-forwards"]()
+
+    assert get_clock().now_ns() > start_ns
+    assert backend.writes
+
+def test_mmt_file_plays_to_its_last_block(movement: Movement, tmp_path) -> None:
+    file_path: str = shutil.copy(TEST_MOVEMENT, tmp_path / "TEST_movement.mmt")
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    backend.clear()
+    start_ns: int = get_clock().now_ns()
+
+    movement.play_mmt(str(file_path))
+
+    assert (get_clock().now_ns() - start_ns) / 1e9 >= movement.compile_mmt(str(file_path)).duration - 1 / config.control_tick_rate
+    for leg in config.mmt_legs:
+        assert movement.parser_legs[leg].current_position == movement.parser.get_leg_trajectory(str(file_path), leg)[-1]
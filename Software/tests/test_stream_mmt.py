@@ -0,0 +1,54 @@
+import time
+from threading import Timer
+
+# Classes
+from env.classes.clock import MonotonicClock, get_clock
+from env.classes.movement import Movement
+from env.classes.scheduler import motion_scheduler
+from env.classes.servo_backend import SimulatedBackend, get_servo_backend
+
+# Config
+from env.config import config
+
+def move(z: float) -> list[str]:
+    return ["MOVEMENT-START", "seconds=0.5", *(f"{leg}: x=0.0, y=0.0, z={z}" for leg in config.mmt_legs), "MOVEMENT-JOIN"]
+
+WAIT: list[str] = ["MOVEMENT-START", "WAIT=2", "MOVEMENT-JOIN"]
+
+def test_wait_holds_for_its_duration(movement: Movement) -> None:
+    start_ns: int = get_clock().now_ns()
+
+    assert movement.stream_mmt(move(0.0) + WAIT + move(1.0)) == 3
+    assert get_clock().now_ns() - start_ns >= 3_000_000_000
+
+def test_interrupt_stops_a_wait(movement: Movement, monkeypatch) -> None:
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    clock = get_clock()
+    sleep = clock.sleep
+
+    def interrupted_sleep(seconds: float) -> None:
+        if seconds < 1.0:  # Scheduler ticks
+            return sleep(seconds)
+        sleep(seconds / 4)
+        movement.interrupt_movements()  # RESET a quarter into the WAIT
+    monkeypatch.setattr(clock, "sleep", interrupted_sleep)
+
+    start_ns: int = clock.now_ns()
+    played: int = movement.stream_mmt(move(0.0) + WAIT + move(1.0))
+    writes: int = len(backend.writes)
+
+    assert played == 1  # The WAIT and the block after it aren't played
+    assert clock.now_ns() - start_ns < 1_500_000_000  # 0.5 s movement and a quarter of the WAIT
+    monkeypatch.undo()
+    motion_scheduler.wait_idle()
+    assert len(backend.writes) == writes
+
+def test_interrupt_wakes_a_wait_on_the_real_clock(movement: Movement, monkeypatch) -> None:
+    monkeypatch.setattr(motion_scheduler.ticker, "_clock", MonotonicClock())
+    timer: Timer = Timer(0.05, movement.interrupt_movements)
+    timer.start()
+
+    start: float = time.perf_counter()
+    assert not movement._hold(duration=5.0, interrupts=movement._interrupts)
+    assert time.perf_counter() - start < 1.0
+    timer.join()
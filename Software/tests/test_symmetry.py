@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+# Classes
+from env.classes.Classes import CoordinateArray
+from env.classes.movement import Movement
+
+# Func
+from env.func.symmetry import find_shift, solve_paths
+
+# Config
+from env.config import config
+
+def test_find_shift_of_a_phase_shifted_path() -> None:
+    path: np.ndarray = np.arange(30, dtype=float).reshape(10, 3)
+    assert find_shift(np.roll(path, -3, axis=0), path) == 3
+    assert find_shift(path, path) == 0
+    assert find_shift(path[::-1].copy(), path) is None
+
+@pytest.mark.parametrize("gait", ["trot", "legacy"])
+def test_derived_angles_equal_the_full_solve(movement: Movement, monkeypatch, gait: str) -> None:
+    monkeypatch.setattr(config, "gait", gait)
+    cache = movement.leg_left_front.ik_cache
+
+    monkeypatch.setattr(config, "ik_symmetry", "off")
+    cache.clear()
+    full = movement.compile_timelines()
+    full_lookups: float = cache.stats()["hits"] + cache.stats()["misses"]
+
+    monkeypatch.setattr(config, "ik_symmetry", "on")
+    cache.clear()
+    derived = movement.compile_timelines()
+    derived_lookups: float = cache.stats()["hits"] + cache.stats()["misses"]
+
+    for direction in full:
+        np.testing.assert_array_equal(derived[direction].angles, full[direction].angles)
+    assert derived_lookups < full_lookups
+
+def test_validate_falls_back_to_the_full_solve(movement: Movement, monkeypatch) -> None:
+    legs = movement.all_legs[:2]
+    path: CoordinateArray = CoordinateArray(np.array([[0.0, 0.0, 0.0], [5.0, 0.0, 0.0], [5.0, 5.0, 2.0]]))
+    paths = {leg: (leg, path) for leg in legs}
+
+    # Break the derivation: every derived leg gets the angles of the canonical path shifted by one row
+    monkeypatch.setattr("env.func.symmetry.find_shift", lambda path, canonical: 1)
+    validated = solve_paths(paths, symmetry="validate")
+
+    for leg in legs:
+        np.testing.assert_array_equal(validated[leg], leg.solve_coordinates(path))
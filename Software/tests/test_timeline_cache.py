@@ -0,0 +1,44 @@
+from numpy import array
+
+# Classes
+from env.classes.timeline import JointTimeline, TimelineCache
+
+# Config
+from env.config import config
+
+def counting_compile(calls: list[float]):
+    """Compile function which records the step width of every call and returns one timeline depending on it."""
+    def compile() -> dict[str, JointTimeline]:
+        calls.append(config.step_width)
+        return {"step-forwards": JointTimeline(times=array([0.1, 0.2]), angles=array([[0.0], [config.step_width]]))}
+    return compile
+
+def ready(cache: TimelineCache) -> TimelineCache:
+    cache.compile_async()
+    cache.wait()
+    return cache
+
+def test_config_change_invalidates_the_timelines(tmp_path, monkeypatch) -> None:
+    calls: list[float] = []
+    cache: TimelineCache = ready(TimelineCache(counting_compile(calls), file_path=str(tmp_path / "timelines.npz")))
+    assert cache.get("step-forwards") is not None and len(calls) == 1
+
+    monkeypatch.setattr(config, "step_width", config.step_width + 1)
+    assert cache.get("step-forwards") is None  # Stale; Recompiled in the background
+
+    cache.wait()
+    assert calls == [calls[0], calls[0] + 1]
+    assert cache.get("step-forwards").angles[-1, 0] == config.step_width  # type:ignore[union-attr]
+
+def test_cache_file_is_only_used_with_the_same_fingerprint(tmp_path, monkeypatch) -> None:
+    file_path: str = str(tmp_path / "timelines.npz")
+    calls: list[float] = []
+    ready(TimelineCache(counting_compile(calls), file_path=file_path))
+
+    loaded: TimelineCache = ready(TimelineCache(counting_compile(calls), file_path=file_path))
+    assert len(calls) == 1  # Loaded from the file
+    assert loaded.get("step-forwards").angles.tolist() == [[0.0], [config.step_width]]  # type:ignore[union-attr]
+
+    monkeypatch.setattr(config, "gait_cycle_time", config.gait_cycle_time * 2)
+    ready(TimelineCache(counting_compile(calls), file_path=file_path))
+    assert len(calls) == 2  # Compiled with a different config; Recompiled
@@ -0,0 +1,54 @@
+import os
+import shutil
+import time
+
+# Classes
+from env.classes.clock import get_clock
+from env.classes.movement import Movement
+from env.classes.scheduler import motion_scheduler
+from env.classes.servo_backend import SimulatedBackend, get_servo_backend
+
+TEST_MOVEMENT: str = os.path.join(os.path.dirname(__file__), "..", "..", "movements", "TEST_movement.mmt")
+SEQUENCE: tuple[str, ...] = ("step-forwards", "step-forwards", "turn-left", "step-forwards")
+
+def run_sequence(movement: Movement, pause_s: float = 0.0) -> tuple[list[tuple[int, int, int]], int]:
+    """Runs SEQUENCE from the normal position and returns the writes (relative to the start) and the simulated duration in ns."""
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    movement.normalize_all_legs()
+    backend.clear()
+    start_ns: int = get_clock().now_ns()
+
+    for command in SEQUENCE:
+        movement.function_map[command]()
+        time.sleep(pause_s)  # Real time the producer needs must not change the simulation
+    motion_scheduler.wait_idle()
+
+    return [(time_ns - start_ns, channel, angle) for time_ns, channel, angle in backend.writes], get_clock().now_ns() - start_ns
+
+def test_scheduler_runs_synchronously_on_the_virtual_clock() -> None:
+    assert motion_scheduler.synchronous
+
+def test_exact_write_count_and_end_time(movement: Movement) -> None:
+    writes, duration_ns = run_sequence(movement)
+
+    assert len(writes) == 340
+    assert writes[-1][0] == 410_000_000
+    assert duration_ns == 420_000_000
+
+def test_slow_producer_gives_the_same_writes(movement: Movement) -> None:
+    fast = run_sequence(movement)
+    slow = run_sequence(movement, pause_s=0.02)
+
+    assert slow == fast
+
+def test_mmt_timing_is_exact(movement: Movement, tmp_path) -> None:
+    file_path: str = str(shutil.copy(TEST_MOVEMENT, tmp_path / "TEST_movement.mmt"))
+    backend: SimulatedBackend = get_servo_backend()  # type:ignore[assignment]
+    movement.normalize_all_legs()
+    backend.clear()
+    start_ns: int = get_clock().now_ns()
+
+    movement.play_mmt(file_path)
+
+    assert get_clock().now_ns() - start_ns == 12_000_000_000
+    assert len(backend.writes) == 96
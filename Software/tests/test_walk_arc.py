@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+# Classes
+from env.classes.ik_cache import IKCache
+from env.classes.movement import Movement
+
+@pytest.fixture
+def circles(movement: Movement, monkeypatch) -> dict:
+    """Circles walk_arc hands to the gait (nothing is moved)."""
+    captured: dict = {}
+    monkeypatch.setattr(movement.gait, "step", lambda circles, cycle=None: captured.update(circles))
+    return captured
+
+@pytest.mark.parametrize("heading_deg", [0.0, 45.0, 90.0, 180.0])
+def test_each_foot_travels_speed_times_stance_time(movement: Movement, circles: dict, heading_deg: float) -> None:
+    speed_mm_s: float = 60.0
+    movement.walk_arc(speed_mm_s=speed_mm_s, yaw_rate_deg_s=0.0, heading_deg=heading_deg)
+    gait = movement.gait
+
+    for circle in circles.values():
+        # Start and end of the swing (the stance pushes the foot back by the same distance)
+        start, end = gait._leg_path(np.array([0.0, 1 - gait.duty_factor - 1e-9]), circle).xyz
+        assert np.hypot(*(end - start)[:2]) == pytest.approx(speed_mm_s * gait.duty_factor * gait.cycle_time, rel=1e-3)
+
+def test_all_legs_are_solved_in_one_batch(movement: Movement, circles: dict, monkeypatch) -> None:
+    movement.walk_arc(speed_mm_s=40.0, yaw_rate_deg_s=20.0)
+    batches: list[int] = []
+    solve_batch = IKCache.solve_batch
+    monkeypatch.setattr(IKCache, "solve_batch", lambda self, coordinates: batches.append(len(coordinates)) or solve_batch(self, coordinates))
+
+    cycle = movement.gait.compile(circles)
+
+    assert len(batches) == 1
+    assert cycle.angles.shape == (movement.gait.samples, 12)